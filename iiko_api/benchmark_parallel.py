@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Сравнение последовательной и параллельной обработки заказов
+
+Генерирует ответы get_orders для нескольких организаций и строит отчёты
+по товарам, категориям и часам: в одном процессе, в пуле процессов с
+группировками общей таблицы в главном процессе и в пуле процессов с
+группировками по организациям в процессах пула (iiko_api_parallel).
+Время разбора и группировок выводится отдельно.
+
+Запуск:
+    python benchmark_parallel.py --organizations 32 --orders 50000 --workers 8
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from iiko_api_parallel import (orders_report_from_json, orders_table_from_json,
+                               orders_table_from_json_serial)
+
+STATUSES = ["New", "InProgress", "Closed", "Cancelled"]
+
+
+def generate_payload(organization_id: str, orders_count: int, products: int, seed: int) -> bytes:
+    """Тело ответа get_orders со случайными заказами"""
+    rng = random.Random(seed)
+    orders = []
+    for i in range(orders_count):
+        items = []
+        for _ in range(rng.randint(1, 6)):
+            product = rng.randrange(products)
+            amount = rng.randint(1, 3)
+            price = 100.0 + product % 50 * 10
+            items.append({"productId": f"product-{product:05d}", "productName": f"Товар {product}",
+                          "amount": amount, "price": price, "sum": amount * price})
+        orders.append({
+            "id": f"{organization_id}-order-{i:07d}",
+            "organizationId": organization_id,
+            "status": rng.choice(STATUSES),
+            "sum": sum(item["sum"] for item in items),
+            "createdDate": f"2024-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:"
+                           f"{rng.randint(0, 59):02d}:00.000Z",
+            "items": items,
+        })
+    return json.dumps({"orders": orders}, ensure_ascii=False).encode("utf-8")
+
+
+def report(name: str, parsing: float, aggregation: float, orders: int, top: list,
+           categories: list) -> float:
+    total = parsing + aggregation
+    print(f"{name:<22} {parsing:>7.2f} {aggregation:>11.2f} {total:>7.2f} {orders:>10} "
+          f"{len(top):>5} {len(categories):>10}")
+    return total
+
+
+def run_table(name: str, build) -> float:
+    """Разбор в общую таблицу, группировки - в главном процессе"""
+    start = time.perf_counter()
+    table = build()
+    parsed = time.perf_counter()
+    top = table.by_product(top=10)
+    categories = table.by_category()
+    table.by_hour(utc_offset=3)
+    finished = time.perf_counter()
+    return report(name, parsed - start, finished - parsed, len(table), top, categories)
+
+
+def run_report(name: str, payloads, categories, workers: int) -> float:
+    """Разбор и группировки по организациям в процессах пула, сложение итогов"""
+    start = time.perf_counter()
+    result = orders_report_from_json(payloads, categories, top=10, utc_offset=3,
+                                     max_workers=workers)
+    finished = time.perf_counter()
+    # Разбор и группировки выполняются в одном задании процесса пула
+    return report(name, finished - start, 0.0, result["summary"]["totalOrders"],
+                  result["byProduct"], result["byCategory"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--organizations", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=20000, help="Заказов на организацию")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    payloads = {f"org-{i:03d}": generate_payload(f"org-{i:03d}", args.orders, args.products, i)
+                for i in range(args.organizations)}
+    size = sum(len(payload) for payload in payloads.values()) / 1024 / 1024
+    categories = {f"product-{p:05d}": f"Категория {p % 20}" for p in range(args.products)}
+
+    print(f"Организаций: {args.organizations}, заказов: {args.organizations * args.orders}, "
+          f"JSON: {size:.0f} МБ, процессов: {args.workers}, ядер: {os.cpu_count()}")
+    print(f"{'Режим':<22} {'Разбор':>7} {'Группировки':>11} {'Всего':>7} {'Заказов':>10} "
+          f"{'Топ':>5} {'Категорий':>10}")
+    serial = run_table("Один процесс", lambda: orders_table_from_json_serial(payloads, categories))
+    parallel = run_table("Пул процессов",
+                         lambda: orders_table_from_json(payloads, categories, args.workers))
+    pooled_report = run_report("Пул (разбор+группы)", payloads, categories, args.workers)
+    print(f"Ускорение: пул процессов {serial / parallel:.1f}x, "
+          f"группировки в пуле {serial / pooled_report:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пропускная способность локального расчёта корзины (iiko_api_pricing)
+
+Генерирует набор скидок и акций по товарам, категориям и на весь заказ
+и сравнивает PricingEngine с прямым разбором всех правил для каждой
+строки корзины.
+
+Запуск:
+    python benchmark_pricing.py --rules 5000 --lines 200 --carts 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from iiko_api_pricing import PricingEngine, compile_rule
+
+AT = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+
+
+def generate_rules(count: int, products: int, categories: int, seed: int = 0):
+    rng = random.Random(seed)
+    discounts, promotions = [], []
+    for i in range(count):
+        rule = {"id": f"rule-{i}", "name": f"Правило {i}", "isActive": rng.random() > 0.1}
+        scope = rng.random()
+        if scope < 0.6:
+            rule["productIds"] = [f"product-{rng.randrange(products)}" for _ in range(3)]
+        elif scope < 0.95:
+            rule["category"] = f"Категория {rng.randrange(categories)}"
+        else:
+            rule["minOrderAmount"] = float(rng.randrange(500, 5000, 500))
+        if rng.random() < 0.5:
+            month = rng.randint(1, 12)
+            rule["validFrom"] = f"2024-{month:02d}-01T00:00:00.000Z"
+            rule["validTo"] = f"2024-{month:02d}-28T23:59:59.000Z"
+        if rng.random() < 0.2 and "productIds" in rule:
+            promotions.append({**rule, "type": "BuyOneGetOne"})
+        else:
+            discounts.append({**rule, "percentage": float(rng.randint(5, 30))})
+    return discounts, promotions
+
+
+def generate_cart(lines: int, products: int, rng: random.Random):
+    return [{"productId": f"product-{rng.randrange(products)}", "amount": rng.randint(1, 4),
+             "price": float(rng.randrange(100, 1000, 10))} for _ in range(lines)]
+
+
+def naive_price(rules, categories, items, at):
+    """Разбор всех правил для каждой строки корзины"""
+    moment = at.timestamp()
+    subtotal = sum(item["amount"] * item["price"] for item in items)
+    discount = 0.0
+    for item in items:
+        line_sum = item["amount"] * item["price"]
+        best = 0.0
+        for source in rules:
+            rule = compile_rule(source)
+            if rule is None or not rule.valid_from <= moment < rule.valid_to:
+                continue
+            if subtotal < rule.min_order_amount:
+                continue
+            if rule.products is not None and item["productId"] not in rule.products:
+                continue
+            if rule.categories is not None and categories.get(item["productId"]) not in rule.categories:
+                continue
+            if rule.kind == "BuyOneGetOne":
+                best = max(best, item["amount"] // 2 * item["price"])
+            elif rule.kind == "Percentage":
+                best = max(best, line_sum * rule.percentage / 100)
+        discount += best
+    return round(subtotal - discount, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rules", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=100, help="Строк в корзине")
+    parser.add_argument("--carts", type=int, default=200)
+    parser.add_argument("--naive-carts", type=int, default=3)
+    args = parser.parse_args()
+
+    discounts, promotions = generate_rules(args.rules, args.products, args.categories)
+    categories = {f"product-{p}": f"Категория {p % args.categories}" for p in range(args.products)}
+    rng = random.Random(1)
+    carts = [generate_cart(args.lines, args.products, rng) for _ in range(args.carts)]
+
+    start = time.perf_counter()
+    engine = PricingEngine(discounts, promotions, categories)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [engine.price(cart, at=AT) for cart in carts]
+    elapsed = time.perf_counter() - start
+
+    naive_carts = carts[:args.naive_carts]
+    start = time.perf_counter()
+    naive = [naive_price(discounts + promotions, categories, cart, AT) for cart in naive_carts]
+    naive_elapsed = time.perf_counter() - start
+    assert naive == [result["total"] for result in results[:len(naive_carts)]]
+
+    lines = args.carts * args.lines
+    print(f"Правил: {len(engine)} из {args.rules}, строк в корзине: {args.lines}")
+    print(f"Компиляция правил: {compile_time * 1000:.1f} мс")
+    print(f"PricingEngine: {args.carts / elapsed:,.0f} корзин/с, {lines / elapsed:,.0f} строк/с")
+    per_cart = naive_elapsed / len(naive_carts)
+    print(f"Разбор всех правил: {1 / per_cart:,.1f} корзин/с "
+          f"(медленнее в {per_cart / (elapsed / args.carts):,.0f} раз)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Сравнение HTTP/1.1 и HTTP/2 транспортов на локальных заглушках API
+
+Запускает две локальные заглушки с одинаковой задержкой ответа:
+HTTP/1.1 (http.server) и HTTP/2 без TLS (h2), после чего выполняет
+одинаковую нагрузку из множества потоков через IikoMenuClient.
+
+Запуск:
+    pip install "httpx[http2]"
+    python benchmark_transport.py --workers 200 --requests 2000 --delay 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import h2.config
+import h2.connection
+import h2.events
+
+from data_example import MENU_EXAMPLE
+from iiko_api_oop import IikoMenuClient
+from iiko_api_transport import Http2Transport, RequestsTransport
+
+BODY = json.dumps(MENU_EXAMPLE, ensure_ascii=False).encode("utf-8")
+
+
+def start_http1_stub(delay: float) -> str:
+    """Заглушка HTTP/1.1 с keep-alive"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+class _H2StubProtocol(asyncio.Protocol):
+    """Заглушка HTTP/2 (h2c prior knowledge): отвечает на каждый поток с задержкой"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.StreamEnded):
+                asyncio.get_running_loop().call_later(self.delay, self.respond, event.stream_id)
+        self.transport.write(self.conn.data_to_send())
+
+    def respond(self, stream_id: int):
+        self.conn.send_headers(stream_id, [(":status", "200"),
+                                           ("content-type", "application/json"),
+                                           ("content-length", str(len(BODY)))])
+        self.conn.send_data(stream_id, BODY, end_stream=True)
+        self.transport.write(self.conn.data_to_send())
+
+
+def start_http2_stub(delay: float) -> str:
+    """Заглушка HTTP/2 в отдельном потоке с собственным циклом событий"""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    address = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(
+            loop.create_server(lambda: _H2StubProtocol(delay), "127.0.0.1", 0))
+        address["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{address['port']}"
+
+
+def run_load(client: IikoMenuClient, workers: int, requests_count: int) -> float:
+    """Выполняет requests_count запросов get_menu() из workers потоков"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for items in executor.map(lambda _: client.get_menu(), range(requests_count)):
+            assert len(items) == len(MENU_EXAMPLE["items"])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--delay", type=float, default=0.05, help="Задержка ответа заглушки, с")
+    parser.add_argument("--connections", type=int, default=4, help="Соединений HTTP/2")
+    args = parser.parse_args()
+
+    cases = [
+        ("HTTP/1.1", start_http1_stub(args.delay), RequestsTransport(pool_maxsize=args.workers)),
+        ("HTTP/2", start_http2_stub(args.delay),
+         Http2Transport(max_connections=args.connections, http1_fallback=False)),
+    ]
+
+    print(f"Потоков: {args.workers}, запросов: {args.requests}, задержка: {args.delay} с")
+    print(f"{'Транспорт':<10} {'Время, с':>9} {'Запр./с':>9} {'Соединений':>11} {'Пик запросов':>13}")
+    for name, url, transport in cases:
+        client = IikoMenuClient(url, "bench_key", "bench_org", transport=transport)
+        elapsed = run_load(client, args.workers, args.requests)
+        stats = transport.stats()
+        print(f"{name:<10} {elapsed:>9.2f} {args.requests / elapsed:>9.0f} "
+              f"{stats['connections']:>11} {stats['maxInFlight']:>13}")
+        transport.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+"""
+Столбцовая аналитика заказов iiko
+Документация: https://api-ru.iiko.services/#operation/GetOrders
+
+Заказы из get_orders() (или потокового iter_orders()) загружаются пакетами
+в столбцовые массивы NumPy: таблицу заказов и таблицу позиций заказов.
+Группировки по часу, товару, категории и организации выполняются векторно
+(np.bincount), что позволяет локально строить отчёты детальнее, чем
+get_sales_report(), на миллионах строк.
+"""
+
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Размер пакета заказов при загрузке
+DEFAULT_BATCH_SIZE = 64 * 1024
+
+
+def category_map_from_menu(menu: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Соответствие товар -> категория по данным get_menu()
+
+    Args:
+        menu: Список товаров меню
+
+    Returns:
+        Словарь {ID товара: категория}
+    """
+    return {item["id"]: item["category"] for item in menu if item.get("id") and item.get("category")}
+
+
+class _Vocabulary:
+    """Словарь строковых значений с последовательными номерами"""
+
+    def __init__(self):
+        self.codes: Dict[Optional[str], int] = {}
+        self.values: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: Optional[str]) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class _Columns:
+    """Набор столбцов, накапливаемых пакетами и склеиваемых при первом чтении"""
+
+    def __init__(self, dtypes: Dict[str, Any]):
+        self.dtypes = dtypes
+        self._chunks: Dict[str, List[np.ndarray]] = {name: [] for name in dtypes}
+
+    def append(self, **columns: np.ndarray) -> None:
+        for name, values in columns.items():
+            self._chunks[name].append(values)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        chunks = self._chunks[name]
+        if len(chunks) != 1:
+            merged = np.concatenate(chunks) if chunks else np.zeros(0, dtype=self.dtypes[name])
+            self._chunks[name] = chunks = [merged]
+        return chunks[0]
+
+
+def _parse_timestamps(values: Sequence[Optional[str]]) -> np.ndarray:
+    """ISO даты iiko (2024-01-15T18:30:00.000Z) -> datetime64[ms] в UTC"""
+    cleaned = [value[:-1] if value and value.endswith("Z") else (value or "NaT") for value in values]
+    return np.array(cleaned, dtype="datetime64[ms]")
+
+
+class OrdersTable:
+    """
+    Столбцовая таблица заказов и позиций заказов
+
+    Столбцы заказов: organization, status, created, sum.
+    Столбцы позиций: order (номер строки заказа), product, category, amount, sum.
+    Строковые значения хранятся номерами в словарях organizations, statuses,
+    products и categories.
+    """
+
+    def __init__(self, categories: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            categories: Соответствие товар -> категория (см. category_map_from_menu)
+        """
+        self.category_by_product = categories or {}
+        self.order_ids: List[Optional[str]] = []
+        self.organizations = _Vocabulary()
+        self.statuses = _Vocabulary()
+        self.products = _Vocabulary()
+        self.categories = _Vocabulary()
+        self.product_names: Dict[str, str] = {}
+        self._orders = _Columns({"organization": np.int32, "status": np.int32,
+                                 "created": "datetime64[ms]", "sum": np.float64})
+        self._items = _Columns({"order": np.int64, "product": np.int32, "category": np.int32,
+                                "amount": np.float64, "sum": np.float64})
+
+    def __len__(self) -> int:
+        return len(self.order_ids)
+
+    @classmethod
+    def from_orders(cls, orders: Iterable[Dict[str, Any]], organization_id: Optional[str] = None,
+                    categories: Optional[Dict[str, str]] = None,
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> "OrdersTable":
+        """
+        Построение таблицы из списка или потока заказов
+
+        Args:
+            orders: Заказы (список get_orders() или итератор iter_orders())
+            organization_id: ID организации, если заказы не содержат organizationId
+            categories: Соответствие товар -> категория
+            batch_size: Размер пакета загрузки
+
+        Returns:
+            Таблица заказов
+        """
+        table = cls(categories)
+        table.extend(orders, organization_id, batch_size)
+        return table
+
+    def extend(self, orders: Iterable[Dict[str, Any]], organization_id: Optional[str] = None,
+               batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        """Добавление заказов в таблицу пакетами по batch_size"""
+        iterator = iter(orders)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            self._append_batch(batch, organization_id)
+
+    def _append_batch(self, batch: List[Dict[str, Any]], organization_id: Optional[str]) -> None:
+        first_row = len(self.order_ids)
+        organization_code = self.organizations.code
+        status_code = self.statuses.code
+        product_code = self.products.code
+        category_code = self.categories.code
+
+        item_order: List[int] = []
+        item_product: List[int] = []
+        item_category: List[int] = []
+        item_amount: List[float] = []
+        item_sum: List[float] = []
+
+        for row, order in enumerate(batch, first_row):
+            for item in order.get("items") or ():
+                product_id = item.get("productId")
+                amount = item.get("amount") or 0
+                price = item.get("price") or 0
+                item_order.append(row)
+                item_product.append(product_code(product_id))
+                item_category.append(category_code(self.category_by_product.get(product_id,
+                                                                                item.get("category"))))
+                item_amount.append(amount)
+                item_sum.append(item["sum"] if item.get("sum") is not None else amount * price)
+                if product_id and item.get("productName"):
+                    self.product_names[product_id] = item["productName"]
+
+        self.order_ids.extend(order.get("id") for order in batch)
+        self._orders.append(
+            organization=np.fromiter((organization_code(order.get("organizationId", organization_id))
+                                      for order in batch), dtype=np.int32, count=len(batch)),
+            status=np.fromiter((status_code(order.get("status")) for order in batch),
+                               dtype=np.int32, count=len(batch)),
+            created=_parse_timestamps([order.get("createdDate") for order in batch]),
+            sum=np.fromiter((order.get("sum") or 0.0 for order in batch),
+                            dtype=np.float64, count=len(batch)),
+        )
+        self._items.append(
+            order=np.array(item_order, dtype=np.int64),
+            product=np.array(item_product, dtype=np.int32),
+            category=np.array(item_category, dtype=np.int32),
+            amount=np.array(item_amount, dtype=np.float64),
+            sum=np.array(item_sum, dtype=np.float64),
+        )
+
+    # ==================== ПЕРЕДАЧА МЕЖДУ ПРОЦЕССАМИ ====================
+
+    def to_arrays(self) -> Dict[str, Any]:
+        """
+        Компактное представление таблицы для передачи между процессами
+
+        Столбцы передаются массивами NumPy, строковые значения - списками
+        словарей (по одному значению на уникальную строку), а не словарями
+        заказов.
+        """
+        return {
+            "orderIds": self.order_ids,
+            "organizations": self.organizations.values,
+            "statuses": self.statuses.values,
+            "products": self.products.values,
+            "categories": self.categories.values,
+            "productNames": self.product_names,
+            "orders": {name: self._orders[name] for name in self._orders.dtypes},
+            "items": {name: self._items[name] for name in self._items.dtypes},
+        }
+
+    @classmethod
+    def concat(cls, parts: Iterable[Dict[str, Any]],
+               categories: Optional[Dict[str, str]] = None) -> "OrdersTable":
+        """
+        Объединение таблиц, полученных через to_arrays()
+
+        Номера строковых значений каждой части переводятся в общие словари
+        векторно, через массив соответствия.
+        """
+        table = cls(categories)
+        for part in parts:
+            first_row = len(table.order_ids)
+            remap = {name: np.array([vocabulary.code(value) for value in part[name]],
+                                    dtype=np.int32)
+                     for name, vocabulary in (("organizations", table.organizations),
+                                              ("statuses", table.statuses),
+                                              ("products", table.products),
+                                              ("categories", table.categories))}
+            orders, items = part["orders"], part["items"]
+            table.order_ids.extend(part["orderIds"])
+            table.product_names.update(part["productNames"])
+            table._orders.append(organization=remap["organizations"][orders["organization"]],
+                                 status=remap["statuses"][orders["status"]],
+                                 created=orders["created"], sum=orders["sum"])
+            table._items.append(order=items["order"] + first_row,
+                                product=remap["products"][items["product"]],
+                                category=remap["categories"][items["category"]],
+                                amount=items["amount"], sum=items["sum"])
+        return table
+
+    # ==================== СТОЛБЦЫ ====================
+
+    def orders_column(self, name: str) -> np.ndarray:
+        """Столбец таблицы заказов (organization, status, created, sum)"""
+        return self._orders[name]
+
+    def items_column(self, name: str) -> np.ndarray:
+        """Столбец таблицы позиций (order, product, category, amount, sum)"""
+        return self._items[name]
+
+    def _mask(self, statuses: Optional[Sequence[str]]) -> np.ndarray:
+        """Маска заказов с указанными статусами (None - все заказы)"""
+        status = self._orders["status"]
+        if statuses is None:
+            return np.ones(len(status), dtype=bool)
+        codes = [self.statuses.codes[value] for value in statuses if value in self.statuses.codes]
+        return np.isin(status, codes)
+
+    # ==================== ГРУППИРОВКИ ====================
+
+    def summary(self, statuses: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        Итоги по заказам в формате summary отчёта по продажам
+
+        Args:
+            statuses: Учитывать только заказы с этими статусами
+
+        Returns:
+            Количество заказов, выручка и средний чек
+        """
+        revenue = self._orders["sum"][self._mask(statuses)]
+        count = len(revenue)
+        total = float(revenue.sum())
+        return {
+            "totalOrders": count,
+            "totalRevenue": total,
+            "averageOrderValue": total / count if count else 0.0,
+        }
+
+    def by_hour(self, utc_offset: float = 0.0, of_day: bool = True,
+                statuses: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Выручка, количество заказов и средний чек по часам
+
+        Args:
+            utc_offset: Смещение местного времени от UTC в часах (Москва - 3)
+            of_day: True - по часу суток (0-23), False - по каждому календарному часу
+            statuses: Учитывать только заказы с этими статусами
+
+        Returns:
+            Список строк с ключом hour (час суток или начало часа в ISO формате)
+        """
+        mask = self._mask(statuses)
+        created = self._orders["created"][mask]
+        revenue = self._orders["sum"][mask]
+        valid = ~np.isnat(created)
+        created, revenue = created[valid], revenue[valid]
+        local = created + np.timedelta64(int(round(utc_offset * 60)), "m")
+        hours = local.astype("datetime64[h]").astype(np.int64)
+        if of_day:
+            return _average_rows("hour", list(range(24)), np.bincount(hours % 24, minlength=24),
+                                 np.bincount(hours % 24, weights=revenue, minlength=24))
+        labels_raw, keys = np.unique(hours, return_inverse=True)
+        keys = keys.ravel()
+        return _average_rows("hour", [str(np.datetime64(int(hour), "h")) for hour in labels_raw],
+                             np.bincount(keys, minlength=len(labels_raw)),
+                             np.bincount(keys, weights=revenue, minlength=len(labels_raw)))
+
+    def by_organization(self, statuses: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Выручка, количество заказов и средний чек по организациям"""
+        stats = self._organization_group(statuses)
+        return _average_rows("organizationId", self.organizations.values,
+                             stats["orders"], stats["revenue"])
+
+    def _organization_group(self, statuses: Optional[Sequence[str]]) -> Dict[str, np.ndarray]:
+        """Число заказов и выручка по организациям"""
+        mask = self._mask(statuses)
+        keys = self._orders["organization"][mask]
+        size = len(self.organizations)
+        return {"orders": np.bincount(keys, minlength=size),
+                "revenue": np.bincount(keys, weights=self._orders["sum"][mask], minlength=size)}
+
+    def _items_group(self, key: str, size: int,
+                     statuses: Optional[Sequence[str]]) -> Dict[str, np.ndarray]:
+        """Сумма количества, выручки и число заказов по столбцу позиций"""
+        items_mask = self._mask(statuses)[self._items["order"]]
+        keys = self._items[key][items_mask]
+        orders = self._items["order"][items_mask]
+        revenue = np.bincount(keys, weights=self._items["sum"][items_mask], minlength=size)
+        amount = np.bincount(keys, weights=self._items["amount"][items_mask], minlength=size)
+        # Число различных заказов с позицией: уникальные пары (ключ, заказ)
+        pairs = np.unique(keys.astype(np.int64) * max(len(self), 1) + orders)
+        order_count = np.bincount((pairs // max(len(self), 1)).astype(np.int64), minlength=size)
+        return {"amount": amount, "revenue": revenue, "orders": order_count}
+
+    def by_product(self, statuses: Optional[Sequence[str]] = None,
+                   top: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Продажи по товарам в формате topProducts отчёта по товарам
+
+        Args:
+            statuses: Учитывать только заказы с этими статусами
+            top: Вернуть только первые N товаров по выручке
+
+        Returns:
+            Список строк, отсортированный по убыванию выручки
+        """
+        stats = self._items_group("product", len(self.products), statuses)
+        return _product_rows(self.products.values, self.product_names, stats, top)
+
+    def by_category(self, statuses: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Продажи по категориям в формате byCategory отчёта по продажам"""
+        stats = self._items_group("category", len(self.categories), statuses)
+        return _category_rows(self.categories.values, stats)
+
+    # ==================== АГРЕГАТЫ ДЛЯ ОБЪЕДИНЕНИЯ ====================
+
+    def aggregates(self, statuses: Optional[Sequence[str]] = None,
+                   utc_offset: float = 0.0) -> Dict[str, Any]:
+        """
+        Итоги таблицы по организациям, товарам, категориям и часам суток
+
+        Компактное представление для объединения через merge_aggregates():
+        массивы NumPy по номерам словарей и сами словари. Число заказов
+        с товаром складывается без пересчёта, поэтому объединяемые таблицы
+        не должны содержать одни и те же заказы (например, таблицы разных
+        организаций).
+
+        Args:
+            statuses: Учитывать только заказы с этими статусами
+            utc_offset: Смещение местного времени от UTC в часах (для часов суток)
+        """
+        mask = self._mask(statuses)
+        created = self._orders["created"][mask]
+        revenue = self._orders["sum"][mask]
+        valid = ~np.isnat(created)
+        local = created[valid] + np.timedelta64(int(round(utc_offset * 60)), "m")
+        hours = local.astype("datetime64[h]").astype(np.int64) % 24
+        return {
+            "organizations": {"values": self.organizations.values,
+                              **self._organization_group(statuses)},
+            "products": {"values": self.products.values,
+                         **self._items_group("product", len(self.products), statuses)},
+            "categories": {"values": self.categories.values,
+                           **self._items_group("category", len(self.categories), statuses)},
+            "hours": {"values": list(range(24)), "orders": np.bincount(hours, minlength=24),
+                      "revenue": np.bincount(hours, weights=revenue[valid], minlength=24)},
+            "productNames": self.product_names,
+        }
+
+
+def _average_rows(key: str, labels: Sequence[Any], orders: np.ndarray,
+                  revenue: np.ndarray) -> List[Dict[str, Any]]:
+    """Строки с количеством заказов, выручкой и средним чеком (только непустые)"""
+    return [{key: labels[i], "orders": int(orders[i]), "revenue": float(revenue[i]),
+             "averageCheck": float(revenue[i] / orders[i])}
+            for i in np.flatnonzero(orders)]
+
+
+def _with_percentage(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    total = sum(row["revenue"] for row in rows)
+    for row in rows:
+        row["percentage"] = round(row["revenue"] / total * 100, 1) if total else 0.0
+    rows.sort(key=lambda row: row["revenue"], reverse=True)
+    return rows
+
+
+def _product_rows(values: Sequence[Optional[str]], names: Dict[str, str],
+                  stats: Dict[str, np.ndarray], top: Optional[int]) -> List[Dict[str, Any]]:
+    rows = [{"productId": values[i], "productName": names.get(values[i]),
+             "orders": int(stats["orders"][i]), "amount": float(stats["amount"][i]),
+             "revenue": float(stats["revenue"][i])}
+            for i in np.flatnonzero(stats["orders"])]
+    return _with_percentage(rows)[:top]
+
+
+def _category_rows(values: Sequence[Optional[str]],
+                   stats: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    rows = [{"category": values[i], "orders": int(stats["orders"][i]),
+             "amount": float(stats["amount"][i]), "revenue": float(stats["revenue"][i])}
+            for i in np.flatnonzero(stats["orders"])]
+    return _with_percentage(rows)
+
+
+def _merge_group(groups: Iterable[Dict[str, Any]]) -> Tuple[List[Any], Dict[str, np.ndarray]]:
+    """Сложение одноимённых групп агрегатов по общему словарю значений"""
+    vocabulary = _Vocabulary()
+    parts = []
+    for group in groups:
+        codes = np.array([vocabulary.code(value) for value in group["values"]], dtype=np.int64)
+        parts.append((codes, group))
+    totals: Dict[str, np.ndarray] = {}
+    for codes, group in parts:
+        for name, values in group.items():
+            if name == "values":
+                continue
+            total = totals.setdefault(name, np.zeros(len(vocabulary)))
+            # Номера значений в пределах одной группы уникальны
+            total[codes] += values
+    return vocabulary.values, totals
+
+
+def merge_aggregates(parts: Iterable[Dict[str, Any]], top: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Объединение агрегатов OrdersTable.aggregates() в отчёт
+
+    Складываются только небольшие массивы итогов; сортировка и проценты
+    считаются один раз по объединённым итогам.
+
+    Args:
+        parts: Агрегаты таблиц (например, по одной на организацию)
+        top: Оставить только первые N товаров по выручке
+
+    Returns:
+        summary, byOrganization, byProduct, byCategory и byHour - в тех же
+        форматах, что summary(), by_organization(), by_product(),
+        by_category() и by_hour() таблицы
+    """
+    parts = list(parts)
+    names: Dict[str, str] = {}
+    for part in parts:
+        names.update(part["productNames"])
+    organizations, by_organization = _merge_group(part["organizations"] for part in parts)
+    products, by_product = _merge_group(part["products"] for part in parts)
+    categories, by_category = _merge_group(part["categories"] for part in parts)
+    hours, by_hour = _merge_group(part["hours"] for part in parts)
+    count = int(by_organization["orders"].sum()) if organizations else 0
+    total = float(by_organization["revenue"].sum()) if organizations else 0.0
+    return {
+        "summary": {"totalOrders": count, "totalRevenue": total,
+                    "averageOrderValue": total / count if count else 0.0},
+        "byOrganization": _average_rows("organizationId", organizations,
+                                        by_organization.get("orders", np.zeros(0)),
+                                        by_organization.get("revenue", np.zeros(0))),
+        "byProduct": _product_rows(products, names, by_product, top) if products else [],
+        "byCategory": _category_rows(categories, by_category) if categories else [],
+        "byHour": _average_rows("hour", hours, by_hour.get("orders", np.zeros(0)),
+                                by_hour.get("revenue", np.zeros(0))),
+    }
@@ -0,0 +1,334 @@
+"""
+Пакетная загрузка объектов iiko по ID
+Документация: https://api-ru.iiko.services
+
+API не имеет пакетных методов get_*_by_id, поэтому BatchLoader эмулирует
+их: запросы по ID, сделанные в течение короткого окна (из разных потоков)
+или корутинами одного шага цикла событий, собираются в пакет, ключи
+дедуплицируются, и пакет разрешается одним запросом полного списка
+(get_products/get_customers) либо параллельными запросами по ID.
+Каждый вызывающий получает свою копию результата.
+
+Пакет разрешается в копии контекста вызывающего, поставившего в него
+первый ключ (IikoContext, срок deadline, request_priority), в том числе
+по таймеру окна и в пуле потоков цикла событий.
+
+В корутинах пакет разрешается в пуле потоков цикла событий, поэтому
+HTTP запросы не блокируют цикл.
+"""
+
+import asyncio
+import contextvars
+import copy
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import logging
+
+from iiko_api_concurrency import AimdLimiter, adaptive_map, pool_size
+from iiko_api_oop import ApiRequestError, IikoCustomersClient, IikoMenuClient
+
+logger = logging.getLogger(__name__)
+
+# Окно сбора пакета по умолчанию, секунд
+DEFAULT_BATCH_WINDOW = 0.002
+
+BatchFunction = Callable[[List[Hashable]], Dict[Hashable, Any]]
+
+# Пакет: Future по ключам и контекст, в котором он разрешается
+Batch = Tuple[Dict[Hashable, Future], Optional[contextvars.Context]]
+
+
+def _own_copy(shared: Future) -> Future:
+    """Future вызывающего с собственной копией результата общего Future"""
+    own: Future = Future()
+
+    def copy_result(done: Future) -> None:
+        error = done.exception()
+        if error is not None:
+            own.set_exception(error)
+        else:
+            own.set_result(copy.deepcopy(done.result()))
+
+    shared.add_done_callback(copy_result)
+    return own
+
+
+class BatchLoader:
+    """
+    Загрузчик с пакетированием и дедупликацией запросов (в стиле DataLoader)
+
+    batch_fn получает список уникальных ключей и возвращает словарь
+    ключ -> значение; значение-исключение передаётся только вызывающим
+    с этим ключом, отсутствующий ключ приводит к ApiRequestError.
+
+    Пример:
+        loader = product_loader(client.menu)
+        products = loader.load_many(product_ids)
+        product = await loader.load_async(product_id)
+    """
+
+    def __init__(self, batch_fn: BatchFunction, window: float = DEFAULT_BATCH_WINDOW,
+                 max_batch_size: int = 100, cache: bool = False, cache_ttl: float = 60.0,
+                 max_cached: int = 10000):
+        """
+        Args:
+            batch_fn: Функция загрузки пакета ключей
+            window: Время сбора пакета после первого запроса, секунд
+            max_batch_size: Максимальный размер пакета (при достижении отправляется сразу)
+            cache: Запоминать результаты по ключам (сбрасываются через clear());
+                   цены и остатки меняются, поэтому по умолчанию выключено
+            cache_ttl: Время жизни запомненного результата, секунд
+            max_cached: Максимальное число запомненных результатов
+        """
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.max_cached = max_cached
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, Future] = {}
+        self._context: Optional[contextvars.Context] = None
+        self._results: "OrderedDict[Hashable, Tuple[Future, float]]" = OrderedDict()
+        self._timer: Optional[threading.Timer] = None
+        self._flush_scheduled = False
+
+    def _cached(self, key: Hashable) -> Optional[Future]:
+        """Запомненный результат ключа, если он не истёк (под блокировкой)"""
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return entry[0]
+
+    def _add(self, key: Hashable) -> Tuple[Future, Optional[Batch]]:
+        """
+        Ставит ключ в текущий пакет (под блокировкой)
+
+        Returns:
+            Future для ключа и пакет, если он заполнен и должен быть отправлен
+        """
+        future = self._cached(key) or self._pending.get(key)
+        if future is not None:
+            return future, None
+        future = Future()
+        if not self._pending:
+            self._context = contextvars.copy_context()
+        self._pending[key] = future
+        if self.cache:
+            self._results[key] = (future, time.monotonic() + self.cache_ttl)
+            while len(self._results) > self.max_cached:
+                self._results.popitem(last=False)
+        if len(self._pending) >= self.max_batch_size:
+            return future, self._take_batch()
+        return future, None
+
+    def load(self, key: Hashable) -> Future:
+        """
+        Ставит ключ в текущий пакет
+
+        Returns:
+            Future с копией результата для ключа
+        """
+        with self._lock:
+            future, batch = self._add(key)
+            if batch is None and self._pending and self._timer is None:
+                self._timer = threading.Timer(self.window, self.dispatch)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._resolve(batch)
+        return _own_copy(future)
+
+    def get(self, key: Hashable, timeout: Optional[float] = None) -> Any:
+        """Значение для ключа (блокирует до разрешения пакета)"""
+        return self.load(key).result(timeout)
+
+    def load_many(self, keys: Iterable[Hashable], timeout: Optional[float] = None) -> List[Any]:
+        """Значения для ключей в порядке ключей (один пакет без ожидания окна)"""
+        futures = [self.load(key) for key in keys]
+        self.dispatch()
+        return [future.result(timeout) for future in futures]
+
+    async def load_async(self, key: Hashable) -> Any:
+        """
+        Значение для ключа в корутине
+
+        Ключи, запрошенные корутинами за один шаг цикла событий, попадают
+        в один пакет; пакет разрешается в пуле потоков цикла.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future, batch = self._add(key)
+            schedule = batch is None and bool(self._pending) and not self._flush_scheduled
+            if schedule:
+                self._flush_scheduled = True
+        if batch:
+            loop.run_in_executor(None, self._resolve, batch)
+        elif schedule:
+            loop.call_soon(self._flush_async, loop)
+        return copy.deepcopy(await asyncio.wrap_future(future))
+
+    def _flush_async(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Отправляет пакет, накопленный корутинами за шаг цикла событий"""
+        with self._lock:
+            self._flush_scheduled = False
+            batch = self._take_batch()
+        if batch[0]:
+            loop.run_in_executor(None, self._resolve, batch)
+
+    def dispatch(self) -> None:
+        """Немедленно отправляет накопленный пакет"""
+        with self._lock:
+            batch = self._take_batch()
+        if batch[0]:
+            self._resolve(batch)
+
+    def clear(self, key: Optional[Hashable] = None) -> None:
+        """Сбрасывает запомненные результаты (все или для одного ключа)"""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def _take_batch(self) -> Batch:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = (self._pending, self._context)
+        self._pending, self._context = {}, None
+        return batch
+
+    def _resolve(self, batch: Batch) -> None:
+        """Разрешает пакет в контексте вызывающего, поставившего первый ключ"""
+        futures, context = batch
+        if context is None:
+            self._resolve_futures(futures)
+        else:
+            context.run(self._resolve_futures, futures)
+
+    def _resolve_futures(self, batch: Dict[Hashable, Future]) -> None:
+        try:
+            values = self.batch_fn(list(batch))
+        except Exception as e:
+            logger.error(f"Ошибка загрузки пакета из {len(batch)} ключей: {e}")
+            values = {key: e for key in batch}
+        for key, future in batch.items():
+            if key not in values:
+                value = ApiRequestError(f"Объект {key} не найден")
+            else:
+                value = values[key]
+            if isinstance(value, Exception):
+                future.set_exception(value)
+                if self.cache:
+                    with self._lock:
+                        entry = self._results.get(key)
+                        if entry is not None and entry[0] is future:
+                            del self._results[key]
+            else:
+                future.set_result(value)
+
+
+class ListOrByIdBatch:
+    """
+    Разрешение пакета через полный список или параллельные запросы по ID
+
+    Если полный список загружен не раньше list_ttl секунд назад или пакет
+    не меньше list_threshold ключей, ключи берутся из полного списка;
+    иначе (и для ключей, отсутствующих в списке) выполняются
+    параллельные запросы по ID.
+    """
+
+    def __init__(self, list_fn: Callable[[], List[Dict[str, Any]]],
+                 get_fn: Callable[[Hashable], Dict[str, Any]],
+                 list_threshold: int = 10, list_ttl: float = 300.0, max_workers: int = 8,
+                 limiter: Optional[AimdLimiter] = None):
+        """
+        Args:
+            list_fn: Загрузка полного списка (например, get_products)
+            get_fn: Загрузка одного объекта по ID (например, get_product_by_id)
+            list_threshold: Размер пакета, начиная с которого загружается полный список
+            list_ttl: Время жизни загруженного полного списка, секунд
+            max_workers: Максимум параллельных запросов по ID
+            limiter: Адаптивный лимит параллельных запросов по ID
+        """
+        self.list_fn = list_fn
+        self.get_fn = get_fn
+        self.list_threshold = list_threshold
+        self.list_ttl = list_ttl
+        self.max_workers = max_workers
+        self.limiter = limiter
+        self._items: Optional[Dict[Hashable, Dict[str, Any]]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fresh_items(self) -> Optional[Dict[Hashable, Dict[str, Any]]]:
+        if self._items is not None and time.monotonic() - self._loaded_at < self.list_ttl:
+            return self._items
+        return None
+
+    def _get(self, key: Hashable) -> Any:
+        try:
+            if self.limiter is None:
+                return self.get_fn(key)
+            with self.limiter.slot():
+                return self.get_fn(key)
+        except Exception as e:
+            return e
+
+    def __call__(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        with self._lock:
+            items = self._fresh_items()
+            if items is None and len(keys) >= self.list_threshold:
+                items = {item.get("id"): item for item in self.list_fn()}
+                self._items, self._loaded_at = items, time.monotonic()
+        values: Dict[Hashable, Any] = {}
+        missing = []
+        for key in keys:
+            if items is not None and key in items:
+                values[key] = items[key]
+            else:
+                missing.append(key)
+        if len(missing) == 1:
+            values[missing[0]] = self._get(missing[0])
+        elif missing:
+            values.update(zip(missing, adaptive_map(
+                self._get, missing, max_workers=pool_size(self.max_workers, self.limiter))))
+        return values
+
+
+# Параметры BatchLoader среди параметров product_loader/customer_loader
+_LOADER_OPTIONS = ("window", "max_batch_size", "cache", "cache_ttl", "max_cached")
+
+
+def product_loader(client: IikoMenuClient, **options) -> BatchLoader:
+    """
+    Пакетный загрузчик товаров по ID
+
+    Args:
+        client: Клиент меню
+        **options: Параметры ListOrByIdBatch и BatchLoader (window, max_batch_size, cache, ...)
+    """
+    loader_options = {key: options.pop(key) for key in _LOADER_OPTIONS if key in options}
+    return BatchLoader(ListOrByIdBatch(client.get_products, client.get_product_by_id, **options),
+                       **loader_options)
+
+
+def customer_loader(client: IikoCustomersClient, **options) -> BatchLoader:
+    """
+    Пакетный загрузчик клиентов по ID
+
+    Args:
+        client: Клиент клиентов
+        **options: Параметры ListOrByIdBatch и BatchLoader (window, max_batch_size, cache, ...)
+    """
+    loader_options = {key: options.pop(key) for key in _LOADER_OPTIONS if key in options}
+    return BatchLoader(ListOrByIdBatch(client.get_customers, client.get_customer, **options),
+                       **loader_options)
@@ -0,0 +1,487 @@
+"""
+Кэш ответов API iiko
+Документация: https://api-ru.iiko.services
+
+Справочные данные (меню, товары, скидки, акции) меняются редко, поэтому
+ответы GET запросов к ним кэшируются на время, заданное для эндпоинта.
+
+- MemoryCache - кэш в памяти процесса
+- SqliteCache - кэш в файле SQLite с отображением в память (mmap):
+  рабочие процессы одного хоста используют одну тёплую копию ответов
+  и не загружают их заново после перезапуска
+- ResponseCache - политика кэширования (время жизни по эндпоинтам),
+  используемая клиентами (параметр cache) и обёрткой (set_response_cache)
+- NegativeCache - кэш отсутствующих ID (ответов 404) для запросов сущностей
+  по ID: повторный запрос несуществующего заказа, клиента, товара или доставки
+  завершается ошибкой без обращения к API
+
+Истёкший ответ ещё max_stale секунд отдаётся сразу, а обновляется в фоне
+одним запросом на ключ (stale-while-revalidate). Фоновый планировщик
+(start_refresher) заранее обновляет часто запрашиваемые ключи незадолго
+до истечения, поэтому запросы пользователей не ждут загрузки справочников.
+"""
+
+import contextvars
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+import logging
+
+from iiko_api_deadline import use_deadline
+
+logger = logging.getLogger(__name__)
+
+# Время жизни ответов по эндпоинтам, секунд. Ключ, оканчивающийся на "/",
+# задаёт время жизни для всех вложенных путей (например, товаров по ID)
+DEFAULT_CACHE_TTLS: Dict[str, float] = {
+    "/api/1/organizations": 3600,
+    "/api/1/menu": 900,
+    "/api/1/products": 900,
+    "/api/1/products/": 900,
+    "/api/1/discounts": 600,
+    "/api/1/promotions": 600,
+}
+
+
+def credentials_scope(api_key: Optional[str]) -> str:
+    """
+    Область кэша для учётных данных: ответы разных API ключей не смешиваются
+
+    В ключ кэша попадает хэш ключа, а не сам ключ (SqliteCache хранится на диске).
+    """
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+class CacheEntry(NamedTuple):
+    """Запись кэша: значение и время истечения (time.time())"""
+    value: Any
+    expires_at: float
+
+
+class MemoryCache:
+    """Кэш в памяти процесса с вытеснением давно неиспользуемых записей"""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Args:
+            max_entries: Максимальное число записей
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """Запись по ключу (в том числе истёкшая) или None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Сохраняет значение на ttl секунд"""
+        with self._lock:
+            self._entries[key] = CacheEntry(value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SqliteCache:
+    """
+    Кэш в файле SQLite, общий для процессов одного хоста
+
+    Файл открывается в режиме WAL: чтения не блокируются записью другого
+    процесса, а страницы базы отображаются в память (mmap_size), так что
+    все процессы читают одну копию из страничного кэша ОС. В режиме
+    readonly процесс только читает кэш, наполняемый другим процессом.
+    """
+
+    def __init__(self, path: str, readonly: bool = False, mmap_size: int = 256 * 1024 * 1024,
+                 timeout: float = 5.0):
+        """
+        Args:
+            path: Путь к файлу кэша
+            readonly: Только чтение (запись выполняет другой процесс)
+            mmap_size: Размер отображаемой в память части файла, байт
+            timeout: Ожидание блокировки записи, секунд
+        """
+        self.path = path
+        self.readonly = readonly
+        self.mmap_size = mmap_size
+        self.timeout = timeout
+        self._local = threading.local()
+        if not readonly:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            connection = self._connection()
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS responses ("
+                               "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+            connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Соединения SQLite нельзя разделять между потоками
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self.readonly:
+                connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True,
+                                             timeout=self.timeout)
+            else:
+                connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.connection = connection
+        return connection
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """Запись по ключу (в том числе истёкшая) или None"""
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка чтения кэша {self.path}: {e}")
+            return None
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Сохраняет значение на ttl секунд"""
+        if self.readonly:
+            return
+        payload = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        try:
+            connection = self._connection()
+            connection.execute("INSERT OR REPLACE INTO responses (key, value, expires_at) "
+                               "VALUES (?, ?, ?)", (key, payload, time.time() + ttl))
+            connection.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка записи кэша {self.path}: {e}")
+
+    def delete(self, key: str) -> None:
+        if self.readonly:
+            return
+        connection = self._connection()
+        connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+        connection.commit()
+
+    def clear(self) -> None:
+        if self.readonly:
+            return
+        connection = self._connection()
+        connection.execute("DELETE FROM responses")
+        connection.commit()
+
+    def purge_expired(self) -> int:
+        """Удаляет истёкшие записи. Возвращает число удалённых"""
+        if self.readonly:
+            return 0
+        connection = self._connection()
+        cursor = connection.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        connection.commit()
+        return cursor.rowcount
+
+
+class _HotKey(NamedTuple):
+    """Загрузчик часто запрашиваемого ключа для фонового обновления"""
+    ttl: float
+    loader: Callable[[], Any]
+    context: contextvars.Context
+    last_access: float
+
+
+class ResponseCache:
+    """
+    Политика кэширования ответов GET запросов
+
+    Пример:
+        cache = ResponseCache(SqliteCache("/var/cache/iiko/responses.db"))
+        cache.start_refresher()
+        client = IikoMainClient(api_key, organization_id, cache=cache)
+    """
+
+    def __init__(self, backend: Optional[Any] = None, ttls: Optional[Dict[str, float]] = None,
+                 max_stale: float = 3600.0, refresh_ahead: float = 0.1,
+                 max_hot_keys: int = 256, refresh_workers: int = 2):
+        """
+        Args:
+            backend: Хранилище (MemoryCache, SqliteCache); по умолчанию MemoryCache
+            ttls: Время жизни по эндпоинтам, секунд (по умолчанию DEFAULT_CACHE_TTLS)
+            max_stale: Сколько секунд после истечения ответ отдаётся с фоновым
+                       обновлением (0 - истёкший ответ загружается синхронно)
+            refresh_ahead: Доля времени жизни до истечения, в которую планировщик
+                           обновляет часто запрашиваемые ключи
+            max_hot_keys: Максимум ключей, отслеживаемых для фонового обновления
+            refresh_workers: Число потоков фонового обновления
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = dict(DEFAULT_CACHE_TTLS if ttls is None else ttls)
+        self._prefixes = sorted((prefix for prefix in self.ttls if prefix.endswith("/")),
+                                key=len, reverse=True)
+        self.max_stale = max_stale
+        self.refresh_ahead = refresh_ahead
+        self.max_hot_keys = max_hot_keys
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers,
+                                            thread_name_prefix="iiko-cache-refresh")
+        self._lock = threading.Lock()
+        self._loading: Dict[str, Future] = {}
+        self._hot: "OrderedDict[str, _HotKey]" = OrderedDict()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._stats = {"hits": 0, "staleHits": 0, "misses": 0, "refreshes": 0, "refreshErrors": 0}
+
+    def ttl_for(self, endpoint: str) -> Optional[float]:
+        """Время жизни ответа эндпоинта или None, если он не кэшируется"""
+        ttl = self.ttls.get(endpoint)
+        if ttl is None:
+            for prefix in self._prefixes:
+                if endpoint.startswith(prefix):
+                    return self.ttls[prefix]
+        return ttl
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None, scope: Optional[str] = None) -> str:
+        """
+        Ключ кэша по URL, параметрам запроса и области учётных данных
+
+        Args:
+            scope: Область учётных данных (credentials_scope); без неё ответы
+                   разных API ключей попадали бы в одну запись
+        """
+        return f"{scope or ''}:{url}?{json.dumps(params or {}, sort_keys=True, ensure_ascii=False)}"
+
+    def fetch(self, url: str, endpoint: str, params: Optional[Dict[str, Any]],
+              loader: Callable[[], Any], scope: Optional[str] = None) -> Any:
+        """
+        Ответ из кэша или загруженный loader() (и сохранённый в кэш)
+
+        Истёкший не более max_stale секунд назад ответ возвращается сразу,
+        а loader() выполняется в фоне. Одновременные загрузки одного ключа
+        объединяются в одну.
+
+        Каждый вызывающий получает собственную копию ответа.
+
+        Args:
+            scope: Область учётных данных запроса (credentials_scope)
+        """
+        ttl = self.ttl_for(endpoint)
+        if not ttl:
+            return loader()
+        key = self.key(url, params, scope)
+        now = time.time()
+        self._remember(key, ttl, loader)
+        entry = self.backend.get_entry(key)
+        if entry is not None and entry.expires_at > now:
+            self._count("hits")
+            return copy.deepcopy(entry.value)
+        if entry is not None and now - entry.expires_at <= self.max_stale:
+            self._count("staleHits")
+            self._load(key, ttl, loader, background=True)
+            return copy.deepcopy(entry.value)
+        self._count("misses")
+        return copy.deepcopy(self._load(key, ttl, loader).result())
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, key: str, ttl: float, loader: Callable[[], Any]) -> None:
+        """Запоминает загрузчик ключа с контекстом вызова (учётные данные IikoContext)"""
+        with self._lock:
+            self._hot[key] = _HotKey(ttl, loader, contextvars.copy_context(), time.time())
+            self._hot.move_to_end(key)
+            while len(self._hot) > self.max_hot_keys:
+                self._hot.popitem(last=False)
+
+    def _load(self, key: str, ttl: float, loader: Callable[[], Any],
+              background: bool = False) -> Future:
+        """
+        Загрузка ключа: одна на ключ, остальные вызовы получают её результат
+
+        Синхронная загрузка выполняется в потоке вызывающего, фоновая - в пуле
+        в копии контекста вызова без срока выполнения (deadline) вызывающего.
+        """
+        with self._lock:
+            future = self._loading.get(key)
+            if future is not None:
+                return future
+            future = self._loading[key] = Future()
+        if background:
+            context = contextvars.copy_context()
+            self._executor.submit(context.run, self._run_load, key, ttl, loader, future, True)
+        else:
+            self._run_load(key, ttl, loader, future, False)
+        return future
+
+    def _run_load(self, key: str, ttl: float, loader: Callable[[], Any], future: Future,
+                  background: bool) -> None:
+        try:
+            if background:
+                with use_deadline(None):
+                    value = loader()
+            else:
+                value = loader()
+            # В кэш попадает копия: загрузчик может продолжать изменять свой ответ
+            self.backend.set(key, copy.deepcopy(value), ttl)
+            future.set_result(value)
+            if background:
+                self._count("refreshes")
+        except BaseException as e:
+            future.set_exception(e)
+            if background:
+                self._count("refreshErrors")
+                logger.warning(f"Ошибка фонового обновления кэша {key}: {e}")
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+
+    def refresh_due(self) -> int:
+        """
+        Запускает фоновое обновление ключей, истекающих в пределах refresh_ahead
+
+        Обновляются только ключи, запрошенные за последнее время жизни.
+
+        Returns:
+            Число запущенных обновлений
+        """
+        now = time.time()
+        with self._lock:
+            hot = list(self._hot.items())
+        started = 0
+        for key, hot_key in hot:
+            if now - hot_key.last_access > hot_key.ttl:
+                continue
+            entry = self.backend.get_entry(key)
+            if entry is None or entry.expires_at - now <= hot_key.ttl * self.refresh_ahead:
+                hot_key.context.run(self._load, key, hot_key.ttl, hot_key.loader, True)
+                started += 1
+        return started
+
+    def start_refresher(self, interval: float = 5.0) -> None:
+        """Запускает планировщик фонового обновления часто запрашиваемых ключей"""
+        if self._refresher is not None:
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh_due()
+                except Exception as e:
+                    logger.error(f"Ошибка планировщика обновления кэша: {e}")
+
+        self._refresher = threading.Thread(target=run, name="iiko-cache-refresher", daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self) -> None:
+        if self._refresher is not None:
+            self._stop.set()
+            self._refresher.join()
+            self._refresher = None
+
+    def stats(self) -> Dict[str, int]:
+        """Попадания (в том числе в истёкшие записи), промахи и фоновые обновления"""
+        with self._lock:
+            return {**self._stats, "hotKeys": len(self._hot)}
+
+    def invalidate(self, url: str, params: Optional[Dict[str, Any]] = None,
+                   scope: Optional[str] = None) -> None:
+        """Удаляет закэшированный ответ"""
+        key = self.key(url, params, scope)
+        self.backend.delete(key)
+        with self._lock:
+            self._hot.pop(key, None)
+
+
+class NegativeCache:
+    """
+    Кэш отсутствующих ID: короткое время жизни, ограниченный размер
+
+    Ключ записи - (тип сущности, ID организации, ID сущности). Создание
+    сущности сбрасывает все записи её типа в организации (invalidate), так как
+    ID создаваемой сущности может быть запрошен до создания.
+
+    Пример:
+        negative_cache = NegativeCache(ttl=30)
+        client = IikoMainClient(api_key, organization_id, negative_cache=negative_cache)
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        """
+        Args:
+            ttl: Сколько секунд ID считается отсутствующим
+            max_entries: Максимальное число записей
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Any, Hashable], Tuple[float, int]]" = OrderedDict()
+        # Поколения записей по (тип, организация): сброс без перебора записей
+        self._generations: Dict[Tuple[str, Any], int] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "invalidations": 0}
+        self._hits_by_resource: Dict[str, int] = {}
+
+    def contains(self, resource: str, organization_id: Any, entity_id: Hashable) -> bool:
+        """ID известен как отсутствующий (учитывается в статистике попаданий)"""
+        key = (resource, organization_id, entity_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, generation = entry
+                if (expires_at > now
+                        and generation == self._generations.get((resource, organization_id), 0)):
+                    self._stats["hits"] += 1
+                    self._hits_by_resource[resource] = self._hits_by_resource.get(resource, 0) + 1
+                    return True
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return False
+
+    def add(self, resource: str, organization_id: Any, entity_id: Hashable) -> None:
+        """Запоминает ID как отсутствующий на ttl секунд"""
+        key = (resource, organization_id, entity_id)
+        with self._lock:
+            generation = self._generations.get((resource, organization_id), 0)
+            self._entries[key] = (time.monotonic() + self.ttl, generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats["stored"] += 1
+
+    def invalidate(self, resource: str, organization_id: Any,
+                   entity_id: Optional[Hashable] = None) -> None:
+        """Сбрасывает запись ID или, если entity_id не указан, все записи типа в организации"""
+        with self._lock:
+            self._stats["invalidations"] += 1
+            if entity_id is not None:
+                self._entries.pop((resource, organization_id, entity_id), None)
+                return
+            scope = (resource, organization_id)
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Попадания (всего и по типам сущностей), промахи, сохранённые и сброшенные записи"""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries),
+                    "hitsByResource": dict(self._hits_by_resource)}
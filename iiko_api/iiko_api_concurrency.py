@@ -0,0 +1,303 @@
+"""
+Адаптивное ограничение параллельности запросов к API iiko (AIMD)
+Документация: https://api-ru.iiko.services
+
+Фиксированное число потоков для параллельной загрузки либо недогружает API
+ночью, либо перегружает его в часы пик. AimdLimiter подбирает допустимое
+число одновременных запросов по наблюдаемым ответам:
+
+- пока задержка остаётся в пределах latency_tolerance от базовой, лимит
+  растёт аддитивно (примерно на increase за время одного ответа);
+- при ответе 429/503, таймауте или всплеске задержки лимит умножается
+  на backoff (не чаще одного раза за время ответа).
+
+Таймауты, вызванные сроком самого вызова (DeadlineExceeded, таймауты,
+сокращённые request_timeout(), и таймауты после истечения текущего срока),
+перегрузкой не считаются: иначе один нетерпеливый вызов снижал бы общий
+лимит семейства для всех.
+
+AdaptiveConcurrencyTransport оборачивает HTTP транспорт и ведёт отдельный
+лимит для каждого семейства эндпоинтов (/api/1/orders, /api/1/reports, ...).
+Параллельные загрузки (Reconciler.sync, ListOrByIdBatch, DeliveryFeed)
+принимают limiter и выполняют задачи через adaptive_map.
+
+Пример:
+    transport = AdaptiveConcurrencyTransport(RequestsTransport(pool_maxsize=64))
+    client = IikoMainClient(api_key, organization_id, transport=transport)
+
+    feed = DeliveryFeed(clients, max_workers=32, limiter=AimdLimiter(initial_limit=4))
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+from urllib.parse import urlsplit
+import logging
+
+import requests
+
+from iiko_api_deadline import DeadlineExceeded, current_deadline, is_capped_timeout
+
+logger = logging.getLogger(__name__)
+
+# Коды ответов, означающие перегрузку API
+OVERLOAD_STATUS_CODES = frozenset({429, 503})
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def endpoint_family(method: str, url: str) -> str:
+    """Семейство эндпоинтов запроса: /api/1/orders/order-1 -> /api/1/orders"""
+    return "/".join(urlsplit(url).path.split("/")[:4])
+
+
+def _caller_timeout(error: BaseException, timeout: Any) -> bool:
+    """Таймаут вызван сроком самого вызова, а не медленным API"""
+    if isinstance(error, DeadlineExceeded) or is_capped_timeout(timeout):
+        return True
+    budget = current_deadline()
+    return budget is not None and budget.expired
+
+
+def is_overload_error(error: BaseException, timeout: Any = None) -> bool:
+    """
+    Ошибка вызова вызвана перегрузкой API (429/503 или таймаут), в том числе обёрнутая
+
+    Args:
+        error: Исключение вызова
+        timeout: Таймауты запроса, переданные транспорту (если известны)
+
+    Таймауты, вызванные сроком вызова (DeadlineExceeded, таймауты, сокращённые
+    request_timeout(), таймаут после истечения текущего срока), перегрузкой не считаются.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, requests.exceptions.Timeout):
+            return not _caller_timeout(error, timeout)
+        response = getattr(error, "response", None)
+        if getattr(response, "status_code", None) in OVERLOAD_STATUS_CODES:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class AimdLimiter:
+    """Лимит одновременных запросов с аддитивным ростом и мультипликативным снижением"""
+
+    def __init__(self, initial_limit: float = 4, min_limit: float = 1, max_limit: float = 64,
+                 increase: float = 1.0, backoff: float = 0.5, latency_tolerance: float = 2.0,
+                 smoothing: float = 0.05):
+        """
+        Args:
+            initial_limit: Начальный лимит
+            min_limit: Минимальный лимит
+            max_limit: Максимальный лимит
+            increase: Прирост лимита за время одного ответа
+            backoff: Множитель лимита при перегрузке
+            latency_tolerance: Во сколько раз задержка может превысить базовую без снижения лимита
+            smoothing: Вес нового замера в скользящей базовой задержке
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._stats = {"requests": 0, "overloads": 0, "latencySpikes": 0, "decreases": 0,
+                       "maxInFlight": 0}
+
+    @property
+    def limit(self) -> int:
+        """Текущий лимит одновременных запросов"""
+        return max(1, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Ожидает свободного места в лимите. Возвращает False по истечении timeout"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < self.limit, timeout):
+                return False
+            self._in_flight += 1
+            self._stats["maxInFlight"] = max(self._stats["maxInFlight"], self._in_flight)
+            return True
+
+    def acquire_within_deadline(self) -> None:
+        """
+        Ожидает свободного места не дольше срока текущего вызова (deadline)
+
+        Raises:
+            DeadlineExceeded: Если срок истёк раньше, чем освободилось место
+        """
+        budget = current_deadline()
+        if not self.acquire(None if budget is None else budget.remaining()):
+            raise DeadlineExceeded("Истёк срок выполнения: ожидание места в лимите параллельности")
+
+    def release(self, latency: float, overloaded: bool = False) -> None:
+        """
+        Освобождает место и корректирует лимит по результату запроса
+
+        Args:
+            latency: Задержка ответа, секунд
+            overloaded: Ответ 429/503 или таймаут
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._stats["requests"] += 1
+            spike = (not overloaded and self._baseline is not None
+                     and latency > self._baseline * self.latency_tolerance)
+            if overloaded or spike:
+                self._stats["overloads" if overloaded else "latencySpikes"] += 1
+                now = time.monotonic()
+                # Ответы, отправленные до снижения, не снижают лимит повторно
+                if now - self._last_decrease >= (self._baseline or latency):
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._last_decrease = now
+                    self._stats["decreases"] += 1
+                    logger.debug(f"Лимит параллельности снижен до {self.limit}")
+            else:
+                self._baseline = (latency if self._baseline is None else
+                                  self._baseline + self.smoothing * (latency - self._baseline))
+                # Лимит растёт, только если он действительно используется
+                if (self._in_flight + 1) * 2 >= self._limit:
+                    self._limit = min(self.max_limit, self._limit + self.increase / self._limit)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Место в лимите на время блока; ошибки перегрузки снижают лимит
+
+        Raises:
+            DeadlineExceeded: Если срок текущего вызова истёк до получения места
+        """
+        self.acquire_within_deadline()
+        started = time.monotonic()
+        overloaded = False
+        try:
+            yield
+        except BaseException as e:
+            overloaded = is_overload_error(e)
+            raise
+        finally:
+            self.release(time.monotonic() - started, overloaded)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {"limit": self.limit, "inFlight": self._in_flight,
+                    "baselineSeconds": self._baseline, **self._stats}
+
+
+def pool_size(max_workers: int, limiter: Optional[AimdLimiter] = None) -> int:
+    """Размер пула потоков: с адаптивным лимитом - до его максимума, чтобы лимит мог расти"""
+    return max_workers if limiter is None else max(max_workers, int(limiter.max_limit))
+
+
+def adaptive_map(func: Callable[[T], R], items: Iterable[T],
+                 limiter: Optional[AimdLimiter] = None, max_workers: int = 4) -> List[R]:
+    """
+    Параллельное выполнение func для элементов с адаптивным лимитом
+
+    Без limiter одновременно выполняется до max_workers вызовов; с limiter -
+    не больше текущего limiter.limit (пул растёт до limiter.max_limit).
+    limiter должен быть отдельным от лимитов AdaptiveConcurrencyTransport,
+    через который идут запросы func, иначе вызов занимает два места.
+
+    Вызовы выполняются в копиях контекста вызывающего (IikoContext,
+    request_priority, срок deadline).
+
+    Returns:
+        Результаты в порядке элементов
+    """
+    items = list(items)
+    if not items:
+        return []
+    call = func
+    if limiter is not None:
+        def call(item: T) -> R:
+            with limiter.slot():
+                return func(item)
+    # Копия контекста на вызов: один контекст нельзя выполнять в двух потоках сразу
+    contexts = [contextvars.copy_context() for _ in items]
+    workers = max(1, min(pool_size(max_workers, limiter), len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda context, item: context.run(call, item), contexts, items))
+
+
+class AdaptiveConcurrencyTransport:
+    """HTTP транспорт с адаптивным лимитом параллельности по семействам эндпоинтов"""
+
+    def __init__(self, transport: Any, classifier: Callable[[str, str], str] = endpoint_family,
+                 limits: Optional[Dict[str, Dict[str, Any]]] = None, **limit_options):
+        """
+        Args:
+            transport: Оборачиваемый транспорт (метод request() как у requests.Session)
+            classifier: Функция (method, url) -> семейство эндпоинтов
+            limits: Параметры AimdLimiter для отдельных семейств
+            **limit_options: Параметры AimdLimiter по умолчанию
+        """
+        self.transport = transport
+        self.classifier = classifier
+        self.limits = limits or {}
+        self.limit_options = limit_options
+        self._limiters: Dict[str, AimdLimiter] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> Any:
+        """Сессия requests оборачиваемого транспорта (если есть)"""
+        return getattr(self.transport, "session", None)
+
+    def limiter(self, family: str) -> AimdLimiter:
+        """Лимит семейства эндпоинтов (создаётся при первом обращении)"""
+        with self._lock:
+            limiter = self._limiters.get(family)
+            if limiter is None:
+                options = {**self.limit_options, **self.limits.get(family, {})}
+                limiter = self._limiters[family] = AimdLimiter(**options)
+            return limiter
+
+    def request(self, method: str, url: str, **kwargs) -> Any:
+        """
+        Выполняет HTTP запрос в пределах лимита его семейства эндпоинтов
+
+        Raises:
+            DeadlineExceeded: Если срок вызова истёк в ожидании места в лимите
+        """
+        limiter = self.limiter(self.classifier(method, url))
+        limiter.acquire_within_deadline()
+        started = time.monotonic()
+        overloaded = False
+        try:
+            response = self.transport.request(method, url, **kwargs)
+            overloaded = getattr(response, "status_code", None) in OVERLOAD_STATUS_CODES
+            return response
+        except BaseException as e:
+            overloaded = is_overload_error(e, kwargs.get("timeout"))
+            raise
+        finally:
+            limiter.release(time.monotonic() - started, overloaded)
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика оборачиваемого транспорта и лимитов по семействам"""
+        inner = self.transport.stats() if hasattr(self.transport, "stats") else {}
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {**inner, "families": {family: limiter.stats() for family, limiter in limiters.items()}}
+
+    def close(self) -> None:
+        """Закрывает оборачиваемый транспорт"""
+        if hasattr(self.transport, "close"):
+            self.transport.close()
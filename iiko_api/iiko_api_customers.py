@@ -0,0 +1,357 @@
+"""
+Локальный справочник клиентов iiko
+Документация: https://api-ru.iiko.services
+
+Хранит индексы клиентов по нормализованному телефону и email, а также
+префиксное дерево для автодополнения. Поиск клиента при оформлении
+заказа выполняется локально, без обращений к API.
+"""
+
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from iiko_api_oop import IikoCustomersClient
+
+logger = logging.getLogger(__name__)
+
+# Интервал фоновой синхронизации по умолчанию, секунд
+DEFAULT_RESYNC_INTERVAL = 15 * 60
+
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    Приводит телефон к виду 7XXXXXXXXXX
+
+    Args:
+        phone: Телефон в произвольном формате (+7 (900) 123-45-67, 89001234567, ...)
+
+    Returns:
+        Строка из цифр или None, если цифр нет
+    """
+    if not phone:
+        return None
+    digits = _NON_DIGITS.sub("", phone)
+    if not digits:
+        return None
+    if len(digits) == 11 and digits[0] == "8":
+        digits = "7" + digits[1:]
+    elif len(digits) == 10:
+        digits = "7" + digits
+    return digits
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Приводит email к нижнему регистру без пробелов по краям"""
+    if not email:
+        return None
+    email = email.strip().lower()
+    return email or None
+
+
+class _PrefixTrie:
+    """Префиксное дерево: ключ -> множество ID клиентов"""
+
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_PrefixTrie"] = {}
+        self.ids: Set[str] = set()
+
+    def insert(self, key: str, customer_id: str) -> None:
+        node = self
+        for char in key:
+            node = node.children.setdefault(char, _PrefixTrie())
+        node.ids.add(customer_id)
+
+    def remove(self, key: str, customer_id: str) -> None:
+        path = []
+        node = self
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                return
+            path.append((node, char))
+            node = child
+        node.ids.discard(customer_id)
+        # Удаляем опустевшие ветви
+        for parent, char in reversed(path):
+            child = parent.children[char]
+            if child.ids or child.children:
+                break
+            del parent.children[char]
+
+    def search(self, prefix: str, limit: int) -> List[str]:
+        node = self
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        result: List[str] = []
+        stack = [node]
+        while stack and len(result) < limit:
+            current = stack.pop()
+            result.extend(sorted(current.ids)[:limit - len(result)])
+            stack.extend(current.children[char] for char in sorted(current.children, reverse=True))
+        return result
+
+
+class _Indexes:
+    """Набор индексов одного снимка справочника"""
+
+    def __init__(self):
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        # Один телефон или email может быть у нескольких клиентов
+        self.by_phone: Dict[str, Set[str]] = {}
+        self.by_email: Dict[str, Set[str]] = {}
+        self.phone_trie = _PrefixTrie()
+        self.name_trie = _PrefixTrie()
+
+    def add(self, customer: Dict[str, Any]) -> None:
+        customer_id = customer.get("id")
+        if not customer_id:
+            return
+        if customer_id in self.by_id:
+            self.remove(customer_id)
+        self.by_id[customer_id] = customer
+        phone = normalize_phone(customer.get("phone"))
+        if phone:
+            self.by_phone.setdefault(phone, set()).add(customer_id)
+            self.phone_trie.insert(phone, customer_id)
+        email = normalize_email(customer.get("email"))
+        if email:
+            self.by_email.setdefault(email, set()).add(customer_id)
+        for word in _name_words(customer.get("name")):
+            self.name_trie.insert(word, customer_id)
+
+    def remove(self, customer_id: str) -> None:
+        customer = self.by_id.pop(customer_id, None)
+        if customer is None:
+            return
+        phone = normalize_phone(customer.get("phone"))
+        if phone:
+            _discard(self.by_phone, phone, customer_id)
+            self.phone_trie.remove(phone, customer_id)
+        email = normalize_email(customer.get("email"))
+        if email:
+            _discard(self.by_email, email, customer_id)
+        for word in _name_words(customer.get("name")):
+            self.name_trie.remove(word, customer_id)
+
+    def first(self, ids: Optional[Set[str]]) -> Optional[Dict[str, Any]]:
+        """Клиент с наименьшим ID из найденных по индексу (None, если не найдено)"""
+        for customer_id in sorted(ids or ()):
+            customer = self.by_id.get(customer_id)
+            if customer is not None:
+                return customer
+        return None
+
+
+def _discard(index: Dict[str, Set[str]], key: str, customer_id: str) -> None:
+    """Удаляет ID клиента из индекса, не затрагивая других клиентов с тем же ключом"""
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(customer_id)
+        if not ids:
+            del index[key]
+
+
+def _name_words(name: Optional[str]) -> List[str]:
+    return name.lower().split() if name else []
+
+
+def _merge(indexes: _Indexes, customer_id: str, changes: Dict[str, Any]) -> None:
+    """Дополняет клиента в индексах изменёнными полями"""
+    previous = indexes.by_id.get(customer_id, {})
+    indexes.add({**previous, **changes, "id": customer_id})
+
+
+class CustomerDirectory:
+    """
+    Локальный справочник клиентов организации
+
+    Загружает клиентов через IikoCustomersClient и отвечает на запросы
+    по телефону, email и префиксу без обращений к API. Создание и
+    обновление клиентов через справочник сразу обновляет индексы;
+    изменения, сделанные во время полной загрузки, повторно применяются
+    к загруженному снимку.
+    """
+
+    def __init__(self, client: IikoCustomersClient,
+                 resync_interval: Optional[float] = DEFAULT_RESYNC_INTERVAL):
+        """
+        Args:
+            client: Клиент API для работы с клиентами
+            resync_interval: Интервал фоновой полной синхронизации в секундах
+                             (None - без фоновой синхронизации)
+        """
+        self.client = client
+        self.resync_interval = resync_interval
+        self._indexes = _Indexes()
+        self._lock = threading.RLock()
+        # Изменения, сделанные во время выполняющихся загрузок: (ID клиента, поля)
+        self._loads = 0
+        self._writes: List[Tuple[str, Dict[str, Any]]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._indexes.by_id)
+
+    # ==================== СИНХРОНИЗАЦИЯ ====================
+
+    def load(self, customers: Optional[Iterable[Dict[str, Any]]] = None) -> int:
+        """
+        Полная перестройка индексов
+
+        Args:
+            customers: Список клиентов (если не указан, загружается потоково из API)
+
+        Returns:
+            Количество клиентов в справочнике
+        """
+        with self._lock:
+            self._loads += 1
+            start = len(self._writes)
+        try:
+            if customers is None:
+                customers = self.client.iter_customers()
+            indexes = _Indexes()
+            for customer in customers:
+                indexes.add(customer)
+            # Подменяем снимок целиком, чтобы читатели не видели частичное состояние;
+            # изменения, сделанные за время загрузки, применяем к новому снимку
+            with self._lock:
+                for customer_id, changes in self._writes[start:]:
+                    _merge(indexes, customer_id, changes)
+                self._indexes = indexes
+        finally:
+            with self._lock:
+                self._loads -= 1
+                if not self._loads:
+                    self._writes.clear()
+        logger.info(f"Справочник клиентов загружен: {len(indexes.by_id)}")
+        return len(indexes.by_id)
+
+    def start(self) -> None:
+        """Загружает справочник и запускает фоновую синхронизацию"""
+        self.load()
+        if not self.resync_interval or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._resync_loop, name="iiko-customers-resync",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает фоновую синхронизацию"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _resync_loop(self) -> None:
+        while not self._stop.wait(self.resync_interval):
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"Ошибка синхронизации справочника клиентов: {e}")
+
+    # ==================== ПОИСК ====================
+
+    def get(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        """Клиент по ID"""
+        return self._indexes.by_id.get(customer_id)
+
+    def find_by_phone(self, phone: str) -> Optional[Dict[str, Any]]:
+        """
+        Поиск клиента по телефону в любом формате
+
+        Args:
+            phone: Телефон клиента
+
+        Returns:
+            Клиент или None
+        """
+        indexes = self._indexes
+        return indexes.first(indexes.by_phone.get(normalize_phone(phone) or ""))
+
+    def find_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Поиск клиента по email без учёта регистра"""
+        indexes = self._indexes
+        return indexes.first(indexes.by_email.get(normalize_email(email) or ""))
+
+    def find_duplicate(self, customer_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Существующий клиент с тем же телефоном или email"""
+        return (self.find_by_phone(customer_data.get("phone", ""))
+                or self.find_by_email(customer_data.get("email", "")))
+
+    def autocomplete_phone(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Автодополнение по началу телефона
+
+        Args:
+            prefix: Начало телефона (нецифровые символы игнорируются)
+            limit: Максимальное количество результатов
+
+        Returns:
+            Список клиентов
+        """
+        digits = _NON_DIGITS.sub("", prefix)
+        if digits.startswith("8"):
+            digits = "7" + digits[1:]
+        indexes = self._indexes
+        with self._lock:
+            ids = indexes.phone_trie.search(digits, limit)
+        return [indexes.by_id[customer_id] for customer_id in ids if customer_id in indexes.by_id]
+
+    def autocomplete_name(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Автодополнение по началу имени или фамилии"""
+        indexes = self._indexes
+        with self._lock:
+            ids = indexes.name_trie.search(prefix.strip().lower(), limit)
+        return [indexes.by_id[customer_id] for customer_id in ids if customer_id in indexes.by_id]
+
+    # ==================== ИЗМЕНЕНИЯ ====================
+
+    def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Создание клиента через API с добавлением в справочник
+
+        Args:
+            customer_data: Данные клиента
+
+        Returns:
+            Созданный клиент
+        """
+        result = self.client.create_customer(customer_data)
+        changes = {**customer_data, **result}
+        self._apply(changes.get("id"), changes)
+        return result
+
+    def update_customer(self, customer_id: str, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Обновление клиента через API с обновлением справочника
+
+        Args:
+            customer_id: ID клиента
+            customer_data: Новые данные клиента
+
+        Returns:
+            Обновлённый клиент
+        """
+        result = self.client.update_customer(customer_id, customer_data)
+        self._apply(customer_id, {**customer_data, **result})
+        return result
+
+    def _apply(self, customer_id: Optional[str], changes: Dict[str, Any]) -> None:
+        """Применяет изменение к индексам и запоминает его для выполняющихся загрузок"""
+        if not customer_id:
+            return
+        with self._lock:
+            _merge(self._indexes, customer_id, changes)
+            if self._loads:
+                self._writes.append((customer_id, changes))
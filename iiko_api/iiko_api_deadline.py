@@ -0,0 +1,194 @@
+"""
+Сроки выполнения (deadline) вызовов API iiko
+Документация: https://api-ru.iiko.services
+
+Каждый публичный метод клиентов принимает timeout - общий лимит времени
+вызова в секундах. Лимит превращается в срок (Deadline), который действует
+для всех HTTP запросов вызова: таймауты соединения и чтения каждого запроса
+ограничиваются оставшимся временем, а при его исчерпании вызов прерывается
+исключением DeadlineExceeded.
+
+Блок with deadline(...) задаёт общий срок для нескольких вызовов подряд
+(например, проверка заказа, create_order и create_payment при оформлении).
+Вложенные сроки не продлевают внешний: действует более ранний.
+
+Пример:
+    with deadline(2.0):
+        order = client.orders.create_order(order_data)
+        client.orders.get_order(order["id"], timeout=0.5)
+
+    menu = await call_with_deadline(get_menu, timeout=1.0)
+"""
+
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+import requests
+
+# Таймауты (соединение, чтение) запроса без срока, секунд:
+# без них зависшее соединение блокирует поток навсегда
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_REQUEST_TIMEOUT = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout, TimeoutError):
+    """Истёк срок выполнения вызова API"""
+    pass
+
+
+class CappedTimeout(tuple):
+    """Таймауты (соединение, чтение), сокращённые под оставшееся время срока вызова"""
+    __slots__ = ()
+
+
+def is_capped_timeout(timeout: Any) -> bool:
+    """Таймауты запроса сокращены сроком вызова, а не заданы клиентом"""
+    return isinstance(timeout, CappedTimeout)
+
+
+class Deadline:
+    """Момент, к которому вызов API должен завершиться"""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, timeout: float):
+        """
+        Args:
+            timeout: Лимит времени от текущего момента, секунд
+        """
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Оставшееся время, секунд (не меньше 0)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, operation: str = "вызов API") -> None:
+        """
+        Raises:
+            DeadlineExceeded: Если срок истёк
+        """
+        if self.expired:
+            raise DeadlineExceeded(f"Истёк срок выполнения: {operation}")
+
+    def request_timeout(self, default: Tuple[float, float] = DEFAULT_REQUEST_TIMEOUT
+                        ) -> Tuple[float, float]:
+        """
+        Таймауты (соединение, чтение) очередного запроса в пределах оставшегося времени
+
+        Если срок сократил хотя бы один из таймаутов, возвращается CappedTimeout:
+        таймаут такого запроса вызван сроком вызова, а не медленным API.
+        """
+        remaining = self.remaining()
+        timeout = min(default[0], remaining), min(default[1], remaining)
+        if timeout != tuple(default):
+            return CappedTimeout(timeout)
+        return timeout
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f})"
+
+
+_DEADLINE: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "iiko_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Срок текущего блока deadline() (None, если не задан)"""
+    return _DEADLINE.get()
+
+
+def resolve_deadline(timeout: Optional[float] = None) -> Optional[Deadline]:
+    """
+    Срок вызова: более ранний из текущего блока deadline() и timeout вызова
+
+    Args:
+        timeout: Лимит времени вызова, секунд (None - только срок блока)
+    """
+    current = _DEADLINE.get()
+    if timeout is None:
+        return current
+    budget = Deadline(timeout)
+    if current is not None and current.expires_at <= budget.expires_at:
+        return current
+    return budget
+
+
+@contextmanager
+def use_deadline(budget: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Делает срок текущим внутри блока (в текущем потоке или задаче)"""
+    token = _DEADLINE.set(budget)
+    try:
+        yield budget
+    finally:
+        _DEADLINE.reset(token)
+
+
+@contextmanager
+def deadline(timeout: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Общий срок для всех вызовов API внутри блока
+
+    Args:
+        timeout: Лимит времени блока, секунд (None - не ограничивать сильнее текущего)
+    """
+    with use_deadline(resolve_deadline(timeout)) as budget:
+        yield budget
+
+
+def request_timeout(budget: Optional[Deadline],
+                    default: Tuple[float, float] = DEFAULT_REQUEST_TIMEOUT) -> Tuple[float, float]:
+    """
+    Таймауты (соединение, чтение) запроса с учётом срока
+
+    Raises:
+        DeadlineExceeded: Если срок уже истёк
+    """
+    if budget is None:
+        return default
+    budget.check("отправка запроса")
+    return budget.request_timeout(default)
+
+
+def iter_with_deadline(chunks: Iterable[Any], budget: Optional[Deadline]) -> Iterator[Any]:
+    """
+    Блоки потокового ответа с проверкой срока перед каждым блоком
+
+    Raises:
+        DeadlineExceeded: Если срок истёк до окончания ответа
+    """
+    if budget is None:
+        yield from chunks
+        return
+    for chunk in chunks:
+        budget.check("чтение ответа")
+        yield chunk
+
+
+async def call_with_deadline(func: Callable[..., Any], *args, timeout: float, **kwargs) -> Any:
+    """
+    Выполняет синхронный вызов API в пуле потоков с отменой по сроку
+
+    Ожидающая задача отменяется по истечении timeout (или при отмене
+    внешней задачи), а сам вызов в потоке прерывается на ближайшем
+    запросе или блоке ответа, так как выполняется с тем же сроком.
+
+    Raises:
+        DeadlineExceeded: Если срок истёк
+    """
+    budget = resolve_deadline(timeout)
+    context = contextvars.copy_context()
+    context.run(_DEADLINE.set, budget)
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(None, lambda: context.run(func, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout=budget.remaining())
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Истёк срок выполнения: {getattr(func, '__name__', func)}")
@@ -0,0 +1,269 @@
+"""
+Пространственный индекс точек доставки iiko
+Документация: https://api-ru.iiko.services/#operation/GetDeliveries
+
+Координаты deliveryPoint.latitude/longitude заказов и доставок хранятся
+в массивах NumPy и раскладываются по квадратной сетке с ячейкой заданного
+размера в километрах. Поиск в радиусе и ближайших точек просматривает
+только соседние ячейки, расстояния считаются векторно по формуле
+гаверсинусов. Поверх индекса - назначение точек зонам доставки и жадная
+группировка близких доставок в рейсы курьеров.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Длина одного градуса широты, км
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def haversine(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike) -> ArrayLike:
+    """
+    Расстояние по поверхности Земли в километрах (векторно для массивов)
+
+    Args:
+        lat1, lon1: Координаты первой точки (точек) в градусах
+        lat2, lon2: Координаты второй точки (точек) в градусах
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def delivery_point(record: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Координаты deliveryPoint заказа или доставки (None, если не указаны)"""
+    point = record.get("deliveryPoint") or record
+    latitude, longitude = point.get("latitude"), point.get("longitude")
+    if latitude is None or longitude is None:
+        return None
+    return float(latitude), float(longitude)
+
+
+class DeliveryPointIndex:
+    """
+    Сеточный индекс точек доставки
+
+    Пример:
+        index = DeliveryPointIndex(get_deliveries(), cell_km=1.0)
+        nearby = index.within(55.7558, 37.6176, radius_km=2.0)
+        runs = index.batch_runs(max_per_run=3, max_distance_km=1.5)
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]], cell_km: float = 1.0):
+        """
+        Args:
+            records: Заказы или доставки (get_orders()/get_deliveries())
+            cell_km: Размер ячейки сетки, км
+        """
+        self.records: List[Dict[str, Any]] = []
+        latitudes: List[float] = []
+        longitudes: List[float] = []
+        skipped = 0
+        for record in records:
+            point = delivery_point(record)
+            if point is None:
+                skipped += 1
+                continue
+            self.records.append(record)
+            latitudes.append(point[0])
+            longitudes.append(point[1])
+        if skipped:
+            logger.debug(f"Пропущено записей без координат: {skipped}")
+
+        self.lat = np.array(latitudes, dtype=np.float64)
+        self.lon = np.array(longitudes, dtype=np.float64)
+        self.cell_km = cell_km
+        self._rad_lat = np.radians(self.lat)
+        self._rad_lon = np.radians(self.lon)
+        self._cos_lat = np.cos(self._rad_lat)
+        # Шаг сетки по долготе рассчитывается по средней широте точек; на других
+        # широтах ячейка уже или шире, это учитывается числом колец при поиске
+        reference = float(self.lat.mean()) if len(self.lat) else 0.0
+        self._lat_step = cell_km / _KM_PER_DEGREE
+        self._lon_step = cell_km / (_KM_PER_DEGREE * max(math.cos(math.radians(reference)), 0.01))
+        self._cells = self._build_cells()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _cell_of(self, lat: ArrayLike, lon: ArrayLike) -> Tuple[Any, Any]:
+        return (np.floor(np.asarray(lat) / self._lat_step).astype(np.int64),
+                np.floor(np.asarray(lon) / self._lon_step).astype(np.int64))
+
+    def _build_cells(self) -> Dict[Tuple[int, int], np.ndarray]:
+        if not len(self.lat):
+            return {}
+        rows, cols = self._cell_of(self.lat, self.lon)
+        order = np.lexsort((cols, rows))
+        rows, cols = rows[order], cols[order]
+        starts = np.flatnonzero(np.r_[True, (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])])
+        ends = np.r_[starts[1:], len(order)]
+        return {(int(rows[s]), int(cols[s])): order[s:e] for s, e in zip(starts, ends)}
+
+    def _candidates(self, lat: float, lon: float, rings: Tuple[int, int]) -> np.ndarray:
+        """Точки ячеек в пределах rings (по широте, по долготе) от ячейки точки"""
+        row, col = (int(value) for value in self._cell_of(lat, lon))
+        row_rings, col_rings = rings
+        if (2 * row_rings + 1) * (2 * col_rings + 1) > len(self._cells):
+            found = [indices for (cell_row, cell_col), indices in self._cells.items()
+                     if abs(cell_row - row) <= row_rings and abs(cell_col - col) <= col_rings]
+        else:
+            found = [self._cells[(row + dr, col + dc)]
+                     for dr in range(-row_rings, row_rings + 1)
+                     for dc in range(-col_rings, col_rings + 1)
+                     if (row + dr, col + dc) in self._cells]
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+    def _rings_for(self, lat: float, radius_km: float) -> Tuple[int, int]:
+        """
+        Число колец ячеек (по широте, по долготе), покрывающих радиус от точки
+
+        Ширина ячейки в км зависит от широты, поэтому кольца по долготе
+        считаются по самой дальней от экватора широте в пределах радиуса
+        (с запасом в ячейку на положение точки внутри ячейки).
+        """
+        row_rings = int(math.ceil(radius_km / self.cell_km)) + 1
+        farthest = min(abs(lat) + (radius_km + self.cell_km) / _KM_PER_DEGREE, 90.0)
+        cell_width_km = self._lon_step * _KM_PER_DEGREE * max(math.cos(math.radians(farthest)), 0.01)
+        col_rings = int(math.ceil(radius_km / cell_width_km)) + 1
+        return row_rings, col_rings
+
+    def _distances_from(self, index: int, candidates: np.ndarray) -> np.ndarray:
+        """Расстояния от записи index до записей candidates (радианы и косинусы заранее)"""
+        half_lat = (self._rad_lat[candidates] - self._rad_lat[index]) * 0.5
+        half_lon = (self._rad_lon[candidates] - self._rad_lon[index]) * 0.5
+        a = np.sin(half_lat) ** 2 + self._cos_lat[index] * self._cos_lat[candidates] * np.sin(half_lon) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[int, float]]:
+        """
+        Точки в радиусе от заданной
+
+        Returns:
+            Пары (номер записи, расстояние в км), отсортированные по расстоянию
+        """
+        candidates = self._candidates(lat, lon, self._rings_for(lat, radius_km))
+        distances = haversine(lat, lon, self.lat[candidates], self.lon[candidates])
+        mask = distances <= radius_km
+        candidates, distances = candidates[mask], distances[mask]
+        order = np.argsort(distances, kind="stable")
+        return [(int(candidates[i]), float(distances[i])) for i in order]
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                max_distance_km: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Ближайшие k точек
+
+        Сетка просматривается в расширяющемся радиусе, пока k-я найденная
+        точка не окажется ближе границы просмотренной области.
+
+        Returns:
+            Пары (номер записи, расстояние в км), отсортированные по расстоянию
+        """
+        if not len(self.records) or k <= 0:
+            return []
+        limit = max_distance_km if max_distance_km is not None else math.inf
+        covered = self.cell_km
+        while True:
+            # Все точки в радиусе covered гарантированно среди кандидатов
+            candidates = self._candidates(lat, lon, self._rings_for(lat, covered))
+            exhausted = len(candidates) == len(self.records) or covered >= limit
+            if len(candidates) >= k or exhausted:
+                distances = haversine(lat, lon, self.lat[candidates], self.lon[candidates])
+                order = np.argsort(distances, kind="stable")[:k]
+                if exhausted or distances[order[-1]] <= covered:
+                    return [(int(candidates[i]), float(distances[i])) for i in order
+                            if distances[i] <= limit]
+            covered *= 2
+
+    def assign_zones(self, centers: Dict[str, Tuple[float, float]],
+                     max_distance_km: Optional[float] = None) -> List[Optional[str]]:
+        """
+        Назначение каждой точки ближайшей зоне доставки
+
+        Args:
+            centers: Центры зон {ID зоны: (широта, долгота)}
+            max_distance_km: Точки дальше от всех центров получают None
+
+        Returns:
+            ID зоны для каждой записи (в порядке records)
+        """
+        if not centers or not len(self.records):
+            return [None] * len(self.records)
+        zone_ids = list(centers)
+        zone_lat = np.array([centers[zone][0] for zone in zone_ids])
+        zone_lon = np.array([centers[zone][1] for zone in zone_ids])
+        distances = haversine(self.lat[:, None], self.lon[:, None], zone_lat[None, :], zone_lon[None, :])
+        best = distances.argmin(axis=1)
+        result: List[Optional[str]] = [zone_ids[i] for i in best]
+        if max_distance_km is not None:
+            too_far = distances[np.arange(len(best)), best] > max_distance_km
+            for i in np.flatnonzero(too_far):
+                result[i] = None
+        return result
+
+    def batch_runs(self, max_per_run: int = 3, max_distance_km: float = 2.0,
+                   origin: Optional[Tuple[float, float]] = None,
+                   indices: Optional[Sequence[int]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Жадная группировка доставок в рейсы курьеров
+
+        Рейс начинается с самой дальней от origin (или первой) свободной
+        точки и дополняется ближайшими к последней добавленной точке
+        свободными точками в пределах max_distance_km.
+
+        Args:
+            max_per_run: Максимум доставок в рейсе
+            max_distance_km: Максимальное расстояние между соседними точками рейса
+            origin: Координаты ресторана
+            indices: Номера записей для группировки (по умолчанию - все)
+
+        Returns:
+            Рейсы - списки записей
+        """
+        pending = np.array(range(len(self.records)) if indices is None else indices, dtype=np.int64)
+        if origin is not None and len(pending):
+            distances = haversine(origin[0], origin[1], self.lat[pending], self.lon[pending])
+            pending = pending[np.argsort(-distances, kind="stable")]
+        free = np.zeros(len(self.records), dtype=bool)
+        free[pending] = True
+
+        rows, cols = self._cell_of(self.lat, self.lon)
+        cells = list(zip(rows.tolist(), cols.tolist()))
+        # Соседние ячейки одинаковы для всех точек ячейки - собираем их один раз
+        neighbourhoods: Dict[Tuple[int, int], np.ndarray] = {}
+        runs = []
+        for start in pending:
+            if not free[start]:
+                continue
+            free[start] = False
+            run = [int(start)]
+            while len(run) < max_per_run:
+                last = run[-1]
+                cell = cells[last]
+                neighbourhood = neighbourhoods.get(cell)
+                if neighbourhood is None:
+                    neighbourhood = neighbourhoods[cell] = self._candidates(
+                        self.lat[last], self.lon[last],
+                        self._rings_for(self.lat[last], max_distance_km))
+                candidates = neighbourhood[free[neighbourhood]]
+                if not len(candidates):
+                    break
+                distances = self._distances_from(last, candidates)
+                closest = int(distances.argmin())
+                if distances[closest] > max_distance_km:
+                    break
+                free[candidates[closest]] = False
+                run.append(int(candidates[closest]))
+            runs.append([self.records[index] for index in run])
+        return runs
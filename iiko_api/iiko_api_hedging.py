@@ -0,0 +1,253 @@
+"""
+Дублирующие (hedged) запросы к API iiko для сокращения хвостовых задержек
+Документация: https://api-ru.iiko.services
+
+Задержка p99 запросов get_order, get_menu, get_stock определяется редкими
+медленными ответами. HedgedTransport оборачивает HTTP транспорт: если
+идемпотентный GET запрос не получил ответ за время p95 своего эндпоинта
+(считается по последним запросам), отправляется второй такой же запрос
+по другому соединению пула; используется первый ответ. Ответы читаются
+потоком (stream=True), поэтому проигравший запрос закрывается сразу после
+получения заголовков, не загружая тело; ещё не начатый дубль отменяется.
+
+Пока для эндпоинта недостаточно замеров, запросы выполняются в потоке
+вызывающего без пула. Пул по умолчанию равен пулу соединений оборачиваемого
+транспорта и не ограничивает параллельность: если в нём нет свободного
+потока, запрос выполняется в потоке вызывающего без дублирования, а не ждёт
+в очереди (время в очереди исказило бы задержку до дубля). Запросы в пуле
+выполняются в копии контекста вызывающего (request_priority, IikoContext,
+срок deadline).
+
+Дублирование выполняется только при наличии запаса в ограничителе частоты
+(RateLimiter) и не чаще max_hedge_ratio от всех запросов, поэтому оно не
+приводит к ответам 429.
+
+Пример:
+    limiter = RateLimiter(rate=20)
+    transport = HedgedTransport(ScheduledTransport(RequestsTransport(), limiter), limiter)
+    client = IikoMainClient(api_key, organization_id, transport=transport)
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+import logging
+
+from iiko_api_scheduler import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def endpoint_key(url: str) -> str:
+    """Эндпоинт запроса без ID сущности: /api/1/orders/order-1 -> /api/1/orders/{id}"""
+    parts = urlsplit(url).path.split("/")
+    if len(parts) > 4:
+        parts[4] = "{id}"
+    return "/".join(parts)
+
+
+class LatencyTracker:
+    """Задержки последних запросов по эндпоинтам"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            window: Число последних запросов эндпоинта, по которым считаются квантили
+            min_samples: Минимум замеров для расчёта квантиля
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def quantile(self, key: str, q: float) -> Optional[float]:
+        """Квантиль задержки эндпоинта или None, если замеров мало"""
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def connection_pool_size(transport: Any, default: int = 10) -> int:
+    """Размер пула соединений транспорта, в том числе под обёртками с атрибутом transport"""
+    seen = set()
+    while transport is not None and id(transport) not in seen:
+        seen.add(id(transport))
+        size = getattr(transport, "pool_maxsize", None)
+        if size:
+            return size
+        transport = getattr(transport, "transport", None)
+    return default
+
+
+def _close_response(future: Future) -> None:
+    """Закрывает ответ проигравшего запроса, освобождая соединение"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), "close", None)
+    if close is not None:
+        close()
+
+
+class HedgedTransport:
+    """HTTP транспорт с дублированием медленных идемпотентных GET запросов"""
+
+    def __init__(self, transport: Any, rate_limiter: Optional[RateLimiter] = None,
+                 quantile: float = 0.95, endpoints: Optional[Iterable[str]] = None,
+                 max_hedge_ratio: float = 0.1, spare_tokens: float = 1.0,
+                 tracker: Optional[LatencyTracker] = None, max_workers: Optional[int] = None):
+        """
+        Args:
+            transport: Оборачиваемый транспорт (метод request() как у requests.Session)
+            rate_limiter: Ограничитель частоты, запас которого проверяется перед дублированием
+            quantile: Квантиль задержки эндпоинта, после которого отправляется дубль
+            endpoints: Эндпоинты для дублирования (см. endpoint_key); по умолчанию - все GET
+            max_hedge_ratio: Максимальная доля дублированных запросов
+            spare_tokens: Сколько токенов должно остаться в ограничителе после дубля
+            tracker: Учёт задержек (по умолчанию создаётся собственный)
+            max_workers: Потоков для дублируемых запросов и дублей (None - по размеру
+                         пула соединений транспорта); при их нехватке запрос
+                         выполняется в потоке вызывающего без дублирования
+        """
+        self.transport = transport
+        self.rate_limiter = rate_limiter
+        self.quantile = quantile
+        self.endpoints = frozenset(endpoints) if endpoints is not None else None
+        self.max_hedge_ratio = max_hedge_ratio
+        self.spare_tokens = spare_tokens
+        self.tracker = tracker or LatencyTracker()
+        if max_workers is None:
+            max_workers = connection_pool_size(transport)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="iiko-hedge")
+        # Свободные потоки пула: запрос не ставится в очередь пула
+        self._workers = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "hedged": 0, "hedgeWins": 0, "hedgesSkipped": 0,
+                       "poolBusy": 0}
+
+    @property
+    def session(self) -> Any:
+        """Сессия requests оборачиваемого транспорта (если есть)"""
+        return getattr(self.transport, "session", None)
+
+    def _timed_request(self, key: str, method: str, url: str, kwargs: Dict[str, Any]) -> Any:
+        started = time.monotonic()
+        response = self.transport.request(method, url, **kwargs)
+        self.tracker.record(key, time.monotonic() - started)
+        return response
+
+    def _reserve_worker(self) -> bool:
+        """Занимает свободный поток пула; False - все потоки заняты"""
+        if self._workers.acquire(blocking=False):
+            return True
+        with self._lock:
+            self._stats["poolBusy"] += 1
+        return False
+
+    def _submit(self, key: str, method: str, url: str, kwargs: Dict[str, Any]) -> Future:
+        """Запрос в занятом _reserve_worker() потоке пула в копии контекста вызывающего"""
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(context.run, self._timed_request, key, method, url, kwargs)
+        except BaseException:
+            self._workers.release()
+            raise
+        future.add_done_callback(lambda _: self._workers.release())
+        return future
+
+    def _hedge_allowed(self) -> bool:
+        """Проверка доли дублей и запаса ограничителя частоты"""
+        with self._lock:
+            if self._stats["hedged"] + 1 > self.max_hedge_ratio * self._stats["requests"]:
+                self._stats["hedgesSkipped"] += 1
+                return False
+        limiter = self.rate_limiter
+        if limiter is not None:
+            if getattr(self.transport, "rate_limiter", None) is limiter:
+                # Токен заберёт оборачиваемый планировщик - проверяем только запас
+                allowed = limiter.wait_time(1.0 + self.spare_tokens) == 0.0
+            else:
+                allowed = (limiter.wait_time(1.0 + self.spare_tokens) == 0.0
+                           and limiter.try_acquire())
+            if not allowed:
+                with self._lock:
+                    self._stats["hedgesSkipped"] += 1
+                return False
+        return True
+
+    def request(self, method: str, url: str, **kwargs) -> Any:
+        """Выполняет HTTP запрос, при задержке дольше квантиля - с дублированием"""
+        key = endpoint_key(url)
+        hedgeable = (method.upper() == "GET" and not kwargs.get("stream")
+                     and (self.endpoints is None or key in self.endpoints))
+        with self._lock:
+            self._stats["requests"] += 1
+        if not hedgeable:
+            return self._timed_request(key, method, url, kwargs)
+
+        # Задержка считается до заголовков ответа: тело проигравшего не читается
+        kwargs = {**kwargs, "stream": True}
+        delay = self.tracker.quantile(key, self.quantile)
+        if delay is None or not self._reserve_worker():
+            return self._timed_request(key, method, url, kwargs)
+        primary = self._submit(key, method, url, kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        if not self._reserve_worker():
+            with self._lock:
+                self._stats["hedgesSkipped"] += 1
+            return primary.result()
+        if not self._hedge_allowed():
+            self._workers.release()
+            return primary.result()
+
+        hedge = self._submit(key, method, url, kwargs)
+        with self._lock:
+            self._stats["hedged"] += 1
+        winner = None
+        pending = {primary, hedge}
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            successful = [future for future in (primary, hedge)
+                          if future in done and future.exception() is None]
+            if successful:
+                winner = successful[0]
+                pending |= set(successful[1:])
+        # Выполняющийся запрос нельзя прервать в потоке - ответ закрывается
+        # по получении заголовков; ещё не начатый запрос отменяется
+        for loser in pending:
+            if not loser.cancel():
+                loser.add_done_callback(_close_response)
+        if winner is None:
+            # Оба запроса завершились ошибкой - возвращаем ошибку основного
+            return primary.result()
+        if winner is hedge:
+            with self._lock:
+                self._stats["hedgeWins"] += 1
+        return winner.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика оборачиваемого транспорта и дублирования"""
+        inner = self.transport.stats() if hasattr(self.transport, "stats") else {}
+        with self._lock:
+            return {**inner, "hedging": dict(self._stats)}
+
+    def close(self) -> None:
+        """Закрывает пул потоков и оборачиваемый транспорт"""
+        self._executor.shutdown(wait=False)
+        if hasattr(self.transport, "close"):
+            self.transport.close()
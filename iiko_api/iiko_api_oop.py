@@ -5,13 +5,20 @@
 
 import requests
 import json
-from typing import Dict, List, Optional, Any
+import warnings
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime
 import logging
 from abc import ABC, abstractmethod
 
 # Импорт примеров данных
 from data_example import *
+from iiko_api_cache import credentials_scope
+from iiko_api_deadline import (DEFAULT_REQUEST_TIMEOUT, Deadline, DeadlineExceeded,
+                               current_deadline, iter_with_deadline, request_timeout,
+                               resolve_deadline, use_deadline)
+from iiko_api_stream import DEFAULT_CHUNK_SIZE, iter_json_array
+from iiko_api_transport import Http2Transport, RequestsTransport
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -29,57 +36,195 @@ class ValidationError(IikoApiException):
     """Ошибка валидации данных"""
     pass
 
+class OrderValidationError(ValidationError, ValueError):
+    """Заказ не прошёл локальную проверку по каталогу"""
+    
+    def __init__(self, errors: List[Dict[str, Any]]):
+        self.errors = errors
+        super().__init__("; ".join(f"{error['field']}: {error['message']}" for error in errors))
+
 class ApiRequestError(IikoApiException):
     """Ошибка HTTP запроса"""
     pass
 
+class NotFoundError(ApiRequestError):
+    """Сущность не найдена (ответ 404 или ID в кэше отсутствующих ID)"""
+    pass
+
 class BaseApiClient(ABC):
     """Базовый класс для API клиентов"""
     
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(self, base_url: str, api_key: str, transport: Optional[Any] = None,
+                 cache: Optional[Any] = None,
+                 request_timeout: Tuple[float, float] = DEFAULT_REQUEST_TIMEOUT,
+                 negative_cache: Optional[Any] = None):
+        """
+        Args:
+            base_url: Базовый URL API
+            api_key: API ключ
+            transport: HTTP транспорт (RequestsTransport или Http2Transport).
+                       По умолчанию создаётся собственный RequestsTransport,
+                       заголовки клиента хранятся в его сессии
+            cache: Кэш ответов GET запросов (ResponseCache из iiko_api_cache)
+            request_timeout: Таймауты (соединение, чтение) запроса, секунд;
+                             при заданном сроке вызова ограничиваются оставшимся временем
+            negative_cache: Кэш отсутствующих ID (NegativeCache из iiko_api_cache)
+        """
         self.base_url = base_url
         self.api_key = api_key
-        self.session = requests.Session()
-        self.session.headers.update({
+        self._owns_transport = transport is None
+        self.transport = transport or RequestsTransport()
+        self.cache = cache
+        self.request_timeout = request_timeout
+        self.negative_cache = negative_cache
+        # В собственной сессии заголовки остаются общими с session.headers,
+        # как до появления транспортов; общий транспорт получает их в каждом запросе
+        self.headers = self.transport.session.headers if self._owns_transport else {}
+        self.headers.update({
             "Content-Type": "application/json",
             "Accept": "application/json",
             "Authorization": f"Bearer {api_key}"
         })
     
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
-                     params: Optional[Dict] = None) -> Dict[str, Any]:
-        """Выполняет HTTP запрос"""
+    @property
+    def session(self) -> Optional[requests.Session]:
+        """
+        Сессия requests, если используется HTTP/1.1 транспорт
+        
+        Для переданного в клиент (общего) транспорта устарело: его сессия
+        общая для клиентов, а заголовки клиента (client.headers) передаются
+        в каждом запросе и имеют приоритет над session.headers.
+        """
+        if not self._owns_transport:
+            warnings.warn("BaseApiClient.session устарел для общего транспорта: "
+                          "заголовки клиента задаются через client.headers",
+                          DeprecationWarning, stacklevel=2)
+        return getattr(self.transport, "session", None)
+    
+    def _send(self, method: str, endpoint: str, data: Optional[Dict] = None,
+              params: Optional[Dict] = None, stream: bool = False,
+              budget: Optional[Deadline] = None):
+        """Отправляет HTTP запрос через транспорт клиента в пределах срока вызова"""
+        method = method.upper()
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            raise ValidationError(f"Неподдерживаемый HTTP метод: {method}")
+        
         url = f"{self.base_url}{endpoint}"
+        timeout = request_timeout(budget, self.request_timeout)
+        try:
+            return self.transport.request(method, url, headers=self.headers,
+                                          json=data if method in ("POST", "PUT") else None,
+                                          params=params, stream=stream, timeout=timeout)
+        except requests.exceptions.Timeout as e:
+            if budget is not None and budget.expired:
+                raise DeadlineExceeded(f"Истёк срок выполнения: {method} {endpoint}") from e
+            raise
+    
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
+                     params: Optional[Dict] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Выполняет HTTP запрос (GET запросы к справочникам - через кэш, если он задан)
         
+        timeout - общий лимит времени вызова; срок действует и для вложенных
+        запросов (например, загрузки через кэш).
+        """
+        with use_deadline(resolve_deadline(timeout)):
+            if self.cache is not None and method.upper() == "GET":
+                return self.cache.fetch(f"{self.base_url}{endpoint}", endpoint, params,
+                                        lambda: self._fetch_json(method, endpoint, data, params),
+                                        scope=credentials_scope(self.api_key))
+            return self._fetch_json(method, endpoint, data, params)
+    
+    def _fetch_json(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                    params: Optional[Dict] = None) -> Dict[str, Any]:
+        """Выполняет HTTP запрос и разбирает JSON ответ"""
         try:
-            if method.upper() == "GET":
-                response = self.session.get(url, params=params)
-            elif method.upper() == "POST":
-                response = self.session.post(url, json=data, params=params)
-            elif method.upper() == "PUT":
-                response = self.session.put(url, json=data, params=params)
-            elif method.upper() == "DELETE":
-                response = self.session.delete(url, params=params)
-            else:
-                raise ValidationError(f"Неподдерживаемый HTTP метод: {method}")
-            
+            response = self._send(method, endpoint, data, params, budget=current_deadline())
             response.raise_for_status()
             
             if response.content:
                 return response.json()
             return {}
             
+        except DeadlineExceeded as e:
+            logger.error(f"Ошибка HTTP запроса: {e}")
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Ошибка HTTP запроса: {e}")
+            if getattr(e.response, "status_code", None) == 404:
+                raise NotFoundError(f"Ошибка HTTP запроса: {e}")
             raise ApiRequestError(f"Ошибка HTTP запроса: {e}")
         except json.JSONDecodeError as e:
             logger.error(f"Ошибка парсинга JSON: {e}")
             raise ValidationError("Неверный формат ответа от API")
+    
+    def _raise_if_missing(self, resource: str, entity_id: str) -> None:
+        """
+        Raises:
+            NotFoundError: Если ID сущности есть в кэше отсутствующих ID
+        """
+        if self.negative_cache is not None and self.negative_cache.contains(
+                resource, getattr(self, "organization_id", None), entity_id):
+            logger.debug(f"{resource} {entity_id} не найден (кэш отсутствующих ID)")
+            raise NotFoundError(f"{resource} {entity_id} не найден (кэш отсутствующих ID)")
+    
+    def _remember_missing(self, resource: str, entity_id: str, error: Exception) -> None:
+        """Запоминает ID сущности, на запрос которой API ответил 404"""
+        if self.negative_cache is not None and isinstance(error, NotFoundError):
+            self.negative_cache.add(resource, getattr(self, "organization_id", None), entity_id)
+    
+    def _forget_missing(self, resource: str) -> None:
+        """Сбрасывает кэш отсутствующих ID сущностей типа после создания сущности"""
+        if self.negative_cache is not None:
+            self.negative_cache.invalidate(resource, getattr(self, "organization_id", None))
+    
+    def _stream_request(self, method: str, endpoint: str, key: Optional[str] = None,
+                        data: Optional[Dict] = None, params: Optional[Dict] = None,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Выполняет HTTP запрос и потоково разбирает список из ответа
+        
+        Тело ответа читается блоками, элементы списка выдаются по мере разбора.
+        
+        Args:
+            method: HTTP метод
+            endpoint: Эндпоинт API
+            key: Ключ списка в ответе (например, "customers")
+            data: Данные для отправки в теле запроса
+            params: Параметры запроса
+            chunk_size: Размер блока чтения в байтах
+            timeout: Лимит времени на весь ответ, секунд (срок проверяется перед каждым блоком)
+            
+        Returns:
+            Итератор по элементам списка
+        """
+        # Срок передаётся явно: переменная контекста, заданная в генераторе,
+        # оставалась бы установленной в коде вызывающего между элементами
+        budget = resolve_deadline(timeout)
+        try:
+            response = self._send(method, endpoint, data, params, stream=True, budget=budget)
+            try:
+                response.raise_for_status()
+                yield from iter_json_array(
+                    iter_with_deadline(response.iter_content(chunk_size), budget), key)
+            finally:
+                response.close()
+        except DeadlineExceeded as e:
+            logger.error(f"Ошибка HTTP запроса: {e}")
+            raise
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Ошибка HTTP запроса: {e}")
+            raise ApiRequestError(f"Ошибка HTTP запроса: {e}")
+        except ValueError as e:
+            logger.error(f"Ошибка парсинга JSON: {e}")
+            raise ValidationError("Неверный формат ответа от API")
 
 class IikoAuthClient(BaseApiClient):
     """Клиент для аутентификации"""
     
-    def authenticate(self, login: str, password: str) -> Dict[str, Any]:
+    def authenticate(self, login: str, password: str,
+                     timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Аутентификация пользователя
         
@@ -88,6 +233,7 @@ class IikoAuthClient(BaseApiClient):
         Args:
             login: Логин пользователя
             password: Пароль пользователя
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Информация об аутентификации
@@ -102,7 +248,7 @@ class IikoAuthClient(BaseApiClient):
         }
         
         try:
-            result = self._make_request("POST", endpoint, data=data)
+            result = self._make_request("POST", endpoint, data=data, timeout=timeout)
             logger.info("Аутентификация успешна")
             return result
         except Exception as e:
@@ -112,25 +258,29 @@ class IikoAuthClient(BaseApiClient):
 class IikoOrganizationsClient(BaseApiClient):
     """Клиент для работы с организациями"""
     
-    def get_organizations(self) -> List[Dict[str, Any]]:
+    def get_organizations(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Получение списка организаций
         
         Документация: https://api-ru.iiko.services/#operation/GetOrganizations
         
+        Args:
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+        
         Returns:
             Список организаций
         """
         endpoint = "/api/1/organizations"
         
         try:
-            result = self._make_request("GET", endpoint)
+            result = self._make_request("GET", endpoint, timeout=timeout)
             return result.get("organizations", [])
         except Exception as e:
             logger.error(f"Ошибка получения организаций: {e}")
             raise
     
-    def get_organization_by_id(self, organization_id: str) -> Dict[str, Any]:
+    def get_organization_by_id(self, organization_id: str,
+                               timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Получение информации об организации по ID
         
@@ -138,6 +288,7 @@ class IikoOrganizationsClient(BaseApiClient):
         
         Args:
             organization_id: ID организации
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Информация об организации
@@ -145,7 +296,7 @@ class IikoOrganizationsClient(BaseApiClient):
         endpoint = f"/api/1/organizations/{organization_id}"
         
         try:
-            result = self._make_request("GET", endpoint)
+            result = self._make_request("GET", endpoint, timeout=timeout)
             return result
         except Exception as e:
             logger.error(f"Ошибка получения организации {organization_id}: {e}")
@@ -154,16 +305,19 @@ class IikoOrganizationsClient(BaseApiClient):
 class IikoMenuClient(BaseApiClient):
     """Клиент для работы с меню и товарами"""
     
-    def __init__(self, base_url: str, api_key: str, organization_id: str):
-        super().__init__(base_url, api_key)
+    def __init__(self, base_url: str, api_key: str, organization_id: str, **options):
+        super().__init__(base_url, api_key, **options)
         self.organization_id = organization_id
     
-    def get_menu(self) -> List[Dict[str, Any]]:
+    def get_menu(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Получение меню организации
         
         Документация: https://api-ru.iiko.services/#operation/GetMenu
         
+        Args:
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+        
         Returns:
             Список товаров в меню
         """
@@ -171,18 +325,21 @@ class IikoMenuClient(BaseApiClient):
         params = {"organizationId": self.organization_id}
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result.get("items", [])
         except Exception as e:
             logger.error(f"Ошибка получения меню: {e}")
             raise
     
-    def get_products(self) -> List[Dict[str, Any]]:
+    def get_products(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Получение списка товаров
         
         Документация: https://api-ru.iiko.services/#operation/GetProducts
         
+        Args:
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+        
         Returns:
             Список товаров
         """
@@ -190,13 +347,13 @@ class IikoMenuClient(BaseApiClient):
         params = {"organizationId": self.organization_id}
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result.get("products", [])
         except Exception as e:
             logger.error(f"Ошибка получения товаров: {e}")
             raise
     
-    def get_product_by_id(self, product_id: str) -> Dict[str, Any]:
+    def get_product_by_id(self, product_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Получение информации о товаре по ID
         
@@ -204,28 +361,42 @@ class IikoMenuClient(BaseApiClient):
         
         Args:
             product_id: ID товара
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Информация о товаре
         """
         endpoint = f"/api/1/products/{product_id}"
         params = {"organizationId": self.organization_id}
+        self._raise_if_missing("products", product_id)
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result
         except Exception as e:
+            self._remember_missing("products", product_id, e)
             logger.error(f"Ошибка получения товара {product_id}: {e}")
             raise
 
 class IikoOrdersClient(BaseApiClient):
     """Клиент для работы с заказами"""
     
-    def __init__(self, base_url: str, api_key: str, organization_id: str):
-        super().__init__(base_url, api_key)
+    def __init__(self, base_url: str, api_key: str, organization_id: str,
+                 validator: Optional[Any] = None, **options):
+        """
+        Args:
+            base_url: Базовый URL API
+            api_key: API ключ
+            organization_id: ID организации
+            validator: Локальная проверка заказов перед отправкой
+                       (CatalogIndex из iiko_api_validation)
+        """
+        super().__init__(base_url, api_key, **options)
         self.organization_id = organization_id
+        self.validator = validator
     
-    def create_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+    def create_order(self, order_data: Dict[str, Any],
+                     timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Создание нового заказа
         
@@ -233,22 +404,30 @@ class IikoOrdersClient(BaseApiClient):
         
         Args:
             order_data: Данные заказа
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Созданный заказ
+            
+        Raises:
+            OrderValidationError: Если заказ не прошёл проверку validator
         """
+        if self.validator is not None:
+            self.validator.check(order_data)
+        
         endpoint = "/api/1/orders"
         data = {**order_data, "organizationId": self.organization_id}
         
         try:
-            result = self._make_request("POST", endpoint, data=data)
+            result = self._make_request("POST", endpoint, data=data, timeout=timeout)
+            self._forget_missing("orders")
             logger.info(f"Заказ создан: {result.get('id')}")
             return result
         except Exception as e:
             logger.error(f"Ошибка создания заказа: {e}")
             raise
     
-    def get_order(self, order_id: str) -> Dict[str, Any]:
+    def get_order(self, order_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Получение информации о заказе
         
@@ -256,21 +435,25 @@ class IikoOrdersClient(BaseApiClient):
         
         Args:
             order_id: ID заказа
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Информация о заказе
         """
         endpoint = f"/api/1/orders/{order_id}"
         params = {"organizationId": self.organization_id}
+        self._raise_if_missing("orders", order_id)
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result
         except Exception as e:
+            self._remember_missing("orders", order_id, e)
             logger.error(f"Ошибка получения заказа {order_id}: {e}")
             raise
     
-    def update_order(self, order_id: str, order_data: Dict[str, Any]) -> Dict[str, Any]:
+    def update_order(self, order_id: str, order_data: Dict[str, Any],
+                     timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Обновление заказа
         
@@ -279,6 +462,7 @@ class IikoOrdersClient(BaseApiClient):
         Args:
             order_id: ID заказа
             order_data: Новые данные заказа
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Обновлённый заказ
@@ -287,14 +471,14 @@ class IikoOrdersClient(BaseApiClient):
         data = {**order_data, "organizationId": self.organization_id}
         
         try:
-            result = self._make_request("PUT", endpoint, data=data)
+            result = self._make_request("PUT", endpoint, data=data, timeout=timeout)
             logger.info(f"Заказ {order_id} обновлён")
             return result
         except Exception as e:
             logger.error(f"Ошибка обновления заказа {order_id}: {e}")
             raise
     
-    def delete_order(self, order_id: str) -> bool:
+    def delete_order(self, order_id: str, timeout: Optional[float] = None) -> bool:
         """
         Удаление заказа
         
@@ -302,6 +486,7 @@ class IikoOrdersClient(BaseApiClient):
         
         Args:
             order_id: ID заказа
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             True если заказ успешно удалён
@@ -310,7 +495,7 @@ class IikoOrdersClient(BaseApiClient):
         params = {"organizationId": self.organization_id}
         
         try:
-            self._make_request("DELETE", endpoint, params=params)
+            self._make_request("DELETE", endpoint, params=params, timeout=timeout)
             logger.info(f"Заказ {order_id} удалён")
             return True
         except Exception as e:
@@ -318,7 +503,8 @@ class IikoOrdersClient(BaseApiClient):
             raise
     
     def get_orders(self, date_from: Optional[str] = None, 
-                   date_to: Optional[str] = None) -> List[Dict[str, Any]]:
+                   date_to: Optional[str] = None,
+                   timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Получение списка заказов
         
@@ -327,6 +513,7 @@ class IikoOrdersClient(BaseApiClient):
         Args:
             date_from: Дата начала периода (формат: YYYY-MM-DD)
             date_to: Дата окончания периода (формат: YYYY-MM-DD)
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Список заказов
@@ -340,20 +527,56 @@ class IikoOrdersClient(BaseApiClient):
             params["dateTo"] = date_to
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result.get("orders", [])
         except Exception as e:
             logger.error(f"Ошибка получения заказов: {e}")
             raise
+    
+    def iter_orders(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Потоковое получение списка заказов
+        
+        Заказы выдаются по одному по мере получения ответа, без загрузки
+        всего списка в память.
+        
+        Документация: https://api-ru.iiko.services/#operation/GetOrders
+        
+        Args:
+            date_from: Дата начала периода (формат: YYYY-MM-DD)
+            date_to: Дата окончания периода (формат: YYYY-MM-DD)
+            chunk_size: Размер блока чтения в байтах
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+            
+        Returns:
+            Итератор по заказам
+        """
+        endpoint = "/api/1/orders"
+        params = {"organizationId": self.organization_id}
+        
+        if date_from:
+            params["dateFrom"] = date_from
+        if date_to:
+            params["dateTo"] = date_to
+        
+        try:
+            yield from self._stream_request("GET", endpoint, "orders", params=params,
+                                            chunk_size=chunk_size, timeout=timeout)
+        except Exception as e:
+            logger.error(f"Ошибка получения заказов: {e}")
+            raise
 
 class IikoCustomersClient(BaseApiClient):
     """Клиент для работы с клиентами"""
     
-    def __init__(self, base_url: str, api_key: str, organization_id: str):
-        super().__init__(base_url, api_key)
+    def __init__(self, base_url: str, api_key: str, organization_id: str, **options):
+        super().__init__(base_url, api_key, **options)
         self.organization_id = organization_id
     
-    def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+    def create_customer(self, customer_data: Dict[str, Any],
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Создание нового клиента
         
@@ -361,6 +584,7 @@ class IikoCustomersClient(BaseApiClient):
         
         Args:
             customer_data: Данные клиента
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Созданный клиент
@@ -369,14 +593,15 @@ class IikoCustomersClient(BaseApiClient):
         data = {**customer_data, "organizationId": self.organization_id}
         
         try:
-            result = self._make_request("POST", endpoint, data=data)
+            result = self._make_request("POST", endpoint, data=data, timeout=timeout)
+            self._forget_missing("customers")
             logger.info(f"Клиент создан: {result.get('id')}")
             return result
         except Exception as e:
             logger.error(f"Ошибка создания клиента: {e}")
             raise
     
-    def get_customer(self, customer_id: str) -> Dict[str, Any]:
+    def get_customer(self, customer_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Получение информации о клиенте
         
@@ -384,21 +609,25 @@ class IikoCustomersClient(BaseApiClient):
         
         Args:
             customer_id: ID клиента
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Информация о клиенте
         """
         endpoint = f"/api/1/customers/{customer_id}"
         params = {"organizationId": self.organization_id}
+        self._raise_if_missing("customers", customer_id)
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result
         except Exception as e:
+            self._remember_missing("customers", customer_id, e)
             logger.error(f"Ошибка получения клиента {customer_id}: {e}")
             raise
     
-    def update_customer(self, customer_id: str, customer_data: Dict[str, Any]) -> Dict[str, Any]:
+    def update_customer(self, customer_id: str, customer_data: Dict[str, Any],
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Обновление клиента
         
@@ -407,6 +636,7 @@ class IikoCustomersClient(BaseApiClient):
         Args:
             customer_id: ID клиента
             customer_data: Новые данные клиента
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Обновлённый клиент
@@ -415,19 +645,22 @@ class IikoCustomersClient(BaseApiClient):
         data = {**customer_data, "organizationId": self.organization_id}
         
         try:
-            result = self._make_request("PUT", endpoint, data=data)
+            result = self._make_request("PUT", endpoint, data=data, timeout=timeout)
             logger.info(f"Клиент {customer_id} обновлён")
             return result
         except Exception as e:
             logger.error(f"Ошибка обновления клиента {customer_id}: {e}")
             raise
     
-    def get_customers(self) -> List[Dict[str, Any]]:
+    def get_customers(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Получение списка клиентов
         
         Документация: https://api-ru.iiko.services/#operation/GetCustomers
         
+        Args:
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+        
         Returns:
             Список клиентов
         """
@@ -435,20 +668,48 @@ class IikoCustomersClient(BaseApiClient):
         params = {"organizationId": self.organization_id}
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result.get("customers", [])
         except Exception as e:
             logger.error(f"Ошибка получения клиентов: {e}")
             raise
+    
+    def iter_customers(self, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Потоковое получение списка клиентов
+        
+        В отличие от get_customers() не загружает весь список в память:
+        клиенты выдаются по одному по мере получения ответа.
+        
+        Документация: https://api-ru.iiko.services/#operation/GetCustomers
+        
+        Args:
+            chunk_size: Размер блока чтения в байтах
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+            
+        Returns:
+            Итератор по клиентам
+        """
+        endpoint = "/api/1/customers"
+        params = {"organizationId": self.organization_id}
+        
+        try:
+            yield from self._stream_request("GET", endpoint, "customers", params=params,
+                                            chunk_size=chunk_size, timeout=timeout)
+        except Exception as e:
+            logger.error(f"Ошибка получения клиентов: {e}")
+            raise
 
 class IikoDeliveriesClient(BaseApiClient):
     """Клиент для работы с доставками"""
     
-    def __init__(self, base_url: str, api_key: str, organization_id: str):
-        super().__init__(base_url, api_key)
+    def __init__(self, base_url: str, api_key: str, organization_id: str, **options):
+        super().__init__(base_url, api_key, **options)
         self.organization_id = organization_id
     
-    def create_delivery(self, delivery_data: Dict[str, Any]) -> Dict[str, Any]:
+    def create_delivery(self, delivery_data: Dict[str, Any],
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Создание доставки
         
@@ -456,6 +717,7 @@ class IikoDeliveriesClient(BaseApiClient):
         
         Args:
             delivery_data: Данные доставки
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Созданная доставка
@@ -464,14 +726,15 @@ class IikoDeliveriesClient(BaseApiClient):
         data = {**delivery_data, "organizationId": self.organization_id}
         
         try:
-            result = self._make_request("POST", endpoint, data=data)
+            result = self._make_request("POST", endpoint, data=data, timeout=timeout)
+            self._forget_missing("deliveries")
             logger.info(f"Доставка создана: {result.get('id')}")
             return result
         except Exception as e:
             logger.error(f"Ошибка создания доставки: {e}")
             raise
     
-    def get_delivery(self, delivery_id: str) -> Dict[str, Any]:
+    def get_delivery(self, delivery_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Получение информации о доставке
         
@@ -479,21 +742,25 @@ class IikoDeliveriesClient(BaseApiClient):
         
         Args:
             delivery_id: ID доставки
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Информация о доставке
         """
         endpoint = f"/api/1/deliveries/{delivery_id}"
         params = {"organizationId": self.organization_id}
+        self._raise_if_missing("deliveries", delivery_id)
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result
         except Exception as e:
+            self._remember_missing("deliveries", delivery_id, e)
             logger.error(f"Ошибка получения доставки {delivery_id}: {e}")
             raise
     
-    def update_delivery(self, delivery_id: str, delivery_data: Dict[str, Any]) -> Dict[str, Any]:
+    def update_delivery(self, delivery_id: str, delivery_data: Dict[str, Any],
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Обновление доставки
         
@@ -502,6 +769,7 @@ class IikoDeliveriesClient(BaseApiClient):
         Args:
             delivery_id: ID доставки
             delivery_data: Новые данные доставки
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Обновлённая доставка
@@ -510,7 +778,7 @@ class IikoDeliveriesClient(BaseApiClient):
         data = {**delivery_data, "organizationId": self.organization_id}
         
         try:
-            result = self._make_request("PUT", endpoint, data=data)
+            result = self._make_request("PUT", endpoint, data=data, timeout=timeout)
             logger.info(f"Доставка {delivery_id} обновлена")
             return result
         except Exception as e:
@@ -518,7 +786,8 @@ class IikoDeliveriesClient(BaseApiClient):
             raise
     
     def get_deliveries(self, date_from: Optional[str] = None, 
-                       date_to: Optional[str] = None) -> List[Dict[str, Any]]:
+                       date_to: Optional[str] = None,
+                       timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Получение списка доставок
         
@@ -527,6 +796,7 @@ class IikoDeliveriesClient(BaseApiClient):
         Args:
             date_from: Дата начала периода (формат: YYYY-MM-DD)
             date_to: Дата окончания периода (формат: YYYY-MM-DD)
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Список доставок
@@ -540,7 +810,7 @@ class IikoDeliveriesClient(BaseApiClient):
             params["dateTo"] = date_to
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result.get("deliveries", [])
         except Exception as e:
             logger.error(f"Ошибка получения доставок: {e}")
@@ -549,11 +819,12 @@ class IikoDeliveriesClient(BaseApiClient):
 class IikoReservesClient(BaseApiClient):
     """Клиент для работы с резервами"""
     
-    def __init__(self, base_url: str, api_key: str, organization_id: str):
-        super().__init__(base_url, api_key)
+    def __init__(self, base_url: str, api_key: str, organization_id: str, **options):
+        super().__init__(base_url, api_key, **options)
         self.organization_id = organization_id
     
-    def create_reserve(self, reserve_data: Dict[str, Any]) -> Dict[str, Any]:
+    def create_reserve(self, reserve_data: Dict[str, Any],
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Создание резерва стола
         
@@ -561,6 +832,7 @@ class IikoReservesClient(BaseApiClient):
         
         Args:
             reserve_data: Данные резерва
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Созданный резерв
@@ -569,14 +841,14 @@ class IikoReservesClient(BaseApiClient):
         data = {**reserve_data, "organizationId": self.organization_id}
         
         try:
-            result = self._make_request("POST", endpoint, data=data)
+            result = self._make_request("POST", endpoint, data=data, timeout=timeout)
             logger.info(f"Резерв создан: {result.get('id')}")
             return result
         except Exception as e:
             logger.error(f"Ошибка создания резерва: {e}")
             raise
     
-    def get_reserve(self, reserve_id: str) -> Dict[str, Any]:
+    def get_reserve(self, reserve_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Получение информации о резерве
         
@@ -584,6 +856,7 @@ class IikoReservesClient(BaseApiClient):
         
         Args:
             reserve_id: ID резерва
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Информация о резерве
@@ -592,13 +865,14 @@ class IikoReservesClient(BaseApiClient):
         params = {"organizationId": self.organization_id}
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result
         except Exception as e:
             logger.error(f"Ошибка получения резерва {reserve_id}: {e}")
             raise
     
-    def update_reserve(self, reserve_id: str, reserve_data: Dict[str, Any]) -> Dict[str, Any]:
+    def update_reserve(self, reserve_id: str, reserve_data: Dict[str, Any],
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Обновление резерва
         
@@ -607,6 +881,7 @@ class IikoReservesClient(BaseApiClient):
         Args:
             reserve_id: ID резерва
             reserve_data: Новые данные резерва
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Обновлённый резерв
@@ -615,14 +890,14 @@ class IikoReservesClient(BaseApiClient):
         data = {**reserve_data, "organizationId": self.organization_id}
         
         try:
-            result = self._make_request("PUT", endpoint, data=data)
+            result = self._make_request("PUT", endpoint, data=data, timeout=timeout)
             logger.info(f"Резерв {reserve_id} обновлён")
             return result
         except Exception as e:
             logger.error(f"Ошибка обновления резерва {reserve_id}: {e}")
             raise
     
-    def cancel_reserve(self, reserve_id: str) -> bool:
+    def cancel_reserve(self, reserve_id: str, timeout: Optional[float] = None) -> bool:
         """
         Отмена резерва
         
@@ -630,6 +905,7 @@ class IikoReservesClient(BaseApiClient):
         
         Args:
             reserve_id: ID резерва
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             True если резерв успешно отменён
@@ -638,7 +914,7 @@ class IikoReservesClient(BaseApiClient):
         params = {"organizationId": self.organization_id}
         
         try:
-            self._make_request("POST", endpoint, params=params)
+            self._make_request("POST", endpoint, params=params, timeout=timeout)
             logger.info(f"Резерв {reserve_id} отменён")
             return True
         except Exception as e:
@@ -646,7 +922,8 @@ class IikoReservesClient(BaseApiClient):
             raise
     
     def get_reserves(self, date_from: Optional[str] = None, 
-                     date_to: Optional[str] = None) -> List[Dict[str, Any]]:
+                     date_to: Optional[str] = None,
+                     timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Получение списка резервов
         
@@ -655,6 +932,7 @@ class IikoReservesClient(BaseApiClient):
         Args:
             date_from: Дата начала периода (формат: YYYY-MM-DD)
             date_to: Дата окончания периода (формат: YYYY-MM-DD)
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Список резервов
@@ -668,21 +946,66 @@ class IikoReservesClient(BaseApiClient):
             params["dateTo"] = date_to
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result.get("reserves", [])
         except Exception as e:
             logger.error(f"Ошибка получения резервов: {e}")
             raise
+    
+    def get_tables(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Получение списка столов
+        
+        Документация: https://api-ru.iiko.services/#operation/GetTables
+        
+        Args:
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+        
+        Returns:
+            Список столов
+        """
+        endpoint = "/api/1/tables"
+        params = {"organizationId": self.organization_id}
+        
+        try:
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
+            return result.get("tables", [])
+        except Exception as e:
+            logger.error(f"Ошибка получения столов: {e}")
+            raise
+    
+    def get_zones(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Получение списка зон
+        
+        Документация: https://api-ru.iiko.services/#operation/GetZones
+        
+        Args:
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+        
+        Returns:
+            Список зон
+        """
+        endpoint = "/api/1/zones"
+        params = {"organizationId": self.organization_id}
+        
+        try:
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
+            return result.get("zones", [])
+        except Exception as e:
+            logger.error(f"Ошибка получения зон: {e}")
+            raise
 
 class IikoReportsClient(BaseApiClient):
     """Клиент для работы с отчётами"""
     
-    def __init__(self, base_url: str, api_key: str, organization_id: str):
-        super().__init__(base_url, api_key)
+    def __init__(self, base_url: str, api_key: str, organization_id: str, **options):
+        super().__init__(base_url, api_key, **options)
         self.organization_id = organization_id
     
     def get_sales_report(self, date_from: Optional[str] = None, 
-                         date_to: Optional[str] = None) -> Dict[str, Any]:
+                         date_to: Optional[str] = None,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Получение отчёта по продажам
         
@@ -691,6 +1014,7 @@ class IikoReportsClient(BaseApiClient):
         Args:
             date_from: Дата начала периода (формат: YYYY-MM-DD)
             date_to: Дата окончания периода (формат: YYYY-MM-DD)
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Отчёт по продажам
@@ -704,14 +1028,15 @@ class IikoReportsClient(BaseApiClient):
             params["dateTo"] = date_to
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result
         except Exception as e:
             logger.error(f"Ошибка получения отчёта по продажам: {e}")
             raise
     
     def get_products_report(self, date_from: Optional[str] = None, 
-                           date_to: Optional[str] = None) -> Dict[str, Any]:
+                           date_to: Optional[str] = None,
+                           timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Получение отчёта по товарам
         
@@ -720,6 +1045,7 @@ class IikoReportsClient(BaseApiClient):
         Args:
             date_from: Дата начала периода (формат: YYYY-MM-DD)
             date_to: Дата окончания периода (формат: YYYY-MM-DD)
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
             
         Returns:
             Отчёт по товарам
@@ -733,7 +1059,7 @@ class IikoReportsClient(BaseApiClient):
             params["dateTo"] = date_to
         
         try:
-            result = self._make_request("GET", endpoint, params=params)
+            result = self._make_request("GET", endpoint, params=params, timeout=timeout)
             return result
         except Exception as e:
             logger.error(f"Ошибка получения отчёта по товарам: {e}")
@@ -742,29 +1068,56 @@ class IikoReportsClient(BaseApiClient):
 class IikoMainClient:
     """Основной клиент для работы с API iiko"""
     
-    def __init__(self, api_key: str, organization_id: Optional[str] = None):
+    def __init__(self, api_key: str, organization_id: Optional[str] = None,
+                 transport: Optional[Any] = None, http2: bool = False,
+                 cache: Optional[Any] = None,
+                 request_timeout: Tuple[float, float] = DEFAULT_REQUEST_TIMEOUT,
+                 negative_cache: Optional[Any] = None):
+        """
+        Args:
+            api_key: API ключ
+            organization_id: ID организации
+            transport: Общий HTTP транспорт для всех клиентов
+            http2: Использовать HTTP/2 транспорт (если transport не указан)
+            cache: Общий кэш ответов (ResponseCache из iiko_api_cache)
+            request_timeout: Таймауты (соединение, чтение) запроса, секунд
+            negative_cache: Общий кэш отсутствующих ID (NegativeCache из iiko_api_cache)
+        """
         self.base_url = "https://api-ru.iiko.services"
         self.api_key = api_key
         self.organization_id = organization_id
+        # Один транспорт на все клиенты: общий пул соединений к API
+        self.transport = transport or (Http2Transport() if http2 else RequestsTransport())
+        self.cache = cache
+        self.request_timeout = request_timeout
+        self.negative_cache = negative_cache
         
         # Инициализация клиентов
-        self.auth = IikoAuthClient(self.base_url, self.api_key)
-        self.organizations = IikoOrganizationsClient(self.base_url, self.api_key)
+        self.auth = IikoAuthClient(self.base_url, self.api_key, **self._client_options())
+        self.organizations = IikoOrganizationsClient(self.base_url, self.api_key,
+                                                     **self._client_options())
         
         if organization_id:
             self._init_organization_clients()
     
+    def _client_options(self) -> Dict[str, Any]:
+        """Общие параметры для всех клиентов"""
+        return {"transport": self.transport, "cache": self.cache,
+                "request_timeout": self.request_timeout, "negative_cache": self.negative_cache}
+    
     def _init_organization_clients(self):
         """Инициализация клиентов, требующих organization_id"""
         if not self.organization_id:
             raise ValidationError("ID организации не установлен")
         
-        self.menu = IikoMenuClient(self.base_url, self.api_key, self.organization_id)
-        self.orders = IikoOrdersClient(self.base_url, self.api_key, self.organization_id)
-        self.customers = IikoCustomersClient(self.base_url, self.api_key, self.organization_id)
-        self.deliveries = IikoDeliveriesClient(self.base_url, self.api_key, self.organization_id)
-        self.reserves = IikoReservesClient(self.base_url, self.api_key, self.organization_id)
-        self.reports = IikoReportsClient(self.base_url, self.api_key, self.organization_id)
+        args = (self.base_url, self.api_key, self.organization_id)
+        options = self._client_options()
+        self.menu = IikoMenuClient(*args, **options)
+        self.orders = IikoOrdersClient(*args, **options)
+        self.customers = IikoCustomersClient(*args, **options)
+        self.deliveries = IikoDeliveriesClient(*args, **options)
+        self.reserves = IikoReservesClient(*args, **options)
+        self.reports = IikoReportsClient(*args, **options)
     
     def set_organization(self, organization_id: str):
         """Установка ID организации"""
@@ -772,10 +1125,39 @@ class IikoMainClient:
         self._init_organization_clients()
         logger.info(f"ID организации установлен: {organization_id}")
     
-    def check_connection(self) -> bool:
-        """Проверка соединения с API"""
+    def warmup(self, connections: int = 4, keepalive_interval: Optional[float] = None,
+               timeout: float = 10.0) -> int:
+        """
+        Прогрев соединений с API перед первыми запросами
+        
+        Разрешает имя хоста API и открывает connections соединений пула общего
+        транспорта. Отдельного получения токена нет: запросы авторизуются API ключом.
+        
+        Args:
+            connections: Число соединений
+            keepalive_interval: Интервал обновления соединений при простое, секунд
+                                (None - без фонового обновления)
+            timeout: Таймаут каждого запроса прогрева, секунд
+            
+        Returns:
+            Число открытых соединений
+        """
+        if not hasattr(self.transport, "warmup"):
+            logger.warning(f"Транспорт {type(self.transport).__name__} не поддерживает прогрев")
+            return 0
+        opened = self.transport.warmup(self.base_url, connections, timeout=timeout)
+        if keepalive_interval is not None:
+            self.transport.start_keepalive(self.base_url, keepalive_interval, connections)
+        return opened
+    
+    def transport_stats(self) -> Dict[str, Any]:
+        """Статистика соединений и запросов общего транспорта"""
+        return self.transport.stats()
+    
+    def check_connection(self, timeout: Optional[float] = None) -> bool:
+        """Проверка соединения с API (timeout - лимит времени проверки, секунд)"""
         try:
-            self.organizations.get_organizations()
+            self.organizations.get_organizations(timeout=timeout)
             logger.info("Соединение с API установлено")
             return True
         except Exception as e:
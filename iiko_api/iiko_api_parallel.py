@@ -0,0 +1,192 @@
+"""
+Параллельная обработка заказов iiko в пуле процессов
+Документация: https://api-ru.iiko.services/#operation/GetOrders
+
+Разбор JSON и построение столбцовой таблицы заказов (OrdersTable) для
+десятков организаций упирается в одно ядро из-за GIL. Здесь каждая
+организация обрабатывается в отдельном процессе: процесс сам загружает
+(или получает в виде байтов ответа) заказы, строит таблицу и возвращает
+её компактное представление - массивы NumPy и словари строк, - а не
+словари заказов. Главный процесс склеивает части (OrdersTable.concat),
+после чего группировки by_product/by_category/by_hour выполняются
+векторно по всем организациям сразу.
+
+Если нужна не таблица, а только отчёт, orders_report_from_* выполняют
+и группировки в процессах пула: каждый процесс возвращает итоги своей
+организации (массивы по товарам, категориям, часам), главный процесс
+складывает их и один раз сортирует объединённые итоги.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Sequence
+import logging
+
+from iiko_api_analytics import DEFAULT_BATCH_SIZE, OrdersTable, merge_aggregates
+from iiko_api_oop import IikoOrdersClient
+from iiko_api_stream import iter_json_array
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://api-ru.iiko.services"
+
+
+def _table_from_api(base_url: str, api_key: str, organization_id: str,
+                    date_from: Optional[str], date_to: Optional[str],
+                    categories: Optional[Dict[str, str]]) -> Dict[str, Any]:
+    """Загрузка и обработка заказов одной организации (выполняется в процессе пула)"""
+    client = IikoOrdersClient(base_url, api_key, organization_id)
+    orders = client.iter_orders(date_from=date_from, date_to=date_to)
+    return OrdersTable.from_orders(orders, organization_id, categories).to_arrays()
+
+
+def _table_from_json(payload: bytes, organization_id: str,
+                     categories: Optional[Dict[str, str]]) -> Dict[str, Any]:
+    """Разбор ответа get_orders одной организации (выполняется в процессе пула)"""
+    orders = iter_json_array([payload], "orders")
+    return OrdersTable.from_orders(orders, organization_id, categories,
+                                   DEFAULT_BATCH_SIZE).to_arrays()
+
+
+def _aggregates_from_json(payload: bytes, organization_id: str,
+                          categories: Optional[Dict[str, str]],
+                          statuses: Optional[Sequence[str]], utc_offset: float) -> Dict[str, Any]:
+    """Разбор ответа get_orders и итоги одной организации (выполняется в процессе пула)"""
+    orders = iter_json_array([payload], "orders")
+    table = OrdersTable.from_orders(orders, organization_id, categories, DEFAULT_BATCH_SIZE)
+    return table.aggregates(statuses, utc_offset)
+
+
+def _aggregates_from_api(base_url: str, api_key: str, organization_id: str,
+                         date_from: Optional[str], date_to: Optional[str],
+                         categories: Optional[Dict[str, str]],
+                         statuses: Optional[Sequence[str]], utc_offset: float) -> Dict[str, Any]:
+    """Загрузка заказов и итоги одной организации (выполняется в процессе пула)"""
+    client = IikoOrdersClient(base_url, api_key, organization_id)
+    orders = client.iter_orders(date_from=date_from, date_to=date_to)
+    table = OrdersTable.from_orders(orders, organization_id, categories)
+    return table.aggregates(statuses, utc_offset)
+
+
+def orders_table_from_api(api_key: str, organization_ids: Iterable[str],
+                          date_from: Optional[str] = None, date_to: Optional[str] = None,
+                          categories: Optional[Dict[str, str]] = None,
+                          max_workers: Optional[int] = None,
+                          base_url: str = BASE_URL) -> OrdersTable:
+    """
+    Таблица заказов нескольких организаций, загруженных в пуле процессов
+
+    Args:
+        api_key: API ключ
+        organization_ids: ID организаций
+        date_from: Дата начала периода (формат: YYYY-MM-DD)
+        date_to: Дата окончания периода (формат: YYYY-MM-DD)
+        categories: Соответствие товар -> категория (см. category_map_from_menu)
+        max_workers: Число процессов (по умолчанию - число ядер)
+        base_url: Базовый URL API
+
+    Returns:
+        Общая таблица заказов
+    """
+    organization_ids = list(organization_ids)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_table_from_api, base_url, api_key, org_id,
+                                   date_from, date_to, categories)
+                   for org_id in organization_ids]
+        table = OrdersTable.concat((future.result() for future in futures), categories)
+    logger.info(f"Загружено заказов: {len(table)} ({len(organization_ids)} организаций)")
+    return table
+
+
+def orders_table_from_json(payloads: Dict[str, bytes],
+                           categories: Optional[Dict[str, str]] = None,
+                           max_workers: Optional[int] = None) -> OrdersTable:
+    """
+    Таблица заказов из сохранённых ответов get_orders, разобранных в пуле процессов
+
+    Args:
+        payloads: Тела ответов get_orders по ID организаций ({"orders": [...]})
+        categories: Соответствие товар -> категория
+        max_workers: Число процессов (по умолчанию - число ядер)
+
+    Returns:
+        Общая таблица заказов
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_table_from_json, payload, org_id, categories)
+                   for org_id, payload in payloads.items()]
+        return OrdersTable.concat((future.result() for future in futures), categories)
+
+
+def orders_table_from_json_serial(payloads: Dict[str, bytes],
+                                  categories: Optional[Dict[str, str]] = None) -> OrdersTable:
+    """То же, что orders_table_from_json, в текущем процессе (для небольших объёмов)"""
+    return OrdersTable.concat((_table_from_json(payload, org_id, categories)
+                               for org_id, payload in payloads.items()), categories)
+
+
+def orders_report_from_api(api_key: str, organization_ids: Iterable[str],
+                           date_from: Optional[str] = None, date_to: Optional[str] = None,
+                           categories: Optional[Dict[str, str]] = None,
+                           statuses: Optional[Sequence[str]] = None, top: Optional[int] = None,
+                           utc_offset: float = 0.0, max_workers: Optional[int] = None,
+                           base_url: str = BASE_URL) -> Dict[str, Any]:
+    """
+    Отчёт по заказам нескольких организаций: загрузка и группировки в пуле процессов
+
+    Args:
+        api_key: API ключ
+        organization_ids: ID организаций
+        date_from: Дата начала периода (формат: YYYY-MM-DD)
+        date_to: Дата окончания периода (формат: YYYY-MM-DD)
+        categories: Соответствие товар -> категория (см. category_map_from_menu)
+        statuses: Учитывать только заказы с этими статусами
+        top: Оставить только первые N товаров по выручке
+        utc_offset: Смещение местного времени от UTC в часах (для byHour)
+        max_workers: Число процессов (по умолчанию - число ядер)
+        base_url: Базовый URL API
+
+    Returns:
+        summary, byOrganization, byProduct, byCategory, byHour (см. merge_aggregates)
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_aggregates_from_api, base_url, api_key, org_id, date_from,
+                                   date_to, categories, statuses, utc_offset)
+                   for org_id in organization_ids]
+        return merge_aggregates((future.result() for future in futures), top)
+
+
+def orders_report_from_json(payloads: Dict[str, bytes],
+                            categories: Optional[Dict[str, str]] = None,
+                            statuses: Optional[Sequence[str]] = None, top: Optional[int] = None,
+                            utc_offset: float = 0.0,
+                            max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Отчёт по сохранённым ответам get_orders: разбор и группировки в пуле процессов
+
+    Args:
+        payloads: Тела ответов get_orders по ID организаций ({"orders": [...]})
+        categories: Соответствие товар -> категория
+        statuses: Учитывать только заказы с этими статусами
+        top: Оставить только первые N товаров по выручке
+        utc_offset: Смещение местного времени от UTC в часах (для byHour)
+        max_workers: Число процессов (по умолчанию - число ядер)
+
+    Returns:
+        summary, byOrganization, byProduct, byCategory, byHour (см. merge_aggregates)
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_aggregates_from_json, payload, org_id, categories,
+                                   statuses, utc_offset)
+                   for org_id, payload in payloads.items()]
+        return merge_aggregates((future.result() for future in futures), top)
+
+
+def orders_report_from_json_serial(payloads: Dict[str, bytes],
+                                   categories: Optional[Dict[str, str]] = None,
+                                   statuses: Optional[Sequence[str]] = None,
+                                   top: Optional[int] = None,
+                                   utc_offset: float = 0.0) -> Dict[str, Any]:
+    """То же, что orders_report_from_json, в текущем процессе (для небольших объёмов)"""
+    return merge_aggregates((_aggregates_from_json(payload, org_id, categories, statuses,
+                                                   utc_offset)
+                             for org_id, payload in payloads.items()), top)
@@ -0,0 +1,268 @@
+"""
+Локальный расчёт стоимости корзины со скидками и акциями iiko
+Документация: https://api-ru.iiko.services/#operation/GetDiscounts
+
+Списки get_discounts() и get_promotions() один раз компилируются в набор
+правил с индексами по товару и категории и с разбиением времени на
+отрезки, на которых набор действующих правил постоянен. Расчёт корзины
+выполняется локально, без обращений к API: для каждой строки берутся
+только правила её товара и категории, правила на весь заказ применяются
+векторно ко всем строкам сразу.
+
+Правило может ограничиваться товарами (productId/productIds) и
+категориями (category/categories); без ограничений оно действует на весь
+заказ. На строку применяется одна наибольшая скидка. Акция BuyOneGetOne
+без товаров и категорий не компилируется (с предупреждением в журнале):
+«вторая бесплатно» на весь заказ не определена.
+"""
+
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+import logging
+
+import numpy as np
+
+import iiko_api_wrapper
+from iiko_api_analytics import category_map_from_menu
+
+logger = logging.getLogger(__name__)
+
+PERCENTAGE = "Percentage"
+BUY_ONE_GET_ONE = "BuyOneGetOne"
+FREE_DELIVERY = "FreeDelivery"
+
+
+def _parse_time(value: Optional[str], default: float) -> float:
+    """ISO дата iiko (2024-01-01T00:00:00.000Z) -> секунды UTC"""
+    if not value:
+        return default
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _as_set(rule: Dict[str, Any], single: str, plural: str) -> Optional[FrozenSet[str]]:
+    values = list(rule.get(plural) or ())
+    if rule.get(single):
+        values.append(rule[single])
+    return frozenset(values) if values else None
+
+
+class Rule(NamedTuple):
+    """Скомпилированное правило скидки или акции"""
+    id: str
+    name: Optional[str]
+    kind: str
+    percentage: float
+    min_order_amount: float
+    valid_from: float
+    valid_to: float
+    products: Optional[FrozenSet[str]]
+    categories: Optional[FrozenSet[str]]
+
+
+def compile_rule(source: Dict[str, Any]) -> Optional[Rule]:
+    """
+    Правило из записи get_discounts()/get_promotions()
+
+    Returns:
+        Правило или None, если запись неактивна, её тип не поддерживается
+        или акция BuyOneGetOne не привязана к товарам и категориям
+    """
+    if not source.get("isActive", True):
+        return None
+    kind = source.get("type") or (PERCENTAGE if source.get("percentage") is not None else None)
+    if kind not in (PERCENTAGE, BUY_ONE_GET_ONE, FREE_DELIVERY):
+        logger.debug(f"Правило {source.get('id')} с типом {kind} не поддерживается")
+        return None
+    products = _as_set(source, "productId", "productIds")
+    categories = _as_set(source, "category", "categories")
+    if kind == BUY_ONE_GET_ONE and products is None and categories is None:
+        logger.warning(f"Акция {source.get('id')} типа {kind} не привязана к товарам "
+                       f"или категориям и не применяется")
+        return None
+    return Rule(
+        id=source.get("id"),
+        name=source.get("name"),
+        kind=kind,
+        percentage=float(source.get("percentage") or 0.0),
+        min_order_amount=float(source.get("minOrderAmount") or 0.0),
+        valid_from=_parse_time(source.get("validFrom"), float("-inf")),
+        valid_to=_parse_time(source.get("validTo"), float("inf")),
+        products=products,
+        categories=categories,
+    )
+
+
+class _RuleSet:
+    """Скомпилированные правила с индексами по товару, категории и времени"""
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        self.by_product: Dict[str, List[int]] = {}
+        self.by_category: Dict[str, List[int]] = {}
+        self.order_wide: List[int] = []
+        for index, rule in enumerate(rules):
+            if rule.products is None and rule.categories is None:
+                self.order_wide.append(index)
+            for product_id in rule.products or ():
+                self.by_product.setdefault(product_id, []).append(index)
+            for category in rule.categories or ():
+                self.by_category.setdefault(category, []).append(index)
+        self.boundaries = sorted({moment for rule in rules
+                                  for moment in (rule.valid_from, rule.valid_to)
+                                  if moment not in (float("-inf"), float("inf"))})
+        self.segments: Dict[int, FrozenSet[int]] = {}
+
+    def active(self, moment: float) -> FrozenSet[int]:
+        segment = bisect_right(self.boundaries, moment)
+        active = self.segments.get(segment)
+        if active is None:
+            # Набор правил постоянен между соседними границами периодов действия
+            active = frozenset(index for index, rule in enumerate(self.rules)
+                               if rule.valid_from <= moment < rule.valid_to)
+            self.segments[segment] = active
+        return active
+
+
+class PricingEngine:
+    """
+    Расчёт стоимости корзины по скомпилированным скидкам и акциям
+
+    Пример:
+        engine = PricingEngine.fetch()
+        result = engine.price([{"productId": "dish-002", "amount": 2, "price": 380.0}])
+    """
+
+    def __init__(self, discounts: Iterable[Dict[str, Any]] = (),
+                 promotions: Iterable[Dict[str, Any]] = (),
+                 categories: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            discounts: Список get_discounts()
+            promotions: Список get_promotions()
+            categories: Соответствие товар -> категория (см. category_map_from_menu)
+        """
+        self.categories = categories or {}
+        self.organization_id: Optional[str] = None
+        self.compile(discounts, promotions)
+
+    @classmethod
+    def fetch(cls, organization_id: Optional[str] = None) -> "PricingEngine":
+        """Загружает скидки, акции и меню организации через iiko_api_wrapper"""
+        engine = cls()
+        engine.organization_id = organization_id
+        engine.refresh()
+        return engine
+
+    def refresh(self) -> None:
+        """Повторная загрузка и компиляция правил (меню - для категорий товаров)"""
+        org_id = self.organization_id
+        self.categories = category_map_from_menu(iiko_api_wrapper.get_menu(org_id))
+        self.compile(iiko_api_wrapper.get_discounts(org_id), iiko_api_wrapper.get_promotions(org_id))
+
+    def compile(self, discounts: Iterable[Dict[str, Any]],
+                promotions: Iterable[Dict[str, Any]]) -> None:
+        """Компиляция правил и построение индексов"""
+        rules = [rule for rule in map(compile_rule, [*discounts, *promotions]) if rule is not None]
+        # Подменяем набор целиком, чтобы параллельные расчёты видели согласованное состояние
+        self._rule_set = _RuleSet(rules)
+        logger.info(f"Скомпилировано правил: {len(rules)}")
+
+    def __len__(self) -> int:
+        return len(self._rule_set.rules)
+
+    def active_rules(self, at: Optional[datetime] = None) -> List[Rule]:
+        """Правила, действующие в момент at (по умолчанию - сейчас)"""
+        rule_set = self._rule_set
+        active = rule_set.active((at or datetime.now(timezone.utc)).timestamp())
+        return [rule_set.rules[index] for index in sorted(active)]
+
+    def price(self, items: List[Dict[str, Any]], at: Optional[datetime] = None,
+              delivery_cost: float = 0.0) -> Dict[str, Any]:
+        """
+        Расчёт стоимости корзины
+
+        Args:
+            items: Строки корзины (productId, amount, price)
+            at: Момент расчёта (по умолчанию - сейчас)
+            delivery_cost: Стоимость доставки
+
+        Returns:
+            subtotal, discount, deliveryCost, total, items (со скидкой по строке)
+            и applied - суммы скидок по правилам
+        """
+        rule_set = self._rule_set
+        rules = rule_set.rules
+        active = rule_set.active((at or datetime.now(timezone.utc)).timestamp())
+        count = len(items)
+        sums = np.fromiter(((item.get("amount") or 0) * (item.get("price") or 0.0) for item in items),
+                           dtype=np.float64, count=count)
+        subtotal = float(sums.sum())
+        line_discount = np.zeros(count)
+        line_rule = np.full(count, -1, dtype=np.int64)
+
+        # Правила, привязанные к товару или категории строки
+        for row, item in enumerate(items):
+            product_id = item.get("productId")
+            candidates = rule_set.by_product.get(product_id, [])
+            category = self.categories.get(product_id, item.get("category"))
+            if category in rule_set.by_category:
+                candidates = candidates + rule_set.by_category[category]
+            for index in candidates:
+                if index not in active or subtotal < rules[index].min_order_amount:
+                    continue
+                discount = self._line_discount(rules[index], item, sums[row])
+                if discount > line_discount[row]:
+                    line_discount[row], line_rule[row] = discount, index
+
+        delivery = delivery_cost
+        best_order_rule, best_percentage = -1, 0.0
+        for index in rule_set.order_wide:
+            rule = rules[index]
+            if index not in active or subtotal < rule.min_order_amount:
+                continue
+            if rule.kind == FREE_DELIVERY:
+                delivery = 0.0
+            elif rule.kind == PERCENTAGE and rule.percentage > best_percentage:
+                best_order_rule, best_percentage = index, rule.percentage
+
+        # Скидка на весь заказ применяется к строкам, где она больше собственной
+        if best_order_rule >= 0:
+            order_discount = sums * (best_percentage / 100)
+            better = order_discount > line_discount
+            line_discount = np.where(better, order_discount, line_discount)
+            line_rule = np.where(better, best_order_rule, line_rule)
+
+        applied: Dict[str, float] = {}
+        if count:
+            totals = np.bincount(line_rule + 1, weights=line_discount, minlength=len(rules) + 1)
+            applied = {rules[i - 1].id: round(float(totals[i]), 2)
+                       for i in np.flatnonzero(totals[1:]) + 1}
+        if delivery != delivery_cost:
+            free_delivery = [rules[i].id for i in rule_set.order_wide
+                             if rules[i].kind == FREE_DELIVERY and i in active
+                             and subtotal >= rules[i].min_order_amount]
+            applied[free_delivery[0]] = round(delivery_cost, 2)
+
+        discount = float(line_discount.sum())
+        return {
+            "subtotal": round(subtotal, 2),
+            "discount": round(discount, 2),
+            "deliveryCost": round(delivery, 2),
+            "total": round(subtotal - discount + delivery, 2),
+            "items": [{**item, "sum": round(float(sums[row]), 2),
+                       "discount": round(float(line_discount[row]), 2)}
+                      for row, item in enumerate(items)],
+            "applied": applied,
+        }
+
+    @staticmethod
+    def _line_discount(rule: Rule, item: Dict[str, Any], line_sum: float) -> float:
+        if rule.kind == PERCENTAGE:
+            return line_sum * rule.percentage / 100
+        if rule.kind == BUY_ONE_GET_ONE:
+            return (int(item.get("amount") or 0) // 2) * (item.get("price") or 0.0)
+        return 0.0
@@ -0,0 +1,198 @@
+"""
+Сверка платежей с заказами iiko
+Документация: https://api-ru.iiko.services/#operation/GetPayments
+
+Заказы и платежи индексируются по (организация, ID заказа): для заказа
+хранится сумма и статус, для платежей - сумма по заказу с учётом ID
+платежа, поэтому повторная загрузка тех же данных не искажает итоги.
+Сверку можно вести в течение дня (sync() за текущий день по расписанию),
+тогда итоговый отчёт report() - один линейный проход по заказам.
+"""
+
+import threading
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+import iiko_api_wrapper
+from iiko_api_concurrency import AimdLimiter, adaptive_map
+
+logger = logging.getLogger(__name__)
+
+# Статусы платежей, учитываемые в сверке
+PAID_PAYMENT_STATUSES = frozenset({"Completed"})
+
+# Статусы заказов, которые не должны быть оплачены
+UNPAYABLE_ORDER_STATUSES = frozenset({"Cancelled"})
+
+# Сколько записей потока применяется за один захват блокировки
+APPLY_BATCH_SIZE = 500
+
+_Key = Tuple[str, str]
+
+
+def _batches(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Разбивает поток записей на списки по size штук"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Reconciler:
+    """
+    Инкрементальная сверка платежей и заказов нескольких организаций
+
+    Пример:
+        reconciler = Reconciler()
+        reconciler.sync(organization_ids, date_from="2024-01-15")  # в течение дня
+        report = reconciler.report()                                # закрытие дня
+    """
+
+    def __init__(self, tolerance: float = 0.01,
+                 paid_statuses: Iterable[str] = PAID_PAYMENT_STATUSES,
+                 unpayable_statuses: Iterable[str] = UNPAYABLE_ORDER_STATUSES):
+        """
+        Args:
+            tolerance: Допустимое расхождение суммы заказа и оплаты
+            paid_statuses: Статусы платежей, учитываемые в сверке
+            unpayable_statuses: Статусы заказов, ожидаемая оплата которых равна нулю
+        """
+        self.tolerance = tolerance
+        self.paid_statuses = frozenset(paid_statuses)
+        self.unpayable_statuses = frozenset(unpayable_statuses)
+        self._lock = threading.Lock()
+        self._orders: Dict[_Key, Tuple[float, Optional[str]]] = {}
+        self._paid: Dict[_Key, float] = {}
+        self._payments: Dict[Tuple[str, str], Tuple[_Key, float]] = {}
+
+    def add_orders(self, orders: Iterable[Dict[str, Any]], organization_id: str) -> int:
+        """
+        Добавляет или обновляет заказы организации
+
+        Поток читается без блокировки, записи применяются пачками, поэтому
+        загрузки разных организаций не ждут друг друга.
+
+        Returns:
+            Количество обработанных заказов
+        """
+        count = 0
+        for batch in _batches(orders, APPLY_BATCH_SIZE):
+            with self._lock:
+                for order in batch:
+                    self._orders[(organization_id, order["id"])] = (
+                        float(order.get("sum") or 0.0), order.get("status"))
+            count += len(batch)
+        return count
+
+    def add_payments(self, payments: Iterable[Dict[str, Any]], organization_id: str) -> int:
+        """
+        Добавляет или обновляет платежи организации
+
+        Платёж с уже известным ID заменяет прежний (например, при смене
+        статуса), поэтому загружать один и тот же период можно повторно.
+
+        Returns:
+            Количество обработанных платежей
+        """
+        count = 0
+        for batch in _batches(payments, APPLY_BATCH_SIZE):
+            with self._lock:
+                for payment in batch:
+                    key = (organization_id, payment.get("orderId"))
+                    amount = float(payment.get("amount") or 0.0)
+                    if payment.get("status") not in self.paid_statuses:
+                        amount = 0.0
+                    previous = self._payments.get((organization_id, payment["id"]))
+                    if previous is not None:
+                        self._paid[previous[0]] -= previous[1]
+                    self._payments[(organization_id, payment["id"])] = (key, amount)
+                    self._paid[key] = self._paid.get(key, 0.0) + amount
+            count += len(batch)
+        return count
+
+    def sync(self, organization_ids: Iterable[str], date_from: Optional[str] = None,
+             date_to: Optional[str] = None, max_workers: int = 4,
+             limiter: Optional[AimdLimiter] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Потоковая загрузка заказов и платежей организаций параллельно
+
+        Загрузки выполняются в контексте вызывающего (IikoContext, срок deadline).
+
+        Args:
+            organization_ids: ID организаций
+            date_from: Дата начала периода (формат: YYYY-MM-DD)
+            date_to: Дата окончания периода (формат: YYYY-MM-DD)
+            max_workers: Максимум одновременных запросов к API
+            limiter: Адаптивный лимит одновременных запросов (вместо фиксированного max_workers)
+
+        Returns:
+            Количество загруженных заказов и платежей по организациям
+        """
+        organization_ids = list(organization_ids)
+        tasks = [(org_id, kind) for org_id in organization_ids for kind in ("orders", "payments")]
+
+        def load(task: Tuple[str, str]) -> int:
+            org_id, kind = task
+            if kind == "orders":
+                return self.add_orders(iiko_api_wrapper.iter_orders(org_id, date_from, date_to),
+                                       org_id)
+            return self.add_payments(iiko_api_wrapper.iter_payments(org_id, date_from, date_to),
+                                     org_id)
+
+        result: Dict[str, Dict[str, int]] = {org_id: {} for org_id in organization_ids}
+        for (org_id, kind), count in zip(tasks, adaptive_map(load, tasks, limiter, max_workers)):
+            result[org_id][kind] = count
+        return result
+
+    def report(self, organization_id: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Результат сверки
+
+        Args:
+            organization_id: Только для этой организации (по умолчанию - все)
+
+        Returns:
+            Словарь со списками строк:
+            matched - оплачены полностью, unpaid - без оплаты,
+            partial - оплачены частично, overpaid - переплата (в том числе
+            оплаченные отменённые заказы), orphanPayments - оплаты
+            неизвестных заказов
+        """
+        result: Dict[str, List[Dict[str, Any]]] = {
+            "matched": [], "unpaid": [], "partial": [], "overpaid": [], "orphanPayments": []}
+        with self._lock:
+            for key, (total, status) in self._orders.items():
+                if organization_id is not None and key[0] != organization_id:
+                    continue
+                expected = 0.0 if status in self.unpayable_statuses else total
+                paid = self._paid.get(key, 0.0)
+                difference = paid - expected
+                if abs(difference) <= self.tolerance:
+                    group = "matched"
+                elif difference > 0:
+                    group = "overpaid"
+                elif paid <= self.tolerance:
+                    group = "unpaid"
+                else:
+                    group = "partial"
+                if group == "matched" and expected == 0.0:
+                    continue
+                result[group].append({"organizationId": key[0], "orderId": key[1],
+                                      "status": status, "orderSum": total, "paid": paid,
+                                      "difference": difference})
+            for key, paid in self._paid.items():
+                if key not in self._orders and abs(paid) > self.tolerance and (
+                        organization_id is None or key[0] == organization_id):
+                    result["orphanPayments"].append({"organizationId": key[0], "orderId": key[1],
+                                                     "paid": paid})
+        return result
+
+    def clear(self) -> None:
+        """Очищает данные сверки (например, после закрытия дня)"""
+        with self._lock:
+            self._orders.clear()
+            self._paid.clear()
+            self._payments.clear()
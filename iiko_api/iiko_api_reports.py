@@ -0,0 +1,227 @@
+"""
+Локальное хранилище дневных отчётов iiko
+Документация: https://api-ru.iiko.services/#operation/GetSalesReport
+
+Отчёты за закрытые (прошедшие) дни не меняются, поэтому они сохраняются
+на диск. Отчёт по продажам за период собирается из сохранённых дневных
+агрегатов (summary, byCategory), и из API запрашиваются только отсутствующие
+дни (параллельно) и текущий (открытый) день.
+
+Отчёт по товарам содержит только topProducts, из дневных списков лидеров
+нельзя получить лидеров периода, поэтому он запрашивается за весь период
+одним вызовом и сохраняется для закрытого периода целиком.
+"""
+
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from iiko_api_concurrency import adaptive_map
+from iiko_api_deadline import deadline
+from iiko_api_oop import IikoReportsClient, ValidationError
+
+logger = logging.getLogger(__name__)
+
+SALES_REPORT = "sales"
+PRODUCTS_REPORT = "products"
+
+
+class ReportStore:
+    """
+    Дисковое хранилище дневных отчётов
+
+    Каждый отчёт хранится в отдельном JSON файле
+    <directory>/<organization_id>/<report>/<YYYY-MM-DD>.json, отчёт за период -
+    в <YYYY-MM-DD>_<YYYY-MM-DD>.json
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, organization_id: str, report: str, day: date,
+              date_to: Optional[date] = None) -> str:
+        name = day.isoformat()
+        if date_to is not None and date_to != day:
+            name = f"{name}_{date_to.isoformat()}"
+        return os.path.join(self.directory, organization_id, report, f"{name}.json")
+
+    def load(self, organization_id: str, report: str, day: date,
+             date_to: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Сохранённый отчёт за день (или за период day - date_to) или None"""
+        try:
+            with open(self._path(organization_id, report, day, date_to), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Ошибка чтения отчёта {report} за {day}: {e}")
+            return None
+
+    def save(self, organization_id: str, report: str, day: date, data: Dict[str, Any],
+             date_to: Optional[date] = None) -> None:
+        """Атомарно сохраняет отчёт за день (или за период day - date_to)"""
+        path = self._path(organization_id, report, day, date_to)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def _merge_rows(rows: List[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+    """Суммирует orders/revenue строк с одинаковым ключом и пересчитывает percentage"""
+    merged: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        target = merged.get(row.get(key))
+        if target is None:
+            merged[row.get(key)] = {**row, "orders": row.get("orders", 0),
+                                    "revenue": row.get("revenue", 0.0)}
+        else:
+            target["orders"] += row.get("orders", 0)
+            target["revenue"] += row.get("revenue", 0.0)
+    total = sum(row["revenue"] for row in merged.values())
+    result = sorted(merged.values(), key=lambda row: row["revenue"], reverse=True)
+    for row in result:
+        row["percentage"] = round(row["revenue"] / total * 100, 1) if total else 0.0
+    return result
+
+
+def merge_sales_reports(reports: List[Dict[str, Any]], date_from: date,
+                        date_to: date) -> Dict[str, Any]:
+    """
+    Объединение дневных отчётов по продажам в отчёт за период
+
+    totalCustomers суммируется по дням, поэтому клиент, заказывавший
+    в разные дни, учитывается несколько раз.
+    """
+    orders = sum(report.get("summary", {}).get("totalOrders", 0) for report in reports)
+    revenue = sum(report.get("summary", {}).get("totalRevenue", 0.0) for report in reports)
+    customers = sum(report.get("summary", {}).get("totalCustomers", 0) for report in reports)
+    return {
+        "period": _period(date_from, date_to),
+        "summary": {
+            "totalOrders": orders,
+            "totalRevenue": revenue,
+            "averageOrderValue": revenue / orders if orders else 0.0,
+            "totalCustomers": customers,
+        },
+        "byCategory": _merge_rows([row for report in reports
+                                   for row in report.get("byCategory", [])], "category"),
+    }
+
+
+def _period(date_from: date, date_to: date) -> Dict[str, str]:
+    return {"from": f"{date_from.isoformat()}T00:00:00.000Z",
+            "to": f"{date_to.isoformat()}T23:59:59.000Z"}
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationError(f"Неверный формат даты: {value} (ожидается YYYY-MM-DD)")
+
+
+class IikoCachedReportsClient(IikoReportsClient):
+    """
+    Клиент отчётов с локальным хранилищем закрытых дней
+
+    Отчёт по продажам за период собирается из дневных отчётов: закрытые дни
+    читаются из ReportStore (и при отсутствии один раз загружаются из API),
+    текущий день всегда запрашивается из API. Отчёт по товарам за закрытый
+    период сохраняется целиком.
+    """
+
+    def __init__(self, base_url: str, api_key: str, organization_id: str, store: ReportStore,
+                 utc_offset: float = 3.0, max_workers: int = 4, **options):
+        """
+        Args:
+            base_url: Базовый URL API
+            api_key: API ключ
+            organization_id: ID организации
+            store: Хранилище дневных отчётов
+            utc_offset: Смещение местного времени организации от UTC в часах,
+                        по нему определяется текущий (открытый) день
+            max_workers: Максимум одновременных запросов отсутствующих дней
+        """
+        super().__init__(base_url, api_key, organization_id, **options)
+        self.store = store
+        self.utc_offset = utc_offset
+        self.max_workers = max_workers
+
+    def _today(self) -> date:
+        return (datetime.now(timezone.utc) + timedelta(hours=self.utc_offset)).date()
+
+    def _daily_reports(self, report: str, fetch: Callable[[str, str], Dict[str, Any]],
+                       date_from: date, date_to: date) -> List[Dict[str, Any]]:
+        today = self._today()
+        days = [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+        reports = {day: self.store.load(self.organization_id, report, day)
+                   for day in days if day < today}
+        missing = [day for day in days if reports.get(day) is None]
+
+        def load(day: date) -> Dict[str, Any]:
+            data = fetch(day.isoformat(), day.isoformat())
+            if day < today:
+                self.store.save(self.organization_id, report, day, data)
+            return data
+
+        reports.update(zip(missing, adaptive_map(load, missing, max_workers=self.max_workers)))
+        return [reports[day] for day in days]
+
+    def get_sales_report(self, date_from: Optional[str] = None,
+                         date_to: Optional[str] = None,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Получение отчёта по продажам с использованием сохранённых дней
+
+        Документация: https://api-ru.iiko.services/#operation/GetSalesReport
+
+        Args:
+            date_from: Дата начала периода (формат: YYYY-MM-DD)
+            date_to: Дата окончания периода (формат: YYYY-MM-DD)
+            timeout: Общий лимит времени на все дни периода, секунд (None - без ограничения)
+
+        Returns:
+            Отчёт по продажам
+        """
+        if not date_from or not date_to:
+            return super().get_sales_report(date_from, date_to, timeout=timeout)
+        start, end = _parse_date(date_from), _parse_date(date_to)
+        fetch = super().get_sales_report
+        with deadline(timeout):
+            return merge_sales_reports(self._daily_reports(SALES_REPORT, fetch, start, end), start, end)
+
+    def get_products_report(self, date_from: Optional[str] = None,
+                            date_to: Optional[str] = None,
+                            timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Получение отчёта по товарам с сохранением закрытых периодов
+
+        Документация: https://api-ru.iiko.services/#operation/GetProductsReport
+
+        Отчёт запрашивается за весь период одним вызовом; отчёт за период,
+        закончившийся до текущего дня, сохраняется и больше не запрашивается.
+
+        Args:
+            date_from: Дата начала периода (формат: YYYY-MM-DD)
+            date_to: Дата окончания периода (формат: YYYY-MM-DD)
+            timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+
+        Returns:
+            Отчёт по товарам
+        """
+        if not date_from or not date_to:
+            return super().get_products_report(date_from, date_to, timeout=timeout)
+        start, end = _parse_date(date_from), _parse_date(date_to)
+        closed = end < self._today()
+        if closed:
+            data = self.store.load(self.organization_id, PRODUCTS_REPORT, start, end)
+            if data is not None:
+                return data
+        data = super().get_products_report(date_from, date_to, timeout=timeout)
+        if closed:
+            self.store.save(self.organization_id, PRODUCTS_REPORT, start, data, end)
+        return data
@@ -0,0 +1,329 @@
+"""
+Индекс доступности столов для резервирования iiko
+Документация: https://api-ru.iiko.services/#operation/GetReserves
+
+Столы и зоны загружаются один раз, резервы хранятся в отсортированных
+по времени начала списках отдельно для каждого стола. Вопрос "есть ли
+стол на 4 гостей в 19:30 в зоне X" решается локально двоичным поиском
+без обращений к API. Создание, изменение и отмена резервов через индекс
+обновляют его инкрементально; изменения, сделанные во время полной
+загрузки, повторно применяются к загруженному индексу.
+
+Резервы, стол которых не удалось определить по tableId/tableName, не
+занимают ни один стол - их нужно проверять отдельно через
+unresolved_reserves().
+"""
+
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import logging
+
+from iiko_api_oop import IikoReservesClient, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Длительность резерва по умолчанию, минут (API не возвращает длительность)
+DEFAULT_RESERVE_DURATION = 120
+
+# Статусы резервов, не занимающих стол
+INACTIVE_RESERVE_STATUSES = frozenset({"Cancelled", "Closed"})
+
+TimeValue = Union[str, datetime, float, int]
+
+
+def _to_timestamp(value: TimeValue) -> float:
+    """
+    Время в секундах UTC
+
+    Args:
+        value: ISO строка (2024-01-20T19:00:00.000Z), datetime (без часового
+               пояса считается UTC) или число секунд
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise ValidationError(f"Неверный формат времени: {value}")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class _Timeline:
+    """Резервы одного стола, отсортированные по времени начала"""
+
+    __slots__ = ("starts", "entries", "max_duration")
+
+    def __init__(self):
+        self.starts: List[float] = []
+        self.entries: List[Tuple[float, float, str]] = []
+        self.max_duration = 0.0
+
+    def add(self, start: float, end: float, reserve_id: str) -> None:
+        index = bisect_left(self.entries, (start, end, reserve_id))
+        self.entries.insert(index, (start, end, reserve_id))
+        self.starts.insert(index, start)
+        self.max_duration = max(self.max_duration, end - start)
+
+    def remove(self, start: float, reserve_id: str) -> None:
+        index = bisect_left(self.starts, start)
+        while index < len(self.starts) and self.starts[index] == start:
+            if self.entries[index][2] == reserve_id:
+                del self.starts[index]
+                del self.entries[index]
+                return
+            index += 1
+
+    def overlapping(self, start: float, end: float) -> Iterator[str]:
+        """ID резервов, пересекающихся с интервалом [start, end)"""
+        # Резервы, начавшиеся раньше start - max_duration, закончились до start
+        index = bisect_left(self.starts, start - self.max_duration)
+        while index < len(self.starts) and self.starts[index] < end:
+            if self.entries[index][1] > start:
+                yield self.entries[index][2]
+            index += 1
+
+    def overlaps(self, start: float, end: float) -> bool:
+        """Есть ли резерв, пересекающийся с интервалом [start, end)"""
+        return next(self.overlapping(start, end), None) is not None
+
+
+class ReservationIndex:
+    """
+    Локальный индекс столов, зон и резервов организации
+
+    Пример:
+        index = ReservationIndex(client.reserves)
+        index.load(date_from="2024-01-20", date_to="2024-01-21")
+        tables = index.available_tables("2024-01-20T19:30:00Z", guests=4, zone="Основной зал")
+    """
+
+    def __init__(self, client: IikoReservesClient, duration_minutes: int = DEFAULT_RESERVE_DURATION):
+        """
+        Args:
+            client: Клиент резервов организации
+            duration_minutes: Длительность резерва по умолчанию, минут
+        """
+        self.client = client
+        self.duration = duration_minutes * 60
+        self._lock = threading.RLock()
+        self._tables: Dict[str, Dict[str, Any]] = {}
+        self._table_ids_by_name: Dict[str, str] = {}
+        self._zones: Dict[str, Dict[str, Any]] = {}
+        self._zone_ids_by_name: Dict[str, str] = {}
+        self._zone_tables: Dict[str, List[str]] = {}
+        self._timelines: Dict[str, _Timeline] = {}
+        self._unresolved = _Timeline()
+        self._reserves: Dict[str, Tuple[Dict[str, Any], Optional[str], float]] = {}
+        # Изменения резервов во время выполняющихся загрузок: ("add", резерв) или ("remove", ID)
+        self._loads = 0
+        self._writes: List[Tuple[str, Any]] = []
+
+    def load(self, tables: Optional[Iterable[Dict[str, Any]]] = None,
+             zones: Optional[Iterable[Dict[str, Any]]] = None,
+             reserves: Optional[Iterable[Dict[str, Any]]] = None,
+             date_from: Optional[str] = None, date_to: Optional[str] = None) -> int:
+        """
+        Полная перестройка индекса
+
+        Args:
+            tables: Список столов (если не указан, загружается из API)
+            zones: Список зон (если не указан, загружается из API)
+            reserves: Список резервов (если не указан, загружается из API за период)
+            date_from: Дата начала периода резервов (формат: YYYY-MM-DD)
+            date_to: Дата окончания периода резервов (формат: YYYY-MM-DD)
+
+        Returns:
+            Количество резервов в индексе
+        """
+        with self._lock:
+            self._loads += 1
+            start = len(self._writes)
+        try:
+            tables = list(self.client.get_tables() if tables is None else tables)
+            zones = list(self.client.get_zones() if zones is None else zones)
+            reserves = list(self.client.get_reserves(date_from, date_to)
+                            if reserves is None else reserves)
+            return self._rebuild(tables, zones, reserves, start)
+        finally:
+            with self._lock:
+                self._loads -= 1
+                if not self._loads:
+                    self._writes.clear()
+
+    def _rebuild(self, tables: List[Dict[str, Any]], zones: List[Dict[str, Any]],
+                 reserves: List[Dict[str, Any]], start: int) -> int:
+        """Перестройка индекса с повторным применением изменений журнала начиная с start"""
+        with self._lock:
+            self._tables = {table["id"]: table for table in tables if table.get("isActive", True)}
+            self._table_ids_by_name = {table.get("name"): table_id
+                                       for table_id, table in self._tables.items()}
+            self._zones = {zone["id"]: zone for zone in zones}
+            self._zone_ids_by_name = {zone.get("name", "").lower(): zone_id
+                                      for zone_id, zone in self._zones.items()}
+            self._zone_tables = {}
+            for table_id, table in self._tables.items():
+                self._zone_tables.setdefault(table.get("zoneId"), []).append(table_id)
+                name = table.get("zoneName")
+                if name and table.get("zoneId"):
+                    self._zone_ids_by_name.setdefault(name.lower(), table["zoneId"])
+            self._timelines = {table_id: _Timeline() for table_id in self._tables}
+            self._unresolved = _Timeline()
+            self._reserves = {}
+            for reserve in reserves:
+                self._add(reserve)
+            for operation, value in self._writes[start:]:
+                if operation == "add":
+                    self._add(value)
+                else:
+                    self._remove(value)
+            if self._unresolved.entries:
+                logger.warning(f"Резервов с неизвестным столом: {len(self._unresolved.entries)}")
+            logger.info(f"Индекс резервов загружен: столов {len(self._tables)}, "
+                        f"резервов {len(self._reserves)}")
+            return len(self._reserves)
+
+    def __len__(self) -> int:
+        return len(self._reserves)
+
+    def _table_id(self, reserve: Dict[str, Any]) -> Optional[str]:
+        table_id = reserve.get("tableId")
+        if table_id:
+            return table_id
+        # В списке резервов API указывает только название стола
+        return self._table_ids_by_name.get(reserve.get("tableName"))
+
+    def _interval(self, start: TimeValue, duration_minutes: Optional[int]) -> Tuple[float, float]:
+        begin = _to_timestamp(start)
+        duration = self.duration if duration_minutes is None else duration_minutes * 60
+        return begin, begin + duration
+
+    def add_reserve(self, reserve: Dict[str, Any]) -> None:
+        """Добавляет или заменяет резерв в индексе (без обращения к API)"""
+        with self._lock:
+            self._add(reserve)
+            if self._loads:
+                self._writes.append(("add", reserve))
+
+    def remove_reserve(self, reserve_id: str) -> Optional[Dict[str, Any]]:
+        """Удаляет резерв из индекса (без обращения к API)"""
+        with self._lock:
+            if self._loads:
+                self._writes.append(("remove", reserve_id))
+            return self._remove(reserve_id)
+
+    def _add(self, reserve: Dict[str, Any]) -> None:
+        self._remove(reserve["id"])
+        if reserve.get("status") in INACTIVE_RESERVE_STATUSES:
+            return
+        table_id = self._table_id(reserve)
+        start, end = self._interval(reserve["reservationDate"], reserve.get("durationInMinutes"))
+        self._reserves[reserve["id"]] = (reserve, table_id, start)
+        if table_id in self._timelines:
+            self._timelines[table_id].add(start, end, reserve["id"])
+        else:
+            logger.warning(f"Резерв {reserve['id']} ссылается на неизвестный стол "
+                           f"{reserve.get('tableId') or reserve.get('tableName')}")
+            self._unresolved.add(start, end, reserve["id"])
+
+    def _remove(self, reserve_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._reserves.pop(reserve_id, None)
+        if entry is None:
+            return None
+        reserve, table_id, start = entry
+        self._timelines.get(table_id, self._unresolved).remove(start, reserve_id)
+        return reserve
+
+    def get_reserve(self, reserve_id: str) -> Optional[Dict[str, Any]]:
+        """Резерв из индекса или None"""
+        entry = self._reserves.get(reserve_id)
+        return entry[0] if entry else None
+
+    def unresolved_reserves(self, start: Optional[TimeValue] = None,
+                            duration_minutes: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Резервы, стол которых не найден среди активных столов
+
+        Такие резервы не учитываются в is_available() и available_tables();
+        если они пересекаются с запрошенным временем, ответ о свободных
+        столах может быть неверным.
+
+        Args:
+            start: Только резервы, пересекающиеся с периодом от start (по умолчанию - все)
+            duration_minutes: Длительность периода, минут (по умолчанию - длительность индекса)
+        """
+        with self._lock:
+            if start is None:
+                reserve_ids = [entry[2] for entry in self._unresolved.entries]
+            else:
+                reserve_ids = list(self._unresolved.overlapping(*self._interval(start, duration_minutes)))
+            return [self._reserves[reserve_id][0] for reserve_id in reserve_ids]
+
+    def _zone_id(self, zone: str) -> str:
+        if zone in self._zones or zone in self._zone_tables:
+            return zone
+        zone_id = self._zone_ids_by_name.get(zone.lower())
+        if zone_id is None:
+            raise ValidationError(f"Неизвестная зона: {zone}")
+        return zone_id
+
+    def is_available(self, table_id: str, start: TimeValue,
+                     duration_minutes: Optional[int] = None) -> bool:
+        """
+        Свободен ли стол в указанный период
+
+        Args:
+            table_id: ID стола
+            start: Время начала
+            duration_minutes: Длительность, минут (по умолчанию - длительность индекса)
+        """
+        begin, end = self._interval(start, duration_minutes)
+        with self._lock:
+            timeline = self._timelines.get(table_id)
+            return timeline is not None and not timeline.overlaps(begin, end)
+
+    def available_tables(self, start: TimeValue, guests: int = 1, zone: Optional[str] = None,
+                         duration_minutes: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Свободные столы на указанное время
+
+        Args:
+            start: Время начала
+            guests: Количество гостей
+            zone: ID или название зоны
+            duration_minutes: Длительность, минут (по умолчанию - длительность индекса)
+
+        Returns:
+            Подходящие столы, от наименьшего по числу мест (резервы с неизвестным
+            столом не учитываются, см. unresolved_reserves())
+        """
+        begin, end = self._interval(start, duration_minutes)
+        with self._lock:
+            table_ids = self._zone_tables.get(self._zone_id(zone), []) if zone else self._tables
+            tables = [self._tables[table_id] for table_id in table_ids
+                      if self._tables[table_id].get("seatsCount", 0) >= guests
+                      and not self._timelines[table_id].overlaps(begin, end)]
+        return sorted(tables, key=lambda table: table.get("seatsCount", 0))
+
+    def create_reserve(self, reserve_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Создаёт резерв через API и добавляет его в индекс"""
+        result = self.client.create_reserve(reserve_data)
+        self.add_reserve({**reserve_data, **result})
+        return result
+
+    def update_reserve(self, reserve_id: str, reserve_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Обновляет резерв через API и в индексе"""
+        result = self.client.update_reserve(reserve_id, reserve_data)
+        previous = self.get_reserve(reserve_id) or {}
+        self.add_reserve({**previous, **reserve_data, **result, "id": reserve_id})
+        return result
+
+    def cancel_reserve(self, reserve_id: str) -> bool:
+        """Отменяет резерв через API и удаляет его из индекса"""
+        result = self.client.cancel_reserve(reserve_id)
+        self.remove_reserve(reserve_id)
+        return result
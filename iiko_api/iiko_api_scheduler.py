@@ -0,0 +1,236 @@
+"""
+Планировщик запросов к API iiko с классами приоритета
+Документация: https://api-ru.iiko.services
+
+ScheduledTransport оборачивает HTTP транспорт (RequestsTransport,
+Http2Transport или requests.Session) и распределяет запросы по классам:
+
+- critical - запись (create_order, create_payment и другие не-GET запросы)
+- interactive - чтение для пользовательских сценариев
+- background - отчёты и массовая выгрузка (get_sales_report, get_customers, ...)
+
+У каждого класса свой лимит одновременных запросов, поэтому длинные
+отчёты не занимают соединения, нужные оформлению заказа. Если задан
+ограничитель частоты (RateLimiter), свободные токены выдаются ожидающим
+запросам по взвешенной справедливой очереди (WFQ): при нехватке токенов
+запись получает их в несколько раз чаще фоновых запросов.
+
+Пример:
+    transport = ScheduledTransport(RequestsTransport(), rate_limiter=RateLimiter(rate=20))
+    client = IikoMainClient(api_key, organization_id, transport=transport)
+    with request_priority(BACKGROUND):
+        customers = client.customers.get_customers()
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+import logging
+
+from iiko_api_deadline import DeadlineExceeded, current_deadline
+
+logger = logging.getLogger(__name__)
+
+CRITICAL = "critical"
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+DEFAULT_CONCURRENCY = {CRITICAL: 8, INTERACTIVE: 8, BACKGROUND: 2}
+DEFAULT_WEIGHTS = {CRITICAL: 8.0, INTERACTIVE: 4.0, BACKGROUND: 1.0}
+
+# GET эндпоинты массовой выгрузки; все отчёты (/api/1/reports/...) - тоже фоновые
+BACKGROUND_ENDPOINTS = frozenset({"/api/1/customers", "/api/1/stock", "/api/1/payments"})
+
+_PRIORITY: ContextVar[Optional[str]] = ContextVar("iiko_request_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority: str) -> Iterator[None]:
+    """Задаёт класс приоритета для всех запросов внутри блока (в текущем потоке или задаче)"""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def classify(method: str, url: str) -> str:
+    """Класс приоритета запроса по методу и пути"""
+    if method.upper() != "GET":
+        return CRITICAL
+    path = urlsplit(url).path
+    if path in BACKGROUND_ENDPOINTS or path.startswith("/api/1/reports/"):
+        return BACKGROUND
+    return INTERACTIVE
+
+
+class RateLimiter:
+    """Ограничитель частоты запросов (token bucket)"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Args:
+            rate: Допустимое число запросов в секунду
+            burst: Максимальный запас токенов (по умолчанию - rate)
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Забирает токены, если они есть"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Время до появления указанного числа токенов, секунд"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Ожидает и забирает токены. Возвращает False по истечении timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire(tokens):
+            delay = self.wait_time(tokens)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(delay)
+        return True
+
+
+class ScheduledTransport:
+    """HTTP транспорт с классами приоритета, пулами по классам и WFQ по токенам частоты"""
+
+    def __init__(self, transport: Any, rate_limiter: Optional[RateLimiter] = None,
+                 concurrency: Optional[Dict[str, int]] = None,
+                 weights: Optional[Dict[str, float]] = None,
+                 classifier: Callable[[str, str], str] = classify):
+        """
+        Args:
+            transport: Оборачиваемый транспорт (метод request() как у requests.Session)
+            rate_limiter: Общий ограничитель частоты запросов
+            concurrency: Лимит одновременных запросов по классам
+            weights: Веса классов в справедливой очереди (обязательны для новых классов)
+            classifier: Функция (method, url) -> класс приоритета
+
+        Raises:
+            ValueError: Если для класса из concurrency не задан положительный вес
+        """
+        self.transport = transport
+        self.rate_limiter = rate_limiter
+        self.concurrency = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        invalid = sorted(name for name in self.concurrency if not self.weights.get(name, 0) > 0)
+        if invalid:
+            raise ValueError(f"Не задан положительный вес для классов приоритета: {', '.join(invalid)}")
+        self.classifier = classifier
+        self._pools = {name: threading.BoundedSemaphore(limit)
+                       for name, limit in self.concurrency.items()}
+        self._condition = threading.Condition()
+        self._queue: list = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish = {name: 0.0 for name in self.concurrency}
+        self._stats = {name: {"requests": 0, "queued": 0, "waitSeconds": 0.0, "maxWaitSeconds": 0.0}
+                       for name in self.concurrency}
+
+    @property
+    def session(self) -> Any:
+        """Сессия requests оборачиваемого транспорта (если есть)"""
+        return getattr(self.transport, "session", None)
+
+    def _wait_for_token(self, priority: str) -> None:
+        """
+        Ожидание очереди и токена частоты по взвешенной справедливой очереди
+
+        Raises:
+            DeadlineExceeded: Если срок текущего вызова истёк в очереди
+        """
+        budget = current_deadline()
+        with self._condition:
+            finish = max(self._virtual_time, self._last_finish[priority]) + 1.0 / self.weights[priority]
+            self._last_finish[priority] = finish
+            entry = (finish, next(self._sequence))
+            heapq.heappush(self._queue, entry)
+            self._stats[priority]["queued"] += 1
+            while True:
+                if self._queue[0] == entry and (self.rate_limiter is None
+                                                or self.rate_limiter.try_acquire()):
+                    heapq.heappop(self._queue)
+                    self._stats[priority]["queued"] -= 1
+                    self._virtual_time = finish
+                    self._condition.notify_all()
+                    return
+                if budget is not None and budget.expired:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._stats[priority]["queued"] -= 1
+                    self._condition.notify_all()
+                    raise DeadlineExceeded(f"Истёк срок выполнения: очередь класса {priority}")
+                delay = self.rate_limiter.wait_time() if self.rate_limiter else None
+                delay = delay or 0.05
+                if budget is not None:
+                    delay = min(delay, budget.remaining())
+                self._condition.wait(timeout=delay)
+
+    def request(self, method: str, url: str, **kwargs) -> Any:
+        """
+        Выполняет HTTP запрос с учётом класса приоритета
+
+        Ожидание места в пуле класса и токена частоты ограничено сроком
+        текущего вызова (deadline).
+
+        Raises:
+            DeadlineExceeded: Если срок вызова истёк до отправки запроса
+        """
+        priority = _PRIORITY.get() or self.classifier(method, url)
+        if priority not in self._pools:
+            raise ValueError(f"Неизвестный класс приоритета: {priority}")
+        started = time.monotonic()
+        pool = self._pools[priority]
+        budget = current_deadline()
+        if not pool.acquire(timeout=None if budget is None else budget.remaining()):
+            raise DeadlineExceeded(f"Истёк срок выполнения: пул класса {priority}")
+        try:
+            self._wait_for_token(priority)
+            waited = time.monotonic() - started
+            with self._condition:
+                stats = self._stats[priority]
+                stats["requests"] += 1
+                stats["waitSeconds"] += waited
+                stats["maxWaitSeconds"] = max(stats["maxWaitSeconds"], waited)
+            return self.transport.request(method, url, **kwargs)
+        finally:
+            pool.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика оборачиваемого транспорта и ожидания по классам"""
+        inner = self.transport.stats() if hasattr(self.transport, "stats") else {}
+        with self._condition:
+            classes = {name: dict(stats) for name, stats in self._stats.items()}
+        return {**inner, "classes": classes}
+
+    def close(self) -> None:
+        """Закрывает оборачиваемый транспорт"""
+        if hasattr(self.transport, "close"):
+            self.transport.close()
@@ -0,0 +1,256 @@
+"""
+Снимки складских остатков iiko
+Документация: https://api-ru.iiko.services/#operation/GetStock
+
+Строки get_stock() загружаются в столбцовые массивы NumPy, проиндексированные
+по организации, складу и товару. Проверки остатков по всей сети (ниже минимума,
+заполненность, объём дозаказа, итоги по складам, разница между снимками)
+выполняются векторно, без циклов по строкам.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _vocabulary(values: Sequence[Optional[str]]) -> Tuple[List[Optional[str]], np.ndarray]:
+    """Кодирует строки номерами: (словарь, массив номеров)"""
+    index: Dict[Optional[str], int] = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values),
+                        dtype=np.int32, count=len(values))
+    return list(index), codes
+
+
+def _float_column(rows: Sequence[Dict[str, Any]], key: str) -> np.ndarray:
+    """Числовой столбец, отсутствующие значения - NaN"""
+    return np.fromiter((np.nan if row.get(key) is None else row[key] for row in rows),
+                       dtype=np.float64, count=len(rows))
+
+
+class StockSnapshot:
+    """
+    Снимок остатков товаров по складам одной или нескольких организаций
+
+    Каждая строка снимка - пара (склад, товар) организации. Идентификаторы
+    хранятся в словарях organization_ids / warehouse_ids / product_ids,
+    а столбцы содержат номера в этих словарях.
+    """
+
+    def __init__(self, organization_ids: List[Optional[str]], warehouse_ids: List[Optional[str]],
+                 product_ids: List[Optional[str]], organization: np.ndarray, warehouse: np.ndarray,
+                 product: np.ndarray, amount: np.ndarray, min_amount: np.ndarray,
+                 max_amount: np.ndarray, taken_at: Optional[datetime] = None,
+                 names: Optional[Dict[str, str]] = None):
+        self.organization_ids = organization_ids
+        self.warehouse_ids = warehouse_ids
+        self.product_ids = product_ids
+        self.organization = organization
+        self.warehouse = warehouse
+        self.product = product
+        self.amount = amount
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.taken_at = taken_at or datetime.now()
+        self.names = names or {}
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]], organization_id: Optional[str] = None,
+                  taken_at: Optional[datetime] = None) -> "StockSnapshot":
+        """
+        Создание снимка из строк get_stock()
+
+        Args:
+            rows: Строки остатков (productId, warehouseId, amount, minAmount, maxAmount)
+            organization_id: ID организации, которой принадлежат строки
+            taken_at: Время снимка (по умолчанию - текущее)
+
+        Returns:
+            Снимок остатков
+        """
+        rows = list(rows)
+        organization_ids, organization = _vocabulary([row.get("organizationId", organization_id)
+                                                      for row in rows])
+        warehouse_ids, warehouse = _vocabulary([row.get("warehouseId") for row in rows])
+        product_ids, product = _vocabulary([row.get("productId") for row in rows])
+
+        names: Dict[str, str] = {}
+        for row in rows:
+            if row.get("productName"):
+                names[row["productId"]] = row["productName"]
+            if row.get("warehouseName"):
+                names[row["warehouseId"]] = row["warehouseName"]
+
+        amount = _float_column(rows, "amount")
+        return cls(organization_ids, warehouse_ids, product_ids, organization, warehouse, product,
+                   np.nan_to_num(amount, nan=0.0), _float_column(rows, "minAmount"),
+                   _float_column(rows, "maxAmount"), taken_at, names)
+
+    @classmethod
+    def fetch(cls, organization_ids: Sequence[str],
+              warehouse_id: Optional[str] = None) -> "StockSnapshot":
+        """
+        Загрузка снимка через API для нескольких организаций
+
+        Args:
+            organization_ids: Список ID организаций
+            warehouse_id: ID склада (если не указан - все склады)
+
+        Returns:
+            Снимок остатков по всем организациям
+        """
+        from iiko_api_wrapper import get_stock
+
+        rows = []
+        for organization_id in organization_ids:
+            rows.extend({**row, "organizationId": organization_id}
+                        for row in get_stock(organization_id, warehouse_id))
+        return cls.from_rows(rows)
+
+    @classmethod
+    def concat(cls, snapshots: Sequence["StockSnapshot"]) -> "StockSnapshot":
+        """Объединение нескольких снимков (например, по разным организациям) в один"""
+        rows = [row for snapshot in snapshots for row in snapshot.rows()]
+        taken_at = min((snapshot.taken_at for snapshot in snapshots), default=None)
+        return cls.from_rows(rows, taken_at=taken_at)
+
+    # ==================== ЗАПРОСЫ ====================
+
+    def below_min(self) -> np.ndarray:
+        """Маска строк с остатком ниже минимального"""
+        return self.amount < np.nan_to_num(self.min_amount, nan=-np.inf)
+
+    def fill_ratio(self) -> np.ndarray:
+        """Заполненность склада относительно максимума (NaN, если максимум не задан)"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.max_amount > 0, self.amount / self.max_amount, np.nan)
+
+    def reorder_quantity(self, only_below_min: bool = True) -> np.ndarray:
+        """
+        Количество для дозаказа до максимального остатка
+
+        Args:
+            only_below_min: Считать дозаказ только для строк ниже минимума
+
+        Returns:
+            Массив количеств (0 там, где дозаказ не нужен или максимум не задан)
+        """
+        quantity = np.nan_to_num(self.max_amount - self.amount, nan=0.0).clip(min=0.0)
+        if only_below_min:
+            quantity = np.where(self.below_min(), quantity, 0.0)
+        return quantity
+
+    def warehouse_totals(self) -> Dict[Tuple[Optional[str], Optional[str]], float]:
+        """Суммарный остаток по каждому складу: (ID организации, ID склада) -> количество"""
+        keys = self.organization.astype(np.int64) * len(self.warehouse_ids) + self.warehouse
+        unique, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=self.amount, minlength=len(unique))
+        return {
+            (self.organization_ids[key // len(self.warehouse_ids)],
+             self.warehouse_ids[key % len(self.warehouse_ids)]): float(total)
+            for key, total in zip(unique.tolist(), totals)
+        }
+
+    def product_totals(self) -> Dict[Optional[str], float]:
+        """Суммарный остаток каждого товара по всем складам"""
+        totals = np.bincount(self.product, weights=self.amount, minlength=len(self.product_ids))
+        return dict(zip(self.product_ids, totals.tolist()))
+
+    def low_stock(self) -> List[Dict[str, Any]]:
+        """Строки ниже минимума с рассчитанным количеством дозаказа"""
+        mask = self.below_min()
+        reorder = self.reorder_quantity()[mask]
+        return [{**row, "reorderAmount": float(quantity)}
+                for row, quantity in zip(self.rows(mask), reorder)]
+
+    def rows(self, mask: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Преобразование строк снимка обратно в словари
+
+        Args:
+            mask: Булева маска или массив номеров строк (по умолчанию - все строки)
+        """
+        positions = np.arange(len(self)) if mask is None else np.arange(len(self))[mask]
+        result = []
+        for i in positions.tolist():
+            product_id = self.product_ids[self.product[i]]
+            warehouse_id = self.warehouse_ids[self.warehouse[i]]
+            row = {
+                "organizationId": self.organization_ids[self.organization[i]],
+                "productId": product_id,
+                "warehouseId": warehouse_id,
+                "amount": float(self.amount[i]),
+                "minAmount": None if np.isnan(self.min_amount[i]) else float(self.min_amount[i]),
+                "maxAmount": None if np.isnan(self.max_amount[i]) else float(self.max_amount[i]),
+            }
+            if product_id in self.names:
+                row["productName"] = self.names[product_id]
+            if warehouse_id in self.names:
+                row["warehouseName"] = self.names[warehouse_id]
+            result.append(row)
+        return result
+
+    # ==================== СРАВНЕНИЕ СНИМКОВ ====================
+
+    def _row_keys(self, organization_ids: Dict[Optional[str], int],
+                  warehouse_ids: Dict[Optional[str], int],
+                  product_ids: Dict[Optional[str], int]) -> np.ndarray:
+        """Ключи строк в общих словарях двух снимков"""
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+        org_map = np.array([organization_ids[i] for i in self.organization_ids], dtype=np.int64)
+        warehouse_map = np.array([warehouse_ids[i] for i in self.warehouse_ids], dtype=np.int64)
+        product_map = np.array([product_ids[i] for i in self.product_ids], dtype=np.int64)
+        keys = org_map[self.organization] * len(warehouse_ids) + warehouse_map[self.warehouse]
+        return keys * len(product_ids) + product_map[self.product]
+
+    def diff(self, previous: "StockSnapshot") -> Dict[str, Any]:
+        """
+        Изменения остатков относительно предыдущего снимка
+
+        Args:
+            previous: Более ранний снимок
+
+        Returns:
+            Словарь со списками added (новые строки), removed (исчезнувшие строки)
+            и changed (строки с изменившимся остатком, поле delta - изменение)
+        """
+        organization_ids: Dict[Optional[str], int] = {}
+        warehouse_ids: Dict[Optional[str], int] = {}
+        product_ids: Dict[Optional[str], int] = {}
+        for snapshot in (previous, self):
+            for value in snapshot.organization_ids:
+                organization_ids.setdefault(value, len(organization_ids))
+            for value in snapshot.warehouse_ids:
+                warehouse_ids.setdefault(value, len(warehouse_ids))
+            for value in snapshot.product_ids:
+                product_ids.setdefault(value, len(product_ids))
+
+        current_keys = self._row_keys(organization_ids, warehouse_ids, product_ids)
+        previous_keys = previous._row_keys(organization_ids, warehouse_ids, product_ids)
+
+        _, current_pos, previous_pos = np.intersect1d(current_keys, previous_keys,
+                                                      assume_unique=False, return_indices=True)
+        delta = self.amount[current_pos] - previous.amount[previous_pos]
+        changed = delta != 0
+
+        added = ~np.isin(current_keys, previous_keys)
+        removed = ~np.isin(previous_keys, current_keys)
+
+        changed_rows = self.rows(current_pos[changed])
+        for row, value, before in zip(changed_rows, delta[changed].tolist(),
+                                      previous.amount[previous_pos[changed]].tolist()):
+            row["previousAmount"] = before
+            row["delta"] = value
+
+        return {
+            "added": self.rows(added),
+            "removed": previous.rows(removed),
+            "changed": changed_rows,
+        }
@@ -0,0 +1,144 @@
+"""
+Потоковый разбор JSON ответов API iiko
+Документация: https://api-ru.iiko.services
+
+Позволяет обрабатывать элементы больших списков (например, клиентов
+из ответа вида {"customers": [...]}) по мере получения тела ответа,
+не дожидаясь загрузки и разбора всего документа.
+"""
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Optional
+
+# Размер блока чтения тела ответа по умолчанию
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class _ChunkReader:
+    """Буфер текста, пополняемый блоками байтов из ответа"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self) -> bool:
+        """Читает следующий блок. Возвращает False, если данные закончились"""
+        if self.exhausted:
+            return False
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            text = self._decoder.decode(chunk)
+            if not text:
+                continue
+            # Сдвигаем буфер, чтобы он не рос на уже разобранных данных
+            if self.pos > len(self.buffer) // 2:
+                self.buffer = self.buffer[self.pos:]
+                self.pos = 0
+            self.buffer += text
+            return True
+        self.buffer += self._decoder.decode(b"", final=True)
+        self.exhausted = True
+        return False
+
+    def peek(self) -> str:
+        """Возвращает следующий значимый символ, пропуская пробелы"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("Неожиданный конец JSON ответа")
+
+    def expect(self, char: str) -> None:
+        """Проверяет и пропускает ожидаемый символ"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Неверный формат JSON: ожидался '{char}', получен '{found}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Разбирает одно JSON значение, при необходимости дочитывая данные"""
+        self.peek()
+        while True:
+            try:
+                result, end = self._json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # Число на границе блока могло быть прочитано не полностью
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return result
+
+
+def _iter_array(reader: _ChunkReader) -> Iterator[Any]:
+    """Выдаёт элементы JSON массива, начиная с открывающей скобки"""
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("]")
+        return
+
+
+def iter_json_array(chunks: Iterable[bytes], key: Optional[str] = None) -> Iterator[Any]:
+    """
+    Потоковый разбор JSON массива из последовательности блоков байтов
+
+    Элементы выдаются по одному по мере разбора, поэтому пиковое
+    потребление памяти ограничено размером одного элемента и блока.
+
+    Args:
+        chunks: Блоки тела ответа (например, response.iter_content())
+        key: Ключ массива в корневом объекте ({"customers": [...]}).
+             Если не указан, ожидается массив в корне документа
+
+    Returns:
+        Итератор по элементам массива
+
+    Raises:
+        ValueError: При неверном формате JSON
+    """
+    reader = _ChunkReader(chunks)
+
+    if key is None:
+        yield from _iter_array(reader)
+        return
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        if not isinstance(name, str):
+            raise ValueError("Неверный формат JSON: ожидался ключ объекта")
+        reader.expect(":")
+        if name == key:
+            if reader.peek() == "[":
+                yield from _iter_array(reader)
+            elif reader.value() is not None:
+                raise ValueError(f"Неверный формат JSON: значение '{key}' не является массивом")
+            return
+        # Прочие поля корневого объекта пропускаем
+        reader.value()
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("}")
+        return
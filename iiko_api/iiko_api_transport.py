@@ -0,0 +1,408 @@
+"""
+HTTP транспорты для клиентов API iiko
+Документация: https://api-ru.iiko.services
+
+- RequestsTransport - HTTP/1.1 через пул соединений requests.Session (по умолчанию)
+- Http2Transport - HTTP/2 через httpx: множество одновременных запросов
+  мультиплексируется в несколько соединений вместо сотен сокетов и TLS сессий.
+  Требует установки: pip install "httpx[http2]"
+
+Оба транспорта имеют одинаковый метод request() (как у requests.Session)
+и метод stats() со статистикой соединений и запросов.
+
+Первый запрос после запуска или простоя тратит время на DNS, TCP и TLS.
+warmup() заранее открывает соединения пула, start_keepalive() периодически
+обновляет их при простое. RequestsTransport(dns_cache=DNS_CACHE) разрешает
+имена через общий кэш DNS с временем жизни записей (по умолчанию кэш не
+используется): соединение пробует адреса хоста по очереди, как
+socket.create_connection.
+"""
+
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+try:
+    import httpx
+except ImportError:  # HTTP/2 транспорт необязателен
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+class _RequestCounter:
+    """Потокобезопасный счётчик запросов: всего, в работе и пиковое число одновременных"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.total += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.in_flight -= 1
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"requests": self.total, "inFlight": self.in_flight, "maxInFlight": self.max_in_flight}
+
+
+class DnsCache:
+    """Кэш разрешения имён хостов с временем жизни записей"""
+
+    def __init__(self, ttl: float = 300.0):
+        """
+        Args:
+            ttl: Время жизни записи, секунд
+        """
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def resolve_all(self, host: str, port: int) -> List[str]:
+        """
+        IP адреса хоста в порядке системного резолвера (из кэша или через резолвер)
+
+        Семейства адресов ограничиваются так же, как в urllib3 (allowed_gai_family).
+        """
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._stats["hits"] += 1
+                return list(entry[1])
+            self._stats["misses"] += 1
+        infos = socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, addresses)
+        return list(addresses)
+
+    def resolve(self, host: str, port: int) -> str:
+        """Первый IP адрес хоста (из кэша или через системный резолвер)"""
+        return self.resolve_all(host, port)[0]
+
+    def invalidate(self, host: str, port: Optional[int] = None) -> None:
+        """Удаляет записи хоста (например, после ошибки соединения)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == host
+                        and (port is None or key[1] == port)]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), **self._stats}
+
+
+# Общий кэш DNS процесса (подключается явно: RequestsTransport(dns_cache=DNS_CACHE))
+DNS_CACHE = DnsCache()
+
+
+class _CachedDnsConnectionMixin:
+    """Соединение urllib3, получающее адреса хоста из кэша DNS"""
+
+    dns_cache: DnsCache
+
+    def _new_conn(self):
+        host = self._dns_host
+        try:
+            addresses = self.dns_cache.resolve_all(host, self.port)
+        except OSError:
+            return super()._new_conn()
+        # Адреса пробуются по очереди, как в socket.create_connection. Адрес
+        # подставляется только на время установки TCP соединения: SNI и
+        # проверка сертификата используют исходное имя хоста
+        error = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError as e:  # в том числе NewConnectionError
+                    error = e
+        finally:
+            self._dns_host = host
+        self.dns_cache.invalidate(host, self.port)
+        raise error
+
+
+class DnsCachingAdapter(HTTPAdapter):
+    """Адаптер requests с разрешением имён через DnsCache"""
+
+    def __init__(self, dns_cache: DnsCache, **kwargs):
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        attributes = {"dns_cache": self.dns_cache}
+        http = type("CachedDnsHTTPConnection", (_CachedDnsConnectionMixin, HTTPConnection), attributes)
+        https = type("CachedDnsHTTPSConnection", (_CachedDnsConnectionMixin, HTTPSConnection), attributes)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("CachedDnsHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http}),
+            "https": type("CachedDnsHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": https}),
+        }
+
+
+class _KeepAlive:
+    """Фоновое обновление соединений пула при простое транспорта"""
+
+    def __init__(self, transport: Any, url: str, interval: float, connections: int):
+        self.transport = transport
+        self.url = url
+        self.interval = interval
+        self.connections = connections
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="iiko-keepalive", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            if time.monotonic() - self.transport.last_request_at < self.interval:
+                continue
+            try:
+                self.transport.warmup(self.url, self.connections, timeout=self.interval / 2)
+            except Exception as e:
+                logger.debug(f"Ошибка обновления соединений: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class _WarmupMixin:
+    """Прогрев и поддержание соединений пула (для транспортов с методом request())"""
+
+    last_request_at = 0.0
+    _keepalive: Optional[_KeepAlive] = None
+
+    def warmup(self, url: str, connections: int = 4, timeout: float = 10.0) -> int:
+        """
+        Открывает соединения пула заранее
+
+        Разрешает имя хоста через кэш DNS (если он используется) и выполняет
+        connections одновременных запросов HEAD к url: каждый занимает
+        отдельное соединение, которое затем остаётся в пуле.
+
+        Args:
+            url: Адрес API (например, https://api-ru.iiko.services)
+            connections: Число соединений
+            timeout: Таймаут каждого запроса, секунд
+
+        Returns:
+            Число успешно открытых соединений
+        """
+        dns_cache = getattr(self, "dns_cache", None)
+        if dns_cache is not None:
+            parts = urlsplit(url)
+            try:
+                dns_cache.resolve(parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+            except OSError as e:
+                logger.warning(f"Ошибка разрешения имени {parts.hostname}: {e}")
+
+        def open_connection(_: int) -> bool:
+            try:
+                response = self.request("HEAD", url, timeout=timeout)
+                response.close()
+                return True
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Ошибка прогрева соединения: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=max(1, connections)) as executor:
+            opened = sum(executor.map(open_connection, range(max(1, connections))))
+        logger.info(f"Прогрев соединений с {url}: {opened} из {connections}")
+        return opened
+
+    def start_keepalive(self, url: str, interval: float = 30.0, connections: int = 4) -> None:
+        """
+        Запускает фоновое обновление соединений
+
+        Если interval секунд не было запросов, выполняется warmup(), поэтому
+        соединения не закрываются сервером по простою.
+        """
+        self.stop_keepalive()
+        self._keepalive = _KeepAlive(self, url, interval, connections)
+
+    def stop_keepalive(self) -> None:
+        if self._keepalive is not None:
+            self._keepalive.stop()
+            self._keepalive = None
+
+
+class RequestsTransport(_WarmupMixin):
+    """HTTP/1.1 транспорт на основе requests.Session с пулом соединений"""
+
+    http_version = "HTTP/1.1"
+
+    def __init__(self, pool_maxsize: int = 10, session: Optional[requests.Session] = None,
+                 dns_cache: Optional[DnsCache] = None):
+        """
+        Args:
+            pool_maxsize: Максимальное число соединений в пуле на один хост
+            session: Готовая сессия requests (по умолчанию создаётся новая)
+            dns_cache: Кэш DNS для новой сессии, например общий DNS_CACHE
+                       (None - системный резолвер при каждом соединении)
+        """
+        self.session = session or requests.Session()
+        self.dns_cache = dns_cache if session is None else None
+        self.pool_maxsize = pool_maxsize if session is None else None
+        if session is None:
+            if dns_cache is not None:
+                adapter = DnsCachingAdapter(dns_cache, pool_maxsize=pool_maxsize)
+            else:
+                adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        self._counter = _RequestCounter()
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                json: Any = None, params: Optional[Dict] = None, stream: bool = False,
+                timeout: Any = None) -> requests.Response:
+        """Выполняет HTTP запрос"""
+        self.last_request_at = time.monotonic()
+        with self._counter:
+            return self.session.request(method, url, headers=headers, json=json, params=params,
+                                        stream=stream, timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика запросов и соединений пула"""
+        connections = 0
+        for adapter in set(self.session.adapters.values()):
+            manager = getattr(adapter, "poolmanager", None)
+            if manager is None:
+                continue
+            for key in manager.pools.keys():
+                pool = manager.pools.get(key)
+                connections += getattr(pool, "num_connections", 0) if pool else 0
+        stats = {"transport": self.http_version, "connections": connections,
+                 **self._counter.as_dict()}
+        if self.dns_cache is not None:
+            stats["dns"] = self.dns_cache.stats()
+        return stats
+
+    def close(self) -> None:
+        """Закрывает все соединения"""
+        self.stop_keepalive()
+        self.session.close()
+
+
+class _Http2Response:
+    """Ответ httpx с интерфейсом requests.Response, используемым клиентами"""
+
+    def __init__(self, response: "httpx.Response"):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.http_version = response.http_version
+
+    @property
+    def content(self) -> bytes:
+        return self._response.read()
+
+    @property
+    def text(self) -> str:
+        self._response.read()
+        return self._response.text
+
+    def json(self) -> Any:
+        self._response.read()
+        return self._response.json()
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.HTTPError as e:
+            raise _translate_error(e)
+
+    def close(self) -> None:
+        self._response.close()
+
+
+def _translate_error(error: Exception) -> requests.exceptions.RequestException:
+    """Преобразует ошибку httpx в соответствующее исключение requests"""
+    if isinstance(error, httpx.TimeoutException):
+        return requests.exceptions.Timeout(str(error))
+    return requests.exceptions.ConnectionError(str(error))
+
+
+class Http2Transport(_WarmupMixin):
+    """
+    HTTP/2 транспорт на основе httpx
+
+    Все одновременные запросы к одному хосту идут потоками (streams)
+    в небольшом числе соединений.
+    """
+
+    http_version = "HTTP/2"
+
+    def __init__(self, max_connections: int = 4, http1_fallback: bool = True):
+        """
+        Args:
+            max_connections: Максимальное число соединений
+            http1_fallback: Разрешить HTTP/1.1, если сервер не поддерживает HTTP/2
+                            (False - HTTP/2 без TLS согласования, для локальных заглушек)
+        """
+        if httpx is None:
+            raise ImportError('Для HTTP/2 транспорта установите httpx: pip install "httpx[http2]"')
+        self.client = httpx.Client(
+            http2=True, http1=http1_fallback,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+        self._counter = _RequestCounter()
+        self._versions: Dict[str, int] = {}
+        self._versions_lock = threading.Lock()
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                json: Any = None, params: Optional[Dict] = None, stream: bool = False,
+                timeout: Any = None) -> _Http2Response:
+        """Выполняет HTTP запрос"""
+        self.last_request_at = time.monotonic()
+        with self._counter:
+            try:
+                request = self.client.build_request(method, url, headers=headers, json=json,
+                                                    params=params, timeout=timeout)
+                response = self.client.send(request, stream=stream)
+            except httpx.HTTPError as e:
+                raise _translate_error(e)
+        with self._versions_lock:
+            self._versions[response.http_version] = self._versions.get(response.http_version, 0) + 1
+        return _Http2Response(response)
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика запросов, соединений и версий протокола ответов"""
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        connections = len(getattr(pool, "connections", ()))
+        return {"transport": self.http_version, "connections": connections,
+                "responsesByVersion": dict(self._versions), **self._counter.as_dict()}
+
+    def close(self) -> None:
+        """Закрывает все соединения"""
+        self.stop_keepalive()
+        self.client.close()
@@ -0,0 +1,184 @@
+"""
+Обновление сущностей iiko только изменёнными полями
+Документация: https://api-ru.iiko.services/#operation/UpdateOrder
+
+Функции update_order/update_customer/update_delivery/update_reserve
+отправляют переданный объект целиком, а вызывающий код обычно передаёт
+полученную ранее запись с одним изменённым полем. UpdateTracker хранит
+последнее известное состояние сущности на сервере, вычисляет изменённые
+поля верхнего уровня и, если изменений нет, не выполняет запрос.
+
+Эндпоинты обновления - PUT, и документация iiko не гарантирует, что
+частичное тело объединяется с сохранённым объектом, а не заменяет его.
+Поэтому по умолчанию отправляется полное состояние (последнее известное
+с изменениями); отправка только изменённых полей (partial=True) - для
+эндпоинтов, для которых слияние проверено.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+import logging
+
+from iiko_api_oop import (IikoCustomersClient, IikoDeliveriesClient, IikoOrdersClient,
+                          IikoReservesClient)
+
+logger = logging.getLogger(__name__)
+
+# Поля, которые не отправляются в запросах обновления
+READ_ONLY_FIELDS = frozenset({"id", "organizationId", "number", "createdDate"})
+
+
+def field_diff(previous: Dict[str, Any], current: Dict[str, Any],
+               ignore: Iterable[str] = READ_ONLY_FIELDS) -> Dict[str, Any]:
+    """
+    Изменённые поля верхнего уровня
+
+    Вложенные объекты и списки сравниваются целиком и при изменении
+    отправляются целиком. Поле, отсутствующее в current, не считается
+    изменённым (обновление частичное).
+
+    Args:
+        previous: Последнее известное состояние
+        current: Новое состояние
+        ignore: Поля, не участвующие в сравнении
+
+    Returns:
+        Словарь изменённых полей
+    """
+    ignore = frozenset(ignore)
+    return {key: value for key, value in current.items()
+            if key not in ignore and (key not in previous or previous[key] != value)}
+
+
+class UpdateTracker:
+    """
+    Отправка обновлений сущностей одного типа только при изменении полей
+
+    Пример:
+        orders = order_updates(client.orders)
+        order = orders.get(order_id)
+        order["comment"] = "Позвонить за 10 минут"
+        orders.update(order_id, order)   # отправит заказ с новым comment
+        orders.update(order_id, order)   # запрос не выполняется
+    """
+
+    def __init__(self, update_fn: Callable[[str, Dict[str, Any]], Any],
+                 fetch_fn: Optional[Callable[[str], Dict[str, Any]]] = None,
+                 ignore_fields: Iterable[str] = READ_ONLY_FIELDS, max_entries: int = 10000,
+                 partial: bool = False):
+        """
+        Args:
+            update_fn: Функция обновления (например, client.update_order)
+            fetch_fn: Функция получения сущности (например, client.get_order)
+            ignore_fields: Поля, не участвующие в сравнении и не отправляемые
+            max_entries: Максимум отслеживаемых сущностей (давно не использованные вытесняются)
+            partial: Отправлять только изменённые поля (только если эндпоинт
+                     объединяет частичное тело с сохранённым объектом)
+        """
+        self.update_fn = update_fn
+        self.fetch_fn = fetch_fn
+        self.ignore_fields = frozenset(ignore_fields)
+        self.max_entries = max_entries
+        self.partial = partial
+        self._known: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"sent": 0, "skipped": 0, "fieldsSent": 0, "fieldsOmitted": 0}
+
+    def remember(self, entity_id: str, record: Dict[str, Any]) -> None:
+        """Запоминает состояние сущности на сервере (например, после get_*)"""
+        with self._lock:
+            # Глубокая копия: вызывающий код может изменять вложенные объекты записи
+            self._known[entity_id] = copy.deepcopy(record)
+            self._known.move_to_end(entity_id)
+            while len(self._known) > self.max_entries:
+                self._known.popitem(last=False)
+
+    def forget(self, entity_id: str) -> None:
+        with self._lock:
+            self._known.pop(entity_id, None)
+
+    def known(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Последнее известное состояние сущности или None"""
+        with self._lock:
+            record = self._known.get(entity_id)
+            return copy.deepcopy(record) if record is not None else None
+
+    def get(self, entity_id: str) -> Dict[str, Any]:
+        """Получает сущность через fetch_fn и запоминает её состояние"""
+        if self.fetch_fn is None:
+            raise ValueError("Функция получения сущности не задана")
+        record = self.fetch_fn(entity_id)
+        self.remember(entity_id, record)
+        return copy.deepcopy(record)
+
+    def update(self, entity_id: str, data: Dict[str, Any]) -> Optional[Any]:
+        """
+        Отправляет обновление, если поля изменились
+
+        Отправляется последнее известное состояние с изменениями (при
+        partial=True - только изменённые поля); если состояние сущности
+        неизвестно, data отправляется целиком.
+
+        Args:
+            entity_id: ID сущности
+            data: Новое состояние (целиком или частично)
+
+        Returns:
+            Результат update_fn или None, если изменений нет и запрос не выполнялся
+        """
+        previous = self.known(entity_id)
+        if previous is None:
+            changes = {key: value for key, value in data.items() if key not in self.ignore_fields}
+        else:
+            changes = field_diff(previous, data, self.ignore_fields)
+        if not changes:
+            with self._lock:
+                self._stats["skipped"] += 1
+                self._stats["fieldsOmitted"] += len(data)
+            logger.debug(f"Обновление {entity_id} пропущено: изменений нет")
+            return None
+
+        state = {**(previous or {}), **changes}
+        if self.partial:
+            body = changes
+        else:
+            body = {key: value for key, value in state.items() if key not in self.ignore_fields}
+        result = self.update_fn(entity_id, body)
+        if isinstance(result, dict):
+            state.update(result)
+        self.remember(entity_id, state)
+        with self._lock:
+            self._stats["sent"] += 1
+            self._stats["fieldsSent"] += len(body)
+            self._stats["fieldsOmitted"] += len([key for key in data if key not in body])
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Количество отправленных и пропущенных обновлений, отправленных полей
+        и полей data, не попавших в запрос
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+def order_updates(client: IikoOrdersClient, **options) -> UpdateTracker:
+    """Обновление заказов только изменёнными полями"""
+    return UpdateTracker(client.update_order, client.get_order, **options)
+
+
+def customer_updates(client: IikoCustomersClient, **options) -> UpdateTracker:
+    """Обновление клиентов только изменёнными полями"""
+    return UpdateTracker(client.update_customer, client.get_customer, **options)
+
+
+def delivery_updates(client: IikoDeliveriesClient, **options) -> UpdateTracker:
+    """Обновление доставок только изменёнными полями"""
+    return UpdateTracker(client.update_delivery, client.get_delivery, **options)
+
+
+def reserve_updates(client: IikoReservesClient, **options) -> UpdateTracker:
+    """Обновление резервов только изменёнными полями"""
+    return UpdateTracker(client.update_reserve, client.get_reserve, **options)
@@ -0,0 +1,165 @@
+"""
+Локальная проверка заказов по каталогу iiko
+Документация: https://api-ru.iiko.services/#operation/CreateOrder
+
+Товары (get_products) и позиции меню (get_menu) индексируются по ID вместе
+с ценами, доступностью и модификаторами. Перед create_order() заказ
+проверяется по индексу, и заведомо неверный заказ (неизвестный товар,
+недоступное блюдо, неверная цена или модификатор) отклоняется локально
+со списком ошибок, без запроса к API.
+
+Пример:
+    catalog = CatalogIndex.from_client(client.menu)
+    client.orders.validator = catalog              # IikoOrdersClient
+    set_order_validator(catalog, organization_id)  # iiko_api_wrapper
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+import logging
+
+from iiko_api_oop import IikoMenuClient, OrderValidationError
+
+logger = logging.getLogger(__name__)
+
+
+class _CatalogItem(NamedTuple):
+    name: Optional[str]
+    price: Optional[float]
+    available: bool
+    modifiers: Dict[str, Optional[float]]
+
+
+def _error(field: str, code: str, message: str, **details: Any) -> Dict[str, Any]:
+    return {"field": field, "code": code, "message": message, **details}
+
+
+class CatalogIndex:
+    """Индекс товаров и позиций меню для проверки заказов"""
+
+    def __init__(self, products: Iterable[Dict[str, Any]] = (),
+                 menu: Iterable[Dict[str, Any]] = (), price_tolerance: float = 0.01):
+        """
+        Args:
+            products: Список get_products()
+            menu: Список get_menu()
+            price_tolerance: Допустимое расхождение цены
+        """
+        self.price_tolerance = price_tolerance
+        self.client: Optional[IikoMenuClient] = None
+        self.load(products, menu)
+
+    @classmethod
+    def from_client(cls, client: IikoMenuClient, **options) -> "CatalogIndex":
+        """Индекс по товарам и меню, загруженным через клиент меню"""
+        catalog = cls(**options)
+        catalog.client = client
+        catalog.refresh()
+        return catalog
+
+    def refresh(self) -> None:
+        """Повторная загрузка каталога через клиент меню"""
+        if self.client is None:
+            raise ValueError("Клиент меню не задан (используйте CatalogIndex.from_client)")
+        self.load(self.client.get_products(), self.client.get_menu())
+
+    def load(self, products: Iterable[Dict[str, Any]], menu: Iterable[Dict[str, Any]]) -> int:
+        """
+        Полная перестройка индекса
+
+        Returns:
+            Количество позиций каталога
+        """
+        items: Dict[str, _CatalogItem] = {}
+        for product in products:
+            items[product["id"]] = self._entry(product, product.get("isActive", True))
+        for item in menu:
+            items[item["id"]] = self._entry(item, item.get("isAvailable", True))
+        # Подменяем индекс целиком, чтобы параллельные проверки не видели частичное состояние
+        self._items = items
+        logger.info(f"Каталог для проверки заказов загружен: {len(items)}")
+        return len(items)
+
+    @staticmethod
+    def _entry(source: Dict[str, Any], available: bool) -> _CatalogItem:
+        return _CatalogItem(
+            name=source.get("name"),
+            price=source.get("price"),
+            available=bool(available),
+            modifiers={modifier["id"]: modifier.get("price")
+                       for modifier in source.get("modifiers") or () if modifier.get("id")},
+        )
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _check_price(self, errors: List[Dict[str, Any]], field: str, code: str,
+                     expected: Optional[float], actual: Any) -> None:
+        if actual is None or expected is None:
+            return
+        if not isinstance(actual, (int, float)) or abs(actual - expected) > self.price_tolerance:
+            errors.append(_error(field, code, f"Цена {actual} не совпадает с ценой каталога {expected}",
+                                 expected=expected, actual=actual))
+
+    @staticmethod
+    def _check_amount(errors: List[Dict[str, Any]], field: str, amount: Any) -> None:
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)) or amount <= 0:
+            errors.append(_error(field, "invalid_amount", f"Неверное количество: {amount}",
+                                 actual=amount))
+
+    def validate(self, order_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Проверка заказа по каталогу
+
+        Args:
+            order_data: Данные заказа для create_order()
+
+        Returns:
+            Список ошибок (field, code, message, expected/actual); пустой, если заказ корректен
+        """
+        catalog = self._items
+        errors: List[Dict[str, Any]] = []
+        items = order_data.get("items")
+        if not items:
+            return [_error("items", "empty_order", "Заказ не содержит позиций")]
+
+        for row, item in enumerate(items):
+            field = f"items[{row}]"
+            product_id = item.get("productId")
+            entry = catalog.get(product_id)
+            if entry is None:
+                errors.append(_error(f"{field}.productId", "unknown_product",
+                                     f"Неизвестный товар: {product_id}", actual=product_id))
+                continue
+            if not entry.available:
+                errors.append(_error(f"{field}.productId", "unavailable",
+                                     f"Товар недоступен: {entry.name or product_id}",
+                                     actual=product_id))
+            self._check_amount(errors, f"{field}.amount", item.get("amount"))
+            self._check_price(errors, f"{field}.price", "price_mismatch", entry.price,
+                              item.get("price"))
+
+            for position, modifier in enumerate(item.get("modifiers") or ()):
+                modifier_field = f"{field}.modifiers[{position}]"
+                modifier_id = modifier.get("id")
+                if modifier_id not in entry.modifiers:
+                    errors.append(_error(f"{modifier_field}.id", "unknown_modifier",
+                                         f"Модификатор {modifier_id} недоступен для товара "
+                                         f"{entry.name or product_id}", actual=modifier_id))
+                    continue
+                if "amount" in modifier:
+                    self._check_amount(errors, f"{modifier_field}.amount", modifier["amount"])
+                self._check_price(errors, f"{modifier_field}.price", "modifier_price_mismatch",
+                                  entry.modifiers[modifier_id], modifier.get("price"))
+        return errors
+
+    def check(self, order_data: Dict[str, Any]) -> None:
+        """
+        Проверка заказа по каталогу
+
+        Raises:
+            OrderValidationError: Если найдены ошибки (список в атрибуте errors)
+        """
+        errors = self.validate(order_data)
+        if errors:
+            logger.warning(f"Заказ отклонён локальной проверкой: {len(errors)} ошибок")
+            raise OrderValidationError(errors)
@@ -0,0 +1,528 @@
+"""
+Отслеживание изменений заказов и доставок iiko
+Документация: https://api-ru.iiko.services/#operation/GetOrders
+
+Вместо запроса get_order() для каждого открытого заказа наблюдатель
+запрашивает список заказов активного периода одним вызовом get_orders()
+на организацию, сравнивает его с предыдущим состоянием и рассылает
+события изменения статуса. Лента доставок аналогично опрашивает
+get_deliveries() и рассылает подписчикам только изменившиеся доставки.
+Если изменений нет, интервал опроса увеличивается, при изменениях -
+сбрасывается до минимального.
+"""
+
+import asyncio
+import hashlib
+import json
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import logging
+
+from iiko_api_concurrency import AimdLimiter, adaptive_map, pool_size
+from iiko_api_oop import IikoDeliveriesClient, IikoOrdersClient, NotFoundError
+
+logger = logging.getLogger(__name__)
+
+# Статусы, после которых заказ перестаёт отслеживаться
+FINAL_ORDER_STATUSES = frozenset({"Closed", "Cancelled", "Delivered"})
+
+# Максимальный интервал запросов get_order() для заказа вне активного периода, секунд
+MAX_FALLBACK_INTERVAL = 600.0
+
+Event = Dict[str, Any]
+
+
+class AdaptivePoller(ABC):
+    """
+    Базовый класс опроса API с адаптивным интервалом
+
+    Подклассы реализуют poll(), возвращающий список событий. События
+    рассылаются подписчикам; интервал опроса растёт в backoff раз после
+    каждого опроса без событий (до max_interval) и сбрасывается до
+    min_interval при появлении событий.
+    """
+
+    def __init__(self, min_interval: float = 2.0, max_interval: float = 60.0,
+                 backoff: float = 1.5):
+        """
+        Args:
+            min_interval: Минимальный интервал опроса, секунд
+            max_interval: Максимальный интервал опроса, секунд
+            backoff: Множитель интервала при отсутствии изменений
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self._subscribers: List[Callable[[Event], None]] = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._event_consumers = 0
+        self._started_for_events = False
+
+    @abstractmethod
+    def poll(self) -> List[Event]:
+        """Один цикл опроса. Возвращает список событий"""
+        pass
+
+    def subscribe(self, callback: Callable[[Event], None]) -> Callable[[], None]:
+        """
+        Подписка на события
+
+        Args:
+            callback: Функция, вызываемая для каждого события
+
+        Returns:
+            Функция отмены подписки
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def _publish(self, events: Iterable[Event]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for event in events:
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.error(f"Ошибка обработчика события: {e}")
+
+    def tick(self) -> List[Event]:
+        """Опрос с рассылкой событий и пересчётом интервала"""
+        try:
+            events = self.poll()
+        except Exception as e:
+            logger.error(f"Ошибка опроса API: {e}")
+            events = []
+        if events:
+            self.interval = self.min_interval
+            self._publish(events)
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return events
+
+    def reset_interval(self) -> None:
+        """Сбрасывает интервал до минимального и будит фоновый опрос"""
+        self.interval = self.min_interval
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Запускает фоновый опрос"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает фоновый опрос"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.tick()
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def events(self, timeout: Optional[float] = None) -> Iterator[Event]:
+        """
+        Итератор по событиям
+
+        Если фоновый опрос не запущен, он запускается на время итерации
+        и останавливается, когда завершается последний такой итератор.
+
+        Args:
+            timeout: Завершить итерацию, если событий нет дольше timeout секунд
+        """
+        events: "queue.Queue[Event]" = queue.Queue()
+        unsubscribe = self.subscribe(events.put)
+        self._add_consumer()
+        try:
+            while True:
+                try:
+                    yield events.get(timeout=timeout)
+                except queue.Empty:
+                    return
+        finally:
+            unsubscribe()
+            if self._remove_consumer():
+                self.stop()
+
+    async def events_async(self, timeout: Optional[float] = None) -> AsyncIterator[Event]:
+        """
+        Асинхронный итератор по событиям
+
+        Как и events(), подписывается на общий фоновый опрос: события
+        передаются в очередь цикла событий через call_soon_threadsafe,
+        поэтому число потребителей не увеличивает число запросов к API.
+
+        Args:
+            timeout: Завершить итерацию, если событий нет дольше timeout секунд
+        """
+        loop = asyncio.get_running_loop()
+        events: "asyncio.Queue[Event]" = asyncio.Queue()
+        unsubscribe = self.subscribe(
+            lambda event: loop.call_soon_threadsafe(events.put_nowait, event))
+        self._add_consumer()
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    return
+        finally:
+            unsubscribe()
+            if self._remove_consumer():
+                # stop() ждёт завершения текущего опроса - не в потоке цикла событий
+                await loop.run_in_executor(None, self.stop)
+
+    def _add_consumer(self) -> None:
+        """Учитывает потребителя событий и запускает фоновый опрос, если он не запущен"""
+        with self._lock:
+            self._event_consumers += 1
+            if self._thread is None:
+                self.start()
+                self._started_for_events = True
+
+    def _remove_consumer(self) -> bool:
+        """
+        Снимает учёт потребителя событий
+
+        Returns:
+            True, если это последний потребитель опроса, запущенного для событий
+        """
+        with self._lock:
+            self._event_consumers -= 1
+            stop = self._started_for_events and self._event_consumers == 0
+            if stop:
+                self._started_for_events = False
+            return stop
+
+
+class OrderWatcher(AdaptivePoller):
+    """
+    Наблюдатель за статусами заказов нескольких организаций
+
+    Пример:
+        watcher = OrderWatcher([client.orders])
+        watcher.watch(order["id"])
+        watcher.subscribe(lambda event: print(event["orderId"], event["status"]))
+        watcher.start()
+    """
+
+    def __init__(self, clients: Iterable[IikoOrdersClient], window_days: int = 1,
+                 final_statuses: Iterable[str] = FINAL_ORDER_STATUSES,
+                 max_fallback_interval: float = MAX_FALLBACK_INTERVAL,
+                 max_fallback_errors: int = 5, **poll_options):
+        """
+        Args:
+            clients: Клиенты заказов (по одному на организацию)
+            window_days: Глубина активного периода для get_orders(), дней
+            final_statuses: Статусы, после которых заказ снимается с отслеживания
+            max_fallback_interval: Максимальный интервал запросов get_order() для
+                                   заказа, отсутствующего в get_orders(), секунд
+            max_fallback_errors: Сколько ошибок get_order() подряд снимают заказ
+                                 с отслеживания (ответ 404 снимает сразу)
+            **poll_options: Параметры интервала опроса (см. AdaptivePoller)
+        """
+        super().__init__(**poll_options)
+        self.clients: Dict[str, IikoOrdersClient] = {client.organization_id: client
+                                                     for client in clients}
+        self.window_days = window_days
+        self.final_statuses = frozenset(final_statuses)
+        self.max_fallback_interval = max_fallback_interval
+        self.max_fallback_errors = max_fallback_errors
+        self._tracked: Dict[str, Set[str]] = {org_id: set() for org_id in self.clients}
+        self._statuses: Dict[str, Optional[str]] = {}
+        # Заказы вне get_orders(): (время следующего get_order, интервал, ошибок подряд)
+        self._fallback: Dict[str, Tuple[float, float, int]] = {}
+
+    def watch(self, order_id: str, organization_id: Optional[str] = None,
+              status: Optional[str] = None) -> None:
+        """
+        Добавляет заказ в отслеживание
+
+        Args:
+            order_id: ID заказа
+            organization_id: ID организации (по умолчанию - первая организация)
+            status: Известный текущий статус заказа
+        """
+        org_id = organization_id or next(iter(self.clients))
+        if org_id not in self.clients:
+            raise ValueError(f"Нет клиента для организации {org_id}")
+        with self._lock:
+            self._tracked[org_id].add(order_id)
+            self._statuses.setdefault(order_id, status)
+        self.reset_interval()
+
+    def unwatch(self, order_id: str) -> None:
+        """Снимает заказ с отслеживания"""
+        with self._lock:
+            for tracked in self._tracked.values():
+                tracked.discard(order_id)
+            self._statuses.pop(order_id, None)
+            self._fallback.pop(order_id, None)
+
+    @property
+    def tracked(self) -> Dict[str, Set[str]]:
+        """Отслеживаемые заказы по организациям"""
+        with self._lock:
+            return {org_id: set(ids) for org_id, ids in self._tracked.items() if ids}
+
+    def poll(self) -> List[Event]:
+        """
+        Один запрос get_orders() на каждую организацию с отслеживаемыми заказами
+
+        Заказы вне активного периода запрашиваются по одному через get_order()
+        с растущим интервалом; несуществующие заказы и заказы с повторяющимися
+        ошибками снимаются с отслеживания. Ошибка запроса одной организации
+        не отменяет события остальных.
+        """
+        date_from = (date.today() - timedelta(days=self.window_days)).isoformat()
+        events: List[Event] = []
+        for org_id, order_ids in self.tracked.items():
+            client = self.clients[org_id]
+            try:
+                listed = client.get_orders(date_from=date_from)
+            except Exception as e:
+                logger.error(f"Ошибка получения заказов организации {org_id}: {e}")
+                continue
+            orders = {order.get("id"): order for order in listed if order.get("id") in order_ids}
+            with self._lock:
+                for order_id in orders:
+                    self._fallback.pop(order_id, None)
+            for order_id in order_ids - orders.keys():
+                order = self._fetch_fallback(client, org_id, order_id)
+                if order is not None:
+                    orders[order_id] = order
+            events.extend(self._diff(org_id, orders))
+        return events
+
+    def _fetch_fallback(self, client: IikoOrdersClient, org_id: str,
+                        order_id: str) -> Optional[Dict[str, Any]]:
+        """get_order() для заказа вне get_orders(), если подошло его время"""
+        now = time.monotonic()
+        with self._lock:
+            due_at, interval, errors = self._fallback.get(order_id, (now, 0.0, 0))
+        if due_at > now:
+            return None
+        try:
+            order = client.get_order(order_id)
+        except NotFoundError:
+            logger.warning(f"Заказ {order_id} не найден, снят с отслеживания")
+            self.unwatch(order_id)
+            return None
+        except Exception as e:
+            errors += 1
+            if errors >= self.max_fallback_errors:
+                logger.error(f"Заказ {order_id} снят с отслеживания после {errors} ошибок: {e}")
+                self.unwatch(order_id)
+                return None
+            logger.error(f"Ошибка получения заказа {order_id}: {e}")
+            order = None
+        else:
+            errors = 0
+        interval = min(max(interval * self.backoff, self.min_interval), self.max_fallback_interval)
+        with self._lock:
+            if order_id in self._statuses:
+                self._fallback[order_id] = (now + interval, interval, errors)
+        return order
+
+    def _diff(self, org_id: str, orders: Dict[str, Dict[str, Any]]) -> List[Event]:
+        events = []
+        with self._lock:
+            for order_id, order in orders.items():
+                if order_id not in self._statuses:
+                    continue
+                previous = self._statuses[order_id]
+                status = order.get("status")
+                if status == previous:
+                    continue
+                self._statuses[order_id] = status
+                events.append({"organizationId": org_id, "orderId": order_id,
+                               "previousStatus": previous, "status": status, "order": order})
+                if status in self.final_statuses:
+                    self._tracked[org_id].discard(order_id)
+                    del self._statuses[order_id]
+                    self._fallback.pop(order_id, None)
+        return events
+
+
+def _digest(record: Dict[str, Any]) -> bytes:
+    """Хэш содержимого записи для быстрого сравнения"""
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+
+class DeliveryFeed(AdaptivePoller):
+    """
+    Лента изменений доставок для панелей курьеров
+
+    Один экземпляр ленты опрашивает API для всех подписчиков: хранит
+    последнее состояние и хэш каждой доставки и рассылает только новые,
+    изменившиеся и исчезнувшие доставки. Новый подписчик сразу получает
+    текущее состояние без обращения к API.
+
+    События нумеруются по порядку (поле sequence): подписчик не получает
+    события, уже учтённые в переданном ему текущем состоянии.
+
+    Пример:
+        feed = DeliveryFeed.shared([client.deliveries])
+        unsubscribe = feed.subscribe(render_delivery)
+        feed.start()
+    """
+
+    _shared: Dict[Tuple[str, ...], "DeliveryFeed"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, clients: Iterable[IikoDeliveriesClient], window_days: int = 0,
+                 max_workers: int = 4, limiter: Optional[AimdLimiter] = None, **poll_options):
+        """
+        Args:
+            clients: Клиенты доставок (по одному на организацию)
+            window_days: Глубина периода для get_deliveries(), дней (0 - только сегодня)
+            max_workers: Максимум одновременных запросов к API
+            limiter: Адаптивный лимит одновременных запросов (вместо фиксированного max_workers)
+            **poll_options: Параметры интервала опроса (см. AdaptivePoller)
+        """
+        super().__init__(**poll_options)
+        self.clients: Dict[str, IikoDeliveriesClient] = {client.organization_id: client
+                                                         for client in clients}
+        self.window_days = window_days
+        self.max_workers = max_workers
+        self.limiter = limiter
+        self._deliveries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._digests: Dict[Tuple[str, str], bytes] = {}
+        self._sequence = 0
+        self._options: Dict[str, Any] = {}
+        self._poll_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, clients: Iterable[IikoDeliveriesClient], **options) -> "DeliveryFeed":
+        """
+        Общая лента для набора организаций
+
+        Все вызовы с теми же организациями получают один экземпляр,
+        поэтому вкладки панели не создают собственных циклов опроса.
+        Параметры options применяются при создании ленты; последующие
+        вызовы без параметров получают её как есть.
+
+        Raises:
+            ValueError: Лента уже создана с другими параметрами
+        """
+        clients = list(clients)
+        key = tuple(sorted(client.organization_id for client in clients))
+        with cls._shared_lock:
+            feed = cls._shared.get(key)
+            if feed is None:
+                feed = cls._shared[key] = cls(clients, **options)
+                feed._options = options
+            elif options and options != feed._options:
+                raise ValueError(f"Общая лента организаций {', '.join(key)} уже создана "
+                                 f"с параметрами {feed._options}")
+            return feed
+
+    def subscribe(self, callback: Callable[[Event], None],
+                  replay: bool = True) -> Callable[[], None]:
+        """
+        Подписка на изменения доставок
+
+        Текущее состояние передаётся под блокировкой ленты, поэтому
+        следующий опрос не может разослать подписчику изменения раньше
+        него; события опросов, уже учтённые в состоянии, пропускаются.
+
+        Args:
+            callback: Функция, вызываемая для каждого события
+            replay: Сразу передать текущее состояние (события с change="snapshot")
+
+        Returns:
+            Функция отмены подписки
+        """
+        with self._lock:
+            sequence = self._sequence
+
+            def receive(event: Event) -> None:
+                if event["sequence"] > sequence:
+                    callback(event)
+
+            unsubscribe = super().subscribe(receive)
+            if replay:
+                for (org_id, delivery_id), delivery in list(self._deliveries.items()):
+                    callback({"organizationId": org_id, "deliveryId": delivery_id,
+                              "change": "snapshot", "delivery": delivery,
+                              "sequence": sequence})
+        return unsubscribe
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Текущее состояние всех доставок"""
+        with self._lock:
+            return list(self._deliveries.values())
+
+    def _fetch(self, org_id: str) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+        date_from = (date.today() - timedelta(days=self.window_days)).isoformat()
+        try:
+            if self.limiter is None:
+                return org_id, self.clients[org_id].get_deliveries(date_from=date_from)
+            with self.limiter.slot():
+                return org_id, self.clients[org_id].get_deliveries(date_from=date_from)
+        except Exception as e:
+            logger.error(f"Ошибка получения доставок организации {org_id}: {e}")
+            return org_id, None
+
+    def poll(self) -> List[Event]:
+        """Опрос всех организаций с ограниченной параллельностью"""
+        # Одновременные вызовы (фоновый цикл и ручной tick) не дублируют запросы
+        if not self._poll_lock.acquire(blocking=False):
+            return []
+        try:
+            results = adaptive_map(self._fetch, self.clients,
+                                   max_workers=pool_size(self.max_workers, self.limiter))
+            events: List[Event] = []
+            for org_id, deliveries in results:
+                if deliveries is not None:
+                    events.extend(self._diff(org_id, deliveries))
+            return events
+        finally:
+            self._poll_lock.release()
+
+    def _diff(self, org_id: str, deliveries: List[Dict[str, Any]]) -> List[Event]:
+        events = []
+        seen = set()
+        with self._lock:
+            for delivery in deliveries:
+                key = (org_id, delivery.get("id"))
+                seen.add(key)
+                digest = _digest(delivery)
+                previous = self._digests.get(key)
+                if previous == digest:
+                    continue
+                self._digests[key] = digest
+                self._deliveries[key] = delivery
+                self._sequence += 1
+                events.append({"organizationId": org_id, "deliveryId": key[1],
+                               "change": "added" if previous is None else "updated",
+                               "delivery": delivery, "sequence": self._sequence})
+            for key in [key for key in self._digests if key[0] == org_id and key not in seen]:
+                del self._digests[key]
+                self._sequence += 1
+                events.append({"organizationId": org_id, "deliveryId": key[1],
+                               "change": "removed", "delivery": self._deliveries.pop(key),
+                               "sequence": self._sequence})
+        return events
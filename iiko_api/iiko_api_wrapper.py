@@ -8,12 +8,20 @@ https://api-ru.iiko.services
 
 import requests
 import json
-from typing import Dict, List, Optional, Any
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Callable, Dict, Iterator, List, Optional, Any
 from datetime import datetime
 import logging
 
 # Импорт примеров данных для всех эндпоинтов
 from data_example import *
+from iiko_api_cache import credentials_scope
+from iiko_api_deadline import (DEFAULT_REQUEST_TIMEOUT, Deadline, DeadlineExceeded,
+                               current_deadline, deadline, iter_with_deadline, request_timeout,
+                               resolve_deadline, use_deadline)
+from iiko_api_stream import DEFAULT_CHUNK_SIZE, iter_json_array
+from iiko_api_transport import RequestsTransport
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +33,11 @@ API_VERSION = "1.0"
 API_KEY = None
 ACCESS_TOKEN = None
 ORGANIZATION_ID = None
+RESPONSE_CACHE = None
+NEGATIVE_CACHE = None
+TRANSPORT = None
+REQUEST_TIMEOUT = DEFAULT_REQUEST_TIMEOUT
+ORDER_VALIDATORS: Dict[str, Any] = {}
 
 # Заголовки по умолчанию
 DEFAULT_HEADERS = {
@@ -103,55 +116,282 @@ PROMOTIONS_EXAMPLE = PROMOTIONS_LIST_EXAMPLE
 # API информация
 API_INFO_EXAMPLE_DATA = API_INFO_EXAMPLE
 
+class IikoContext:
+    """
+    Контекст вызовов API: учётные данные, организация и HTTP транспорт
+    
+    Позволяет разным потокам и asyncio задачам работать с разными
+    организациями без изменения глобальных переменных. Незаданные поля
+    берутся из глобальных значений (set_api_key, set_organization_id).
+    
+    Пример:
+        with use_context(IikoContext(api_key="key", organization_id="org")):
+            menu = get_menu()
+        
+        executor.submit(context.run, get_menu)
+    """
+    
+    def __init__(self, api_key: Optional[str] = None, organization_id: Optional[str] = None,
+                 transport: Optional[Any] = None):
+        """
+        Args:
+            api_key: API ключ
+            organization_id: ID организации по умолчанию для вызовов в контексте
+            transport: HTTP транспорт для запросов в контексте: requests.Session,
+                       RequestsTransport или Http2Transport (iiko_api_transport)
+        """
+        self.api_key = api_key
+        self.organization_id = organization_id
+        self.transport = transport
+        self.access_token: Optional[str] = None
+    
+    def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Выполняет функцию в этом контексте (удобно для пулов потоков)"""
+        with use_context(self):
+            return func(*args, **kwargs)
+
+_CONTEXT: ContextVar[Optional[IikoContext]] = ContextVar("iiko_context", default=None)
+
+@contextmanager
+def use_context(context: IikoContext) -> Iterator[IikoContext]:
+    """
+    Делает контекст текущим для вызовов внутри блока with
+    
+    Контекст действует только в текущем потоке или asyncio задаче
+    и восстанавливается при выходе из блока.
+    
+    Args:
+        context: Контекст вызовов
+    """
+    token = _CONTEXT.set(context)
+    try:
+        yield context
+    finally:
+        _CONTEXT.reset(token)
+
+def get_current_context() -> Optional[IikoContext]:
+    """Возвращает текущий контекст вызовов (None, если используются глобальные значения)"""
+    return _CONTEXT.get()
+
 def set_api_key(api_key: str) -> None:
-    """Устанавливает API ключ для аутентификации"""
+    """Устанавливает API ключ по умолчанию для аутентификации"""
     global API_KEY
     API_KEY = api_key
     logger.info("API ключ установлен")
 
 def set_organization_id(org_id: str) -> None:
-    """Устанавливает ID организации"""
+    """Устанавливает ID организации по умолчанию"""
     global ORGANIZATION_ID
     ORGANIZATION_ID = org_id
     logger.info(f"ID организации установлен: {org_id}")
 
+def set_response_cache(cache: Optional[Any]) -> None:
+    """
+    Устанавливает кэш ответов GET запросов к справочникам
+    
+    Args:
+        cache: ResponseCache из iiko_api_cache (None - отключить кэш)
+    
+    Пример:
+        set_response_cache(ResponseCache(SqliteCache("/var/cache/iiko/responses.db")))
+    """
+    global RESPONSE_CACHE
+    RESPONSE_CACHE = cache
+    logger.info("Кэш ответов " + ("установлен" if cache is not None else "отключён"))
+
+def set_negative_cache(cache: Optional[Any]) -> None:
+    """
+    Устанавливает кэш отсутствующих ID для запросов сущностей по ID
+    
+    Args:
+        cache: NegativeCache из iiko_api_cache (None - отключить кэш)
+    
+    Пример:
+        set_negative_cache(NegativeCache(ttl=30))
+    """
+    global NEGATIVE_CACHE
+    NEGATIVE_CACHE = cache
+    logger.info("Кэш отсутствующих ID " + ("установлен" if cache is not None else "отключён"))
+
+def set_transport(transport: Optional[Any]) -> None:
+    """
+    Устанавливает HTTP транспорт по умолчанию (вне контекстов IikoContext)
+    
+    Args:
+        transport: RequestsTransport или Http2Transport (None - отдельное
+                   соединение requests на каждый запрос)
+    """
+    global TRANSPORT
+    TRANSPORT = transport
+    logger.info("Транспорт " + ("установлен" if transport is not None else "сброшен"))
+
+def warmup(connections: int = 4, keepalive_interval: Optional[float] = None,
+           timeout: float = 10.0, install: bool = False) -> int:
+    """
+    Прогрев соединений с API перед первыми запросами
+    
+    Разрешает имя хоста API и открывает connections соединений пула
+    транспорта текущего контекста (или транспорта по умолчанию).
+    
+    Args:
+        connections: Число соединений
+        keepalive_interval: Интервал обновления соединений при простое, секунд
+                            (None - без фонового обновления)
+        timeout: Таймаут каждого запроса прогрева, секунд
+        install: Если транспорт не задан, создать RequestsTransport и установить
+                 его транспортом по умолчанию (как set_transport())
+        
+    Returns:
+        Число открытых соединений
+        
+    Raises:
+        ValueError: Транспорт не задан и install=False (без пула соединений
+                    прогревать нечего)
+    """
+    context = _CONTEXT.get()
+    transport = (context.transport if context else None) or TRANSPORT
+    if transport is None:
+        if not install:
+            raise ValueError("Транспорт не задан. Используйте set_transport() "
+                             "или warmup(install=True)")
+        transport = RequestsTransport(pool_maxsize=max(10, connections))
+        set_transport(transport)
+    if not hasattr(transport, "warmup"):
+        logger.warning(f"Транспорт {type(transport).__name__} не поддерживает прогрев")
+        return 0
+    opened = transport.warmup(BASE_URL, connections, timeout=timeout)
+    if keepalive_interval is not None:
+        transport.start_keepalive(BASE_URL, keepalive_interval, connections)
+    return opened
+
+def set_request_timeout(connect: float, read: float) -> None:
+    """
+    Устанавливает таймауты HTTP запросов
+    
+    При заданном сроке вызова (timeout или блок deadline()) таймауты
+    дополнительно ограничиваются оставшимся временем.
+    
+    Args:
+        connect: Таймаут установки соединения, секунд
+        read: Таймаут ожидания данных ответа, секунд
+    """
+    global REQUEST_TIMEOUT
+    REQUEST_TIMEOUT = (connect, read)
+    logger.info(f"Таймауты запросов установлены: соединение {connect} с, чтение {read} с")
+
+def set_order_validator(validator: Optional[Any], organization_id: Optional[str] = None) -> None:
+    """
+    Устанавливает локальную проверку заказов организации перед create_order()
+    
+    Args:
+        validator: CatalogIndex из iiko_api_validation (None - отключить проверку)
+        organization_id: ID организации (если не указан, используется глобальный)
+    """
+    org_id = _resolve_organization_id(organization_id)
+    if validator is None:
+        ORDER_VALIDATORS.pop(org_id, None)
+    else:
+        ORDER_VALIDATORS[org_id] = validator
+    logger.info(f"Проверка заказов для организации {org_id} " + ("установлена" if validator is not None else "отключена"))
+
+def _resolve_organization_id(organization_id: Optional[str] = None) -> str:
+    """
+    Определяет ID организации для вызова
+    
+    Порядок: явный аргумент, текущий контекст, глобальное значение.
+    
+    Raises:
+        ValueError: Если ID организации не указан
+    """
+    context = _CONTEXT.get()
+    org_id = (organization_id
+              or (context.organization_id if context else None)
+              or ORGANIZATION_ID)
+    if not org_id:
+        raise ValueError("ID организации не указан")
+    return org_id
+
+def _resolve_api_key() -> str:
+    """
+    Определяет API ключ для вызова: текущий контекст, затем глобальное значение
+    
+    Raises:
+        ValueError: Если API ключ не установлен
+    """
+    context = _CONTEXT.get()
+    api_key = (context.api_key if context else None) or API_KEY
+    if not api_key:
+        raise ValueError("API ключ не установлен. Используйте set_api_key()")
+    return api_key
+
+def _send(method: str, endpoint: str, data: Optional[Dict] = None,
+          params: Optional[Dict] = None, stream: bool = False,
+          budget: Optional[Deadline] = None) -> requests.Response:
+    """Отправляет HTTP запрос с учётными данными текущего контекста в пределах срока вызова"""
+    context = _CONTEXT.get()
+    api_key = _resolve_api_key()
+    
+    method = method.upper()
+    if method not in ("GET", "POST", "PUT", "DELETE"):
+        raise ValueError(f"Неподдерживаемый HTTP метод: {method}")
+    
+    url = f"{BASE_URL}{endpoint}"
+    headers = DEFAULT_HEADERS.copy()
+    headers["Authorization"] = f"Bearer {api_key}"
+    
+    sender = (context.transport if context and context.transport else None) or TRANSPORT or requests
+    timeout = request_timeout(budget, REQUEST_TIMEOUT)
+    try:
+        return sender.request(method, url, headers=headers,
+                              json=data if method in ("POST", "PUT") else None,
+                              params=params, stream=stream, timeout=timeout)
+    except requests.exceptions.Timeout as e:
+        if budget is not None and budget.expired:
+            raise DeadlineExceeded(f"Истёк срок выполнения: {method} {endpoint}") from e
+        raise
+
+def _log_request_error(e: requests.exceptions.RequestException) -> None:
+    """Логирует ошибку HTTP запроса с расшифровкой кода ответа"""
+    logger.error(f"Ошибка HTTP запроса: {e}")
+    if hasattr(e, 'response') and e.response is not None:
+        error_msg = ERROR_CODES.get(e.response.status_code, f"Ошибка {e.response.status_code}")
+        logger.error(f"Статус: {e.response.status_code}, Сообщение: {error_msg}")
+
 def _make_request(method: str, endpoint: str, data: Optional[Dict] = None, 
-                  params: Optional[Dict] = None) -> Dict[str, Any]:
+                  params: Optional[Dict] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Выполняет HTTP запрос к API iiko
     
+    GET запросы к справочникам выполняются через кэш ответов (set_response_cache).
+    
     Args:
         method: HTTP метод (GET, POST, PUT, DELETE)
         endpoint: Эндпоинт API
         data: Данные для отправки в теле запроса
         params: Параметры запроса
+        timeout: Общий лимит времени вызова, секунд (вместе со сроком блока deadline())
         
     Returns:
         Ответ от API в виде словаря
         
     Raises:
+        DeadlineExceeded: При истечении срока вызова
         requests.RequestException: При ошибке HTTP запроса
         ValueError: При неверном ответе от API
     """
-    if not API_KEY:
-        raise ValueError("API ключ не установлен. Используйте set_api_key()")
-    
-    url = f"{BASE_URL}{endpoint}"
-    headers = DEFAULT_HEADERS.copy()
-    headers["Authorization"] = f"Bearer {API_KEY}"
-    
+    with use_deadline(resolve_deadline(timeout)):
+        cache = RESPONSE_CACHE
+        if cache is not None and method.upper() == "GET":
+            return cache.fetch(f"{BASE_URL}{endpoint}", endpoint, params,
+                               lambda: _fetch_json(method, endpoint, data, params),
+                               scope=credentials_scope(_resolve_api_key()))
+        return _fetch_json(method, endpoint, data, params)
+
+def _fetch_json(method: str, endpoint: str, data: Optional[Dict] = None,
+                params: Optional[Dict] = None) -> Dict[str, Any]:
+    """Выполняет HTTP запрос и разбирает JSON ответ (без кэша)"""
     try:
-        if method.upper() == "GET":
-            response = requests.get(url, headers=headers, params=params)
-        elif method.upper() == "POST":
-            response = requests.post(url, headers=headers, json=data, params=params)
-        elif method.upper() == "PUT":
-            response = requests.put(url, headers=headers, json=data, params=params)
-        elif method.upper() == "DELETE":
-            response = requests.delete(url, headers=headers, params=params)
-        else:
-            raise ValueError(f"Неподдерживаемый HTTP метод: {method}")
-        
+        response = _send(method, endpoint, data, params, budget=current_deadline())
         response.raise_for_status()
         
         if response.content:
@@ -159,18 +399,110 @@ def _make_request(method: str, endpoint: str, data: Optional[Dict] = None,
         return {}
         
     except requests.exceptions.RequestException as e:
-        logger.error(f"Ошибка HTTP запроса: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            error_msg = ERROR_CODES.get(e.response.status_code, f"Ошибка {e.response.status_code}")
-            logger.error(f"Статус: {e.response.status_code}, Сообщение: {error_msg}")
+        _log_request_error(e)
         raise
     except json.JSONDecodeError as e:
         logger.error(f"Ошибка парсинга JSON: {e}")
         raise ValueError("Неверный формат ответа от API")
 
+def _raise_if_missing(resource: str, org_id: str, entity_id: str, endpoint: str) -> None:
+    """
+    Raises:
+        requests.exceptions.HTTPError: Ответ 404, если ID сущности есть в кэше отсутствующих ID
+    """
+    cache = NEGATIVE_CACHE
+    if cache is None or not cache.contains(resource, org_id, entity_id):
+        return
+    logger.debug(f"{resource} {entity_id} не найден (кэш отсутствующих ID)")
+    response = requests.Response()
+    response.status_code = 404
+    response.reason = "Not Found"
+    response.url = f"{BASE_URL}{endpoint}"
+    raise requests.exceptions.HTTPError(
+        f"404 Client Error: Not Found for url: {response.url} (кэш отсутствующих ID)",
+        response=response)
+
+def _remember_missing(resource: str, org_id: str, entity_id: str, error: Exception) -> None:
+    """Запоминает ID сущности, на запрос которой API ответил 404"""
+    cache = NEGATIVE_CACHE
+    if cache is not None and getattr(getattr(error, "response", None), "status_code", None) == 404:
+        cache.add(resource, org_id, entity_id)
+
+def _forget_missing(resource: str, org_id: str) -> None:
+    """Сбрасывает кэш отсутствующих ID сущностей типа после создания сущности"""
+    cache = NEGATIVE_CACHE
+    if cache is not None:
+        cache.invalidate(resource, org_id)
+
+def _log_errors(items: Iterator[Any], message: str) -> Iterator[Any]:
+    """Выдаёт элементы итератора, записывая в лог ошибку чтения"""
+    try:
+        yield from items
+    except Exception as e:
+        logger.error(f"{message}: {e}")
+        raise
+
+def _stream_request(method: str, endpoint: str, key: Optional[str] = None,
+                    data: Optional[Dict] = None, params: Optional[Dict] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    timeout: Optional[float] = None) -> Iterator[Any]:
+    """
+    Выполняет HTTP запрос к API iiko и потоково разбирает список из ответа
+    
+    Тело ответа читается блоками (stream=True), элементы списка выдаются
+    по мере разбора, не дожидаясь загрузки всего ответа.
+    
+    Контекст вызова (IikoContext) и срок определяются при вызове функции,
+    а не при первом обращении к итератору: итератор, созданный в блоке
+    use_context, можно читать и вне его.
+    
+    Args:
+        method: HTTP метод (GET, POST, PUT, DELETE)
+        endpoint: Эндпоинт API
+        key: Ключ списка в ответе (например, "customers")
+        data: Данные для отправки в теле запроса
+        params: Параметры запроса
+        chunk_size: Размер блока чтения в байтах
+        timeout: Лимит времени на весь ответ, секунд (срок проверяется перед каждым блоком)
+        
+    Returns:
+        Итератор по элементам списка
+        
+    Raises:
+        DeadlineExceeded: При истечении срока вызова
+        requests.RequestException: При ошибке HTTP запроса
+        ValueError: При неверном ответе от API
+    """
+    # Срок передаётся явно: переменная контекста, заданная в генераторе,
+    # оставалась бы установленной в коде вызывающего между элементами
+    budget = resolve_deadline(timeout)
+    return _iter_stream(copy_context(), method, endpoint, key, data, params, chunk_size, budget)
+
+def _iter_stream(context: Context, method: str, endpoint: str, key: Optional[str], data: Optional[Dict],
+                 params: Optional[Dict], chunk_size: int,
+                 budget: Optional[Deadline]) -> Iterator[Any]:
+    """Потоковый разбор ответа; запрос отправляется в контексте, сохранённом _stream_request"""
+    try:
+        response = context.run(_send, method, endpoint, data, params, stream=True, budget=budget)
+    except requests.exceptions.RequestException as e:
+        _log_request_error(e)
+        raise
+    
+    try:
+        response.raise_for_status()
+        yield from iter_json_array(iter_with_deadline(response.iter_content(chunk_size), budget), key)
+    except requests.exceptions.RequestException as e:
+        _log_request_error(e)
+        raise
+    except ValueError as e:
+        logger.error(f"Ошибка парсинга JSON: {e}")
+        raise ValueError("Неверный формат ответа от API")
+    finally:
+        response.close()
+
 # ==================== АУТЕНТИФИКАЦИЯ ====================
 
-def authenticate(login: str, password: str) -> Dict[str, Any]:
+def authenticate(login: str, password: str, timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Аутентификация в API iiko
     
@@ -179,6 +511,7 @@ def authenticate(login: str, password: str) -> Dict[str, Any]:
     Args:
         login: Логин пользователя
         password: Пароль пользователя
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Информация об аутентификации
@@ -190,9 +523,13 @@ def authenticate(login: str, password: str) -> Dict[str, Any]:
     }
     
     try:
-        result = _make_request("POST", endpoint, data=data)
-        global ACCESS_TOKEN
-        ACCESS_TOKEN = result.get("token")
+        result = _make_request("POST", endpoint, data=data, timeout=timeout)
+        context = _CONTEXT.get()
+        if context is not None:
+            context.access_token = result.get("token")
+        else:
+            global ACCESS_TOKEN
+            ACCESS_TOKEN = result.get("token")
         logger.info("Аутентификация успешна")
         return result
     except Exception as e:
@@ -201,25 +538,28 @@ def authenticate(login: str, password: str) -> Dict[str, Any]:
 
 # ==================== ОРГАНИЗАЦИИ ====================
 
-def get_organizations() -> List[Dict[str, Any]]:
+def get_organizations(timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка организаций
     
     Документация: https://api-ru.iiko.services/#operation/GetOrganizations
     
+    Args:
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+    
     Returns:
         Список организаций
     """
     endpoint = "/api/1/organizations"
     
     try:
-        result = _make_request("GET", endpoint)
+        result = _make_request("GET", endpoint, timeout=timeout)
         return result.get("organizations", [])
     except Exception as e:
         logger.error(f"Ошибка получения организаций: {e}")
         raise
 
-def get_organization_by_id(organization_id: str) -> Dict[str, Any]:
+def get_organization_by_id(organization_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Получение информации об организации по ID
     
@@ -227,6 +567,7 @@ def get_organization_by_id(organization_id: str) -> Dict[str, Any]:
     
     Args:
         organization_id: ID организации
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Информация об организации
@@ -234,7 +575,7 @@ def get_organization_by_id(organization_id: str) -> Dict[str, Any]:
     endpoint = f"/api/1/organizations/{organization_id}"
     
     try:
-        result = _make_request("GET", endpoint)
+        result = _make_request("GET", endpoint, timeout=timeout)
         return result
     except Exception as e:
         logger.error(f"Ошибка получения организации {organization_id}: {e}")
@@ -242,7 +583,8 @@ def get_organization_by_id(organization_id: str) -> Dict[str, Any]:
 
 # ==================== МЕНЮ И ТОВАРЫ ====================
 
-def get_menu(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
+def get_menu(organization_id: Optional[str] = None,
+             timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение меню организации
     
@@ -250,25 +592,25 @@ def get_menu(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
     
     Args:
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список товаров в меню
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/menu"
     params = {"organizationId": org_id}
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("items", [])
     except Exception as e:
         logger.error(f"Ошибка получения меню: {e}")
         raise
 
-def get_products(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
+def get_products(organization_id: Optional[str] = None,
+                 timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка товаров
     
@@ -276,25 +618,25 @@ def get_products(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
     
     Args:
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список товаров
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/products"
     params = {"organizationId": org_id}
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("products", [])
     except Exception as e:
         logger.error(f"Ошибка получения товаров: {e}")
         raise
 
-def get_product_by_id(product_id: str, organization_id: Optional[str] = None) -> Dict[str, Any]:
+def get_product_by_id(product_id: str, organization_id: Optional[str] = None,
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Получение информации о товаре по ID
     
@@ -303,27 +645,29 @@ def get_product_by_id(product_id: str, organization_id: Optional[str] = None) ->
     Args:
         product_id: ID товара
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Информация о товаре
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/products/{product_id}"
     params = {"organizationId": org_id}
+    _raise_if_missing("products", org_id, product_id, endpoint)
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result
     except Exception as e:
+        _remember_missing("products", org_id, product_id, e)
         logger.error(f"Ошибка получения товара {product_id}: {e}")
         raise
 
 # ==================== ЗАКАЗЫ ====================
 
-def create_order(order_data: Dict[str, Any], organization_id: Optional[str] = None) -> Dict[str, Any]:
+def create_order(order_data: Dict[str, Any], organization_id: Optional[str] = None,
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Создание нового заказа
     
@@ -332,26 +676,33 @@ def create_order(order_data: Dict[str, Any], organization_id: Optional[str] = No
     Args:
         order_data: Данные заказа
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Созданный заказ
+        
+    Raises:
+        OrderValidationError: Если заказ не прошёл проверку (set_order_validator)
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
+    validator = ORDER_VALIDATORS.get(org_id)
+    if validator is not None:
+        validator.check(order_data)
     
     endpoint = "/api/1/orders"
     data = {**order_data, "organizationId": org_id}
     
     try:
-        result = _make_request("POST", endpoint, data=data)
+        result = _make_request("POST", endpoint, data=data, timeout=timeout)
+        _forget_missing("orders", org_id)
         logger.info(f"Заказ создан: {result.get('id')}")
         return result
     except Exception as e:
         logger.error(f"Ошибка создания заказа: {e}")
         raise
 
-def get_order(order_id: str, organization_id: Optional[str] = None) -> Dict[str, Any]:
+def get_order(order_id: str, organization_id: Optional[str] = None,
+              timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Получение информации о заказе
     
@@ -360,26 +711,28 @@ def get_order(order_id: str, organization_id: Optional[str] = None) -> Dict[str,
     Args:
         order_id: ID заказа
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Информация о заказе
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/orders/{order_id}"
     params = {"organizationId": org_id}
+    _raise_if_missing("orders", org_id, order_id, endpoint)
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result
     except Exception as e:
+        _remember_missing("orders", org_id, order_id, e)
         logger.error(f"Ошибка получения заказа {order_id}: {e}")
         raise
 
 def update_order(order_id: str, order_data: Dict[str, Any], 
-                organization_id: Optional[str] = None) -> Dict[str, Any]:
+                organization_id: Optional[str] = None,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Обновление заказа
     
@@ -389,26 +742,26 @@ def update_order(order_id: str, order_data: Dict[str, Any],
         order_id: ID заказа
         order_data: Новые данные заказа
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Обновлённый заказ
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/orders/{order_id}"
     data = {**order_data, "organizationId": org_id}
     
     try:
-        result = _make_request("PUT", endpoint, data=data)
+        result = _make_request("PUT", endpoint, data=data, timeout=timeout)
         logger.info(f"Заказ {order_id} обновлён")
         return result
     except Exception as e:
         logger.error(f"Ошибка обновления заказа {order_id}: {e}")
         raise
 
-def delete_order(order_id: str, organization_id: Optional[str] = None) -> bool:
+def delete_order(order_id: str, organization_id: Optional[str] = None,
+                 timeout: Optional[float] = None) -> bool:
     """
     Удаление заказа
     
@@ -417,19 +770,18 @@ def delete_order(order_id: str, organization_id: Optional[str] = None) -> bool:
     Args:
         order_id: ID заказа
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         True если заказ успешно удалён
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/orders/{order_id}"
     params = {"organizationId": org_id}
     
     try:
-        _make_request("DELETE", endpoint, params=params)
+        _make_request("DELETE", endpoint, params=params, timeout=timeout)
         logger.info(f"Заказ {order_id} удалён")
         return True
     except Exception as e:
@@ -438,7 +790,8 @@ def delete_order(order_id: str, organization_id: Optional[str] = None) -> bool:
 
 def get_orders(organization_id: Optional[str] = None, 
                date_from: Optional[str] = None, 
-               date_to: Optional[str] = None) -> List[Dict[str, Any]]:
+               date_to: Optional[str] = None,
+               timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка заказов
     
@@ -448,13 +801,12 @@ def get_orders(organization_id: Optional[str] = None,
         organization_id: ID организации (если не указан, используется глобальный)
         date_from: Дата начала периода (формат: YYYY-MM-DD)
         date_to: Дата окончания периода (формат: YYYY-MM-DD)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список заказов
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/orders"
     params = {"organizationId": org_id}
@@ -465,16 +817,54 @@ def get_orders(organization_id: Optional[str] = None,
         params["dateTo"] = date_to
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("orders", [])
     except Exception as e:
         logger.error(f"Ошибка получения заказов: {e}")
         raise
 
+def iter_orders(organization_id: Optional[str] = None, 
+                date_from: Optional[str] = None, 
+                date_to: Optional[str] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE,
+                timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Потоковое получение списка заказов
+    
+    Заказы выдаются по одному по мере получения ответа, без загрузки
+    всего списка в память.
+    
+    Документация: https://api-ru.iiko.services/#operation/GetOrders
+    
+    Args:
+        organization_id: ID организации (если не указан, используется глобальный)
+        date_from: Дата начала периода (формат: YYYY-MM-DD)
+        date_to: Дата окончания периода (формат: YYYY-MM-DD)
+        chunk_size: Размер блока чтения в байтах
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+        
+    Returns:
+        Итератор по заказам
+    """
+    org_id = _resolve_organization_id(organization_id)
+    
+    endpoint = "/api/1/orders"
+    params = {"organizationId": org_id}
+    
+    if date_from:
+        params["dateFrom"] = date_from
+    if date_to:
+        params["dateTo"] = date_to
+    
+    return _log_errors(_stream_request("GET", endpoint, "orders", params=params,
+                                       chunk_size=chunk_size, timeout=timeout),
+                       "Ошибка получения заказов")
+
 # ==================== КЛИЕНТЫ ====================
 
 def create_customer(customer_data: Dict[str, Any], 
-                   organization_id: Optional[str] = None) -> Dict[str, Any]:
+                   organization_id: Optional[str] = None,
+                   timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Создание нового клиента
     
@@ -483,26 +873,27 @@ def create_customer(customer_data: Dict[str, Any],
     Args:
         customer_data: Данные клиента
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Созданный клиент
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/customers"
     data = {**customer_data, "organizationId": org_id}
     
     try:
-        result = _make_request("POST", endpoint, data=data)
+        result = _make_request("POST", endpoint, data=data, timeout=timeout)
+        _forget_missing("customers", org_id)
         logger.info(f"Клиент создан: {result.get('id')}")
         return result
     except Exception as e:
         logger.error(f"Ошибка создания клиента: {e}")
         raise
 
-def get_customer(customer_id: str, organization_id: Optional[str] = None) -> Dict[str, Any]:
+def get_customer(customer_id: str, organization_id: Optional[str] = None,
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Получение информации о клиенте
     
@@ -511,26 +902,28 @@ def get_customer(customer_id: str, organization_id: Optional[str] = None) -> Dic
     Args:
         customer_id: ID клиента
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Информация о клиенте
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/customers/{customer_id}"
     params = {"organizationId": org_id}
+    _raise_if_missing("customers", org_id, customer_id, endpoint)
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result
     except Exception as e:
+        _remember_missing("customers", org_id, customer_id, e)
         logger.error(f"Ошибка получения клиента {customer_id}: {e}")
         raise
 
 def update_customer(customer_id: str, customer_data: Dict[str, Any], 
-                   organization_id: Optional[str] = None) -> Dict[str, Any]:
+                   organization_id: Optional[str] = None,
+                   timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Обновление клиента
     
@@ -540,26 +933,26 @@ def update_customer(customer_id: str, customer_data: Dict[str, Any],
         customer_id: ID клиента
         customer_data: Новые данные клиента
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Обновлённый клиент
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/customers/{customer_id}"
     data = {**customer_data, "organizationId": org_id}
     
     try:
-        result = _make_request("PUT", endpoint, data=data)
+        result = _make_request("PUT", endpoint, data=data, timeout=timeout)
         logger.info(f"Клиент {customer_id} обновлён")
         return result
     except Exception as e:
         logger.error(f"Ошибка обновления клиента {customer_id}: {e}")
         raise
 
-def get_customers(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
+def get_customers(organization_id: Optional[str] = None,
+                  timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка клиентов
     
@@ -567,27 +960,55 @@ def get_customers(organization_id: Optional[str] = None) -> List[Dict[str, Any]]
     
     Args:
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список клиентов
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/customers"
     params = {"organizationId": org_id}
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("customers", [])
     except Exception as e:
         logger.error(f"Ошибка получения клиентов: {e}")
         raise
 
+def iter_customers(organization_id: Optional[str] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Потоковое получение списка клиентов
+    
+    В отличие от get_customers() не загружает весь список в память:
+    клиенты выдаются по одному по мере получения ответа.
+    
+    Документация: https://api-ru.iiko.services/#operation/GetCustomers
+    
+    Args:
+        organization_id: ID организации (если не указан, используется глобальный)
+        chunk_size: Размер блока чтения в байтах
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+        
+    Returns:
+        Итератор по клиентам
+    """
+    org_id = _resolve_organization_id(organization_id)
+    
+    endpoint = "/api/1/customers"
+    params = {"organizationId": org_id}
+    
+    return _log_errors(_stream_request("GET", endpoint, "customers", params=params,
+                                       chunk_size=chunk_size, timeout=timeout),
+                       "Ошибка получения клиентов")
+
 # ==================== СКЛАДЫ И ОСТАТКИ ====================
 
-def get_warehouses(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
+def get_warehouses(organization_id: Optional[str] = None,
+                   timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка складов
     
@@ -595,26 +1016,26 @@ def get_warehouses(organization_id: Optional[str] = None) -> List[Dict[str, Any]
     
     Args:
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список складов
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/warehouses"
     params = {"organizationId": org_id}
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("warehouses", [])
     except Exception as e:
         logger.error(f"Ошибка получения складов: {e}")
         raise
 
 def get_stock(organization_id: Optional[str] = None, 
-              warehouse_id: Optional[str] = None) -> List[Dict[str, Any]]:
+              warehouse_id: Optional[str] = None,
+              timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение остатков товаров
     
@@ -623,13 +1044,12 @@ def get_stock(organization_id: Optional[str] = None,
     Args:
         organization_id: ID организации (если не указан, используется глобальный)
         warehouse_id: ID склада (если не указан, возвращаются остатки по всем складам)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список остатков товаров
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/stock"
     params = {"organizationId": org_id}
@@ -638,7 +1058,7 @@ def get_stock(organization_id: Optional[str] = None,
         params["warehouseId"] = warehouse_id
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("stock", [])
     except Exception as e:
         logger.error(f"Ошибка получения остатков: {e}")
@@ -648,7 +1068,8 @@ def get_stock(organization_id: Optional[str] = None,
 
 def get_sales_report(organization_id: Optional[str] = None, 
                      date_from: Optional[str] = None, 
-                     date_to: Optional[str] = None) -> Dict[str, Any]:
+                     date_to: Optional[str] = None,
+                     timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Получение отчёта по продажам
     
@@ -658,13 +1079,12 @@ def get_sales_report(organization_id: Optional[str] = None,
         organization_id: ID организации (если не указан, используется глобальный)
         date_from: Дата начала периода (формат: YYYY-MM-DD)
         date_to: Дата окончания периода (формат: YYYY-MM-DD)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Отчёт по продажам
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/reports/sales"
     params = {"organizationId": org_id}
@@ -675,7 +1095,7 @@ def get_sales_report(organization_id: Optional[str] = None,
         params["dateTo"] = date_to
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result
     except Exception as e:
         logger.error(f"Ошибка получения отчёта по продажам: {e}")
@@ -683,7 +1103,8 @@ def get_sales_report(organization_id: Optional[str] = None,
 
 def get_products_report(organization_id: Optional[str] = None, 
                        date_from: Optional[str] = None, 
-                       date_to: Optional[str] = None) -> Dict[str, Any]:
+                       date_to: Optional[str] = None,
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Получение отчёта по товарам
     
@@ -693,13 +1114,12 @@ def get_products_report(organization_id: Optional[str] = None,
         organization_id: ID организации (если не указан, используется глобальный)
         date_from: Дата начала периода (формат: YYYY-MM-DD)
         date_to: Дата окончания периода (формат: YYYY-MM-DD)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Отчёт по товарам
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/reports/products"
     params = {"organizationId": org_id}
@@ -710,7 +1130,7 @@ def get_products_report(organization_id: Optional[str] = None,
         params["dateTo"] = date_to
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result
     except Exception as e:
         logger.error(f"Ошибка получения отчёта по товарам: {e}")
@@ -719,7 +1139,8 @@ def get_products_report(organization_id: Optional[str] = None,
 # ==================== ДОСТАВКА ====================
 
 def create_delivery(delivery_data: Dict[str, Any], 
-                   organization_id: Optional[str] = None) -> Dict[str, Any]:
+                   organization_id: Optional[str] = None,
+                   timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Создание доставки
     
@@ -728,26 +1149,27 @@ def create_delivery(delivery_data: Dict[str, Any],
     Args:
         delivery_data: Данные доставки
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Созданная доставка
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/deliveries"
     data = {**delivery_data, "organizationId": org_id}
     
     try:
-        result = _make_request("POST", endpoint, data=data)
+        result = _make_request("POST", endpoint, data=data, timeout=timeout)
+        _forget_missing("deliveries", org_id)
         logger.info(f"Доставка создана: {result.get('id')}")
         return result
     except Exception as e:
         logger.error(f"Ошибка создания доставки: {e}")
         raise
 
-def get_delivery(delivery_id: str, organization_id: Optional[str] = None) -> Dict[str, Any]:
+def get_delivery(delivery_id: str, organization_id: Optional[str] = None,
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Получение информации о доставке
     
@@ -756,26 +1178,28 @@ def get_delivery(delivery_id: str, organization_id: Optional[str] = None) -> Dic
     Args:
         delivery_id: ID доставки
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Информация о доставке
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/deliveries/{delivery_id}"
     params = {"organizationId": org_id}
+    _raise_if_missing("deliveries", org_id, delivery_id, endpoint)
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result
     except Exception as e:
+        _remember_missing("deliveries", org_id, delivery_id, e)
         logger.error(f"Ошибка получения доставки {delivery_id}: {e}")
         raise
 
 def update_delivery(delivery_id: str, delivery_data: Dict[str, Any], 
-                   organization_id: Optional[str] = None) -> Dict[str, Any]:
+                   organization_id: Optional[str] = None,
+                   timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Обновление доставки
     
@@ -785,19 +1209,18 @@ def update_delivery(delivery_id: str, delivery_data: Dict[str, Any],
         delivery_id: ID доставки
         delivery_data: Новые данные доставки
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Обновлённая доставка
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/deliveries/{delivery_id}"
     data = {**delivery_data, "organizationId": org_id}
     
     try:
-        result = _make_request("PUT", endpoint, data=data)
+        result = _make_request("PUT", endpoint, data=data, timeout=timeout)
         logger.info(f"Доставка {delivery_id} обновлена")
         return result
     except Exception as e:
@@ -806,7 +1229,8 @@ def update_delivery(delivery_id: str, delivery_data: Dict[str, Any],
 
 def get_deliveries(organization_id: Optional[str] = None, 
                    date_from: Optional[str] = None, 
-                   date_to: Optional[str] = None) -> List[Dict[str, Any]]:
+                   date_to: Optional[str] = None,
+                   timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка доставок
     
@@ -816,13 +1240,12 @@ def get_deliveries(organization_id: Optional[str] = None,
         organization_id: ID организации (если не указан, используется глобальный)
         date_from: Дата начала периода (формат: YYYY-MM-DD)
         date_to: Дата окончания периода (формат: YYYY-MM-DD)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список доставок
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/deliveries"
     params = {"organizationId": org_id}
@@ -833,7 +1256,7 @@ def get_deliveries(organization_id: Optional[str] = None,
         params["dateTo"] = date_to
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("deliveries", [])
     except Exception as e:
         logger.error(f"Ошибка получения доставок: {e}")
@@ -842,7 +1265,8 @@ def get_deliveries(organization_id: Optional[str] = None,
 # ==================== РЕЗЕРВЫ ====================
 
 def create_reserve(reserve_data: Dict[str, Any], 
-                  organization_id: Optional[str] = None) -> Dict[str, Any]:
+                  organization_id: Optional[str] = None,
+                  timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Создание резерва стола
     
@@ -851,26 +1275,26 @@ def create_reserve(reserve_data: Dict[str, Any],
     Args:
         reserve_data: Данные резерва
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Созданный резерв
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/reserves"
     data = {**reserve_data, "organizationId": org_id}
     
     try:
-        result = _make_request("POST", endpoint, data=data)
+        result = _make_request("POST", endpoint, data=data, timeout=timeout)
         logger.info(f"Резерв создан: {result.get('id')}")
         return result
     except Exception as e:
         logger.error(f"Ошибка создания резерва: {e}")
         raise
 
-def get_reserve(reserve_id: str, organization_id: Optional[str] = None) -> Dict[str, Any]:
+def get_reserve(reserve_id: str, organization_id: Optional[str] = None,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Получение информации о резерве
     
@@ -879,26 +1303,26 @@ def get_reserve(reserve_id: str, organization_id: Optional[str] = None) -> Dict[
     Args:
         reserve_id: ID резерва
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Информация о резерве
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/reserves/{reserve_id}"
     params = {"organizationId": org_id}
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result
     except Exception as e:
         logger.error(f"Ошибка получения резерва {reserve_id}: {e}")
         raise
 
 def update_reserve(reserve_id: str, reserve_data: Dict[str, Any], 
-                  organization_id: Optional[str] = None) -> Dict[str, Any]:
+                  organization_id: Optional[str] = None,
+                  timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Обновление резерва
     
@@ -908,26 +1332,26 @@ def update_reserve(reserve_id: str, reserve_data: Dict[str, Any],
         reserve_id: ID резерва
         reserve_data: Новые данные резерва
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Обновлённый резерв
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/reserves/{reserve_id}"
     data = {**reserve_data, "organizationId": org_id}
     
     try:
-        result = _make_request("PUT", endpoint, data=data)
+        result = _make_request("PUT", endpoint, data=data, timeout=timeout)
         logger.info(f"Резерв {reserve_id} обновлён")
         return result
     except Exception as e:
         logger.error(f"Ошибка обновления резерва {reserve_id}: {e}")
         raise
 
-def cancel_reserve(reserve_id: str, organization_id: Optional[str] = None) -> bool:
+def cancel_reserve(reserve_id: str, organization_id: Optional[str] = None,
+                   timeout: Optional[float] = None) -> bool:
     """
     Отмена резерва
     
@@ -936,19 +1360,18 @@ def cancel_reserve(reserve_id: str, organization_id: Optional[str] = None) -> bo
     Args:
         reserve_id: ID резерва
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         True если резерв успешно отменён
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/reserves/{reserve_id}/cancel"
     params = {"organizationId": org_id}
     
     try:
-        _make_request("POST", endpoint, params=params)
+        _make_request("POST", endpoint, params=params, timeout=timeout)
         logger.info(f"Резерв {reserve_id} отменён")
         return True
     except Exception as e:
@@ -957,7 +1380,8 @@ def cancel_reserve(reserve_id: str, organization_id: Optional[str] = None) -> bo
 
 def get_reserves(organization_id: Optional[str] = None, 
                  date_from: Optional[str] = None, 
-                 date_to: Optional[str] = None) -> List[Dict[str, Any]]:
+                 date_to: Optional[str] = None,
+                 timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка резервов
     
@@ -967,13 +1391,12 @@ def get_reserves(organization_id: Optional[str] = None,
         organization_id: ID организации (если не указан, используется глобальный)
         date_from: Дата начала периода (формат: YYYY-MM-DD)
         date_to: Дата окончания периода (формат: YYYY-MM-DD)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список резервов
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/reserves"
     params = {"organizationId": org_id}
@@ -984,7 +1407,7 @@ def get_reserves(organization_id: Optional[str] = None,
         params["dateTo"] = date_to
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("reserves", [])
     except Exception as e:
         logger.error(f"Ошибка получения резервов: {e}")
@@ -992,7 +1415,8 @@ def get_reserves(organization_id: Optional[str] = None,
 
 # ==================== СТОЛЫ И ЗОНЫ ====================
 
-def get_tables(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
+def get_tables(organization_id: Optional[str] = None,
+               timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка столов
     
@@ -1000,25 +1424,25 @@ def get_tables(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
     
     Args:
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список столов
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/tables"
     params = {"organizationId": org_id}
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("tables", [])
     except Exception as e:
         logger.error(f"Ошибка получения столов: {e}")
         raise
 
-def get_zones(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
+def get_zones(organization_id: Optional[str] = None,
+              timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка зон
     
@@ -1026,19 +1450,18 @@ def get_zones(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
     
     Args:
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список зон
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/zones"
     params = {"organizationId": org_id}
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("zones", [])
     except Exception as e:
         logger.error(f"Ошибка получения зон: {e}")
@@ -1047,7 +1470,8 @@ def get_zones(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
 # ==================== ПЛАТЕЖИ ====================
 
 def create_payment(payment_data: Dict[str, Any], 
-                  organization_id: Optional[str] = None) -> Dict[str, Any]:
+                  organization_id: Optional[str] = None,
+                  timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Создание платежа
     
@@ -1056,26 +1480,26 @@ def create_payment(payment_data: Dict[str, Any],
     Args:
         payment_data: Данные платежа
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Созданный платёж
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/payments"
     data = {**payment_data, "organizationId": org_id}
     
     try:
-        result = _make_request("POST", endpoint, data=data)
+        result = _make_request("POST", endpoint, data=data, timeout=timeout)
         logger.info(f"Платёж создан: {result.get('id')}")
         return result
     except Exception as e:
         logger.error(f"Ошибка создания платежа: {e}")
         raise
 
-def get_payment(payment_id: str, organization_id: Optional[str] = None) -> Dict[str, Any]:
+def get_payment(payment_id: str, organization_id: Optional[str] = None,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Получение информации о платеже
     
@@ -1084,19 +1508,18 @@ def get_payment(payment_id: str, organization_id: Optional[str] = None) -> Dict[
     Args:
         payment_id: ID платежа
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Информация о платеже
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = f"/api/1/payments/{payment_id}"
     params = {"organizationId": org_id}
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result
     except Exception as e:
         logger.error(f"Ошибка получения платежа {payment_id}: {e}")
@@ -1104,7 +1527,8 @@ def get_payment(payment_id: str, organization_id: Optional[str] = None) -> Dict[
 
 def get_payments(organization_id: Optional[str] = None, 
                  date_from: Optional[str] = None, 
-                 date_to: Optional[str] = None) -> List[Dict[str, Any]]:
+                 date_to: Optional[str] = None,
+                 timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка платежей
     
@@ -1114,13 +1538,12 @@ def get_payments(organization_id: Optional[str] = None,
         organization_id: ID организации (если не указан, используется глобальный)
         date_from: Дата начала периода (формат: YYYY-MM-DD)
         date_to: Дата окончания периода (формат: YYYY-MM-DD)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список платежей
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/payments"
     params = {"organizationId": org_id}
@@ -1131,15 +1554,53 @@ def get_payments(organization_id: Optional[str] = None,
         params["dateTo"] = date_to
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("payments", [])
     except Exception as e:
         logger.error(f"Ошибка получения платежей: {e}")
         raise
 
+def iter_payments(organization_id: Optional[str] = None, 
+                  date_from: Optional[str] = None, 
+                  date_to: Optional[str] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Потоковое получение списка платежей
+    
+    Платежи выдаются по одному по мере получения ответа, без загрузки
+    всего списка в память.
+    
+    Документация: https://api-ru.iiko.services/#operation/GetPayments
+    
+    Args:
+        organization_id: ID организации (если не указан, используется глобальный)
+        date_from: Дата начала периода (формат: YYYY-MM-DD)
+        date_to: Дата окончания периода (формат: YYYY-MM-DD)
+        chunk_size: Размер блока чтения в байтах
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+        
+    Returns:
+        Итератор по платежам
+    """
+    org_id = _resolve_organization_id(organization_id)
+    
+    endpoint = "/api/1/payments"
+    params = {"organizationId": org_id}
+    
+    if date_from:
+        params["dateFrom"] = date_from
+    if date_to:
+        params["dateTo"] = date_to
+    
+    return _log_errors(_stream_request("GET", endpoint, "payments", params=params,
+                                       chunk_size=chunk_size, timeout=timeout),
+                       "Ошибка получения платежей")
+
 # ==================== СКИДКИ И АКЦИИ ====================
 
-def get_discounts(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
+def get_discounts(organization_id: Optional[str] = None,
+                  timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка скидок
     
@@ -1147,25 +1608,25 @@ def get_discounts(organization_id: Optional[str] = None) -> List[Dict[str, Any]]
     
     Args:
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список скидок
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/discounts"
     params = {"organizationId": org_id}
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("discounts", [])
     except Exception as e:
         logger.error(f"Ошибка получения скидок: {e}")
         raise
 
-def get_promotions(organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
+def get_promotions(organization_id: Optional[str] = None,
+                   timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Получение списка акций
     
@@ -1173,19 +1634,18 @@ def get_promotions(organization_id: Optional[str] = None) -> List[Dict[str, Any]
     
     Args:
         organization_id: ID организации (если не указан, используется глобальный)
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
         
     Returns:
         Список акций
     """
-    org_id = organization_id or ORGANIZATION_ID
-    if not org_id:
-        raise ValueError("ID организации не указан")
+    org_id = _resolve_organization_id(organization_id)
     
     endpoint = "/api/1/promotions"
     params = {"organizationId": org_id}
     
     try:
-        result = _make_request("GET", endpoint, params=params)
+        result = _make_request("GET", endpoint, params=params, timeout=timeout)
         return result.get("promotions", [])
     except Exception as e:
         logger.error(f"Ошибка получения акций: {e}")
@@ -1193,33 +1653,39 @@ def get_promotions(organization_id: Optional[str] = None) -> List[Dict[str, Any]
 
 # ==================== УТИЛИТЫ ====================
 
-def get_api_info() -> Dict[str, Any]:
+def get_api_info(timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Получение информации об API
     
     Документация: https://api-ru.iiko.services/#operation/GetApiInfo
     
+    Args:
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+    
     Returns:
         Информация об API
     """
     endpoint = "/api/1/info"
     
     try:
-        result = _make_request("GET", endpoint)
+        result = _make_request("GET", endpoint, timeout=timeout)
         return result
     except Exception as e:
         logger.error(f"Ошибка получения информации об API: {e}")
         raise
 
-def check_connection() -> bool:
+def check_connection(timeout: Optional[float] = None) -> bool:
     """
     Проверка соединения с API
     
+    Args:
+        timeout: Общий лимит времени вызова, секунд (None - без ограничения)
+    
     Returns:
         True если соединение установлено
     """
     try:
-        get_api_info()
+        get_api_info(timeout=timeout)
         logger.info("Соединение с API установлено")
         return True
     except Exception as e:
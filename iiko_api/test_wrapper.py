@@ -6,6 +6,8 @@
 
 import sys
 import os
+import io
+import json
 
 # Добавляем текущую директорию в путь для импорта
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -84,6 +86,1134 @@ def test_organizations():
     except Exception as e:
         print(f"✗ Ошибка получения организаций: {e}")
 
+def test_stream_parsing():
+    """Тестирование потокового разбора списков"""
+    print("\n=== Тестирование потокового разбора JSON ===")
+    
+    from iiko_api_stream import iter_json_array
+    from data_example import CUSTOMERS_LIST_EXAMPLE
+    
+    body = json.dumps({"total": 2, **CUSTOMERS_LIST_EXAMPLE, "next": None},
+                      ensure_ascii=False).encode("utf-8")
+    # Блоки по 7 байт режут и строки, и многобайтовые символы
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    
+    customers = list(iter_json_array(chunks, "customers"))
+    assert customers == CUSTOMERS_LIST_EXAMPLE["customers"]
+    assert list(iter_json_array([b"[1, 2", b"3, {}]"])) == [1, 23, {}]
+    assert list(iter_json_array([b'{"customers": []}'], "customers")) == []
+    assert list(iter_json_array([b'{"other": 1}'], "customers")) == []
+    print(f"✓ Потоково разобрано клиентов: {len(customers)}")
+
+def test_customer_directory():
+    """Тестирование локального справочника клиентов"""
+    print("\n=== Тестирование справочника клиентов ===")
+    
+    from iiko_api_oop import IikoCustomersClient
+    from iiko_api_customers import CustomerDirectory
+    from data_example import CUSTOMERS_LIST_EXAMPLE
+    
+    client = IikoCustomersClient("https://api-ru.iiko.services", "test_key_123", "test_org_123")
+    directory = CustomerDirectory(client, resync_interval=None)
+    directory.load(CUSTOMERS_LIST_EXAMPLE["customers"])
+    
+    assert directory.find_by_phone("8 (900) 123-45-67")["id"] == "customer-001"
+    assert directory.find_by_email(" MARIA@example.com ")["id"] == "customer-002"
+    assert directory.find_by_phone("+79990000000") is None
+    assert [c["id"] for c in directory.autocomplete_phone("+7900123456")] == ["customer-001", "customer-002"]
+    assert [c["id"] for c in directory.autocomplete_name("мар")] == ["customer-002"]
+    print(f"✓ Клиентов в справочнике: {len(directory)}")
+    
+    # Изменения во время полной загрузки не теряются при подмене снимка
+    client.create_customer = lambda data: {"id": "customer-new"}
+    client.update_customer = lambda customer_id, data: {}
+    
+    def customers_with_writes():
+        for number, customer in enumerate(CUSTOMERS_LIST_EXAMPLE["customers"]):
+            yield customer
+            if number == 0:
+                directory.create_customer({"name": "Новый Клиент", "phone": "+79995554433"})
+                directory.update_customer("customer-001", {"email": "ivan.new@example.com"})
+    
+    directory.load(customers_with_writes())
+    assert directory.find_by_phone("89995554433")["id"] == "customer-new"
+    assert directory.find_by_email("ivan.new@example.com")["id"] == "customer-001"
+    assert directory.get("customer-001")["phone"] == CUSTOMERS_LIST_EXAMPLE["customers"][0]["phone"]
+    print("✓ Созданные и обновлённые во время загрузки клиенты сохраняются")
+    
+    # Общий телефон или email у нескольких клиентов
+    directory.load([{"id": "customer-a", "phone": "+79001112233", "email": "family@example.com"},
+                    {"id": "customer-b", "phone": "8 900 111-22-33", "email": "family@example.com"}])
+    assert directory.find_by_phone("+79001112233")["id"] == "customer-a"
+    directory.update_customer("customer-a", {"phone": "+79004445566", "email": "a@example.com"})
+    assert directory.find_by_phone("+79001112233")["id"] == "customer-b"
+    assert directory.find_by_email("family@example.com")["id"] == "customer-b"
+    assert directory.find_duplicate({"phone": "89001112233"})["id"] == "customer-b"
+    print("✓ Клиенты с общим телефоном или email не вытесняют друг друга из индекса")
+
+def test_reservation_index():
+    """Тестирование индекса доступности столов"""
+    print("\n=== Тестирование индекса резервов ===")
+    
+    from iiko_api_oop import IikoReservesClient
+    from iiko_api_reservations import ReservationIndex
+    from data_example import TABLES_LIST_EXAMPLE, ZONES_LIST_EXAMPLE, RESERVES_LIST_EXAMPLE
+    
+    client = IikoReservesClient("https://api-ru.iiko.services", "test_key_123", "test_org_123")
+    index = ReservationIndex(client)
+    index.load(TABLES_LIST_EXAMPLE["tables"], ZONES_LIST_EXAMPLE["zones"],
+               RESERVES_LIST_EXAMPLE["reserves"])
+    
+    assert not index.is_available("table-001", "2024-01-20T20:30:00Z")
+    assert index.is_available("table-001", "2024-01-20T21:00:00Z")
+    assert index.is_available("table-001", "2024-01-20T17:00:00Z")
+    tables = index.available_tables("2024-01-20T19:30:00Z", guests=4, zone="Основной зал")
+    assert [t["id"] for t in tables] == ["table-002"]
+    index.remove_reserve("reserve-001")
+    tables = index.available_tables("2024-01-20T19:30:00Z", guests=4, zone="zone-001")
+    assert [t["id"] for t in tables] == ["table-001", "table-002"]
+    print(f"✓ Резервов в индексе: {len(index)}")
+    
+    assert [r["id"] for r in index.unresolved_reserves()] == ["reserve-002"]
+    assert [r["id"] for r in index.unresolved_reserves("2024-01-20T19:30:00Z")] == ["reserve-002"]
+    assert index.unresolved_reserves("2024-01-20T17:00:00Z", duration_minutes=60) == []
+    print("✓ Резервы с неизвестным столом возвращаются отдельно")
+    
+    # Изменения во время полной загрузки не теряются при перестройке индекса
+    client.create_reserve = lambda data: {"id": "reserve-new"}
+    client.cancel_reserve = lambda reserve_id: True
+    
+    def reserves_with_writes():
+        yield from RESERVES_LIST_EXAMPLE["reserves"]
+        index.cancel_reserve("reserve-001")
+        index.create_reserve({"tableId": "table-002", "reservationDate": "2024-01-20T19:00:00.000Z"})
+    
+    index.load(TABLES_LIST_EXAMPLE["tables"], ZONES_LIST_EXAMPLE["zones"], reserves_with_writes())
+    assert index.get_reserve("reserve-001") is None
+    assert index.is_available("table-001", "2024-01-20T19:30:00Z")
+    assert not index.is_available("table-002", "2024-01-20T19:30:00Z")
+    print("✓ Созданные и отменённые во время загрузки резервы учитываются")
+
+def test_response_cache():
+    """Тестирование дискового кэша ответов"""
+    print("\n=== Тестирование кэша ответов ===")
+    
+    import tempfile
+    from iiko_api_cache import ResponseCache, SqliteCache
+    from data_example import MENU_EXAMPLE
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "responses.db")
+        calls = []
+        loader = lambda: calls.append(1) or MENU_EXAMPLE
+        writer = ResponseCache(SqliteCache(path))
+        params = {"organizationId": "test_org_123"}
+        assert writer.fetch("url/api/1/menu", "/api/1/menu", params, loader) == MENU_EXAMPLE
+        assert writer.fetch("url/api/1/menu", "/api/1/menu", params, loader) == MENU_EXAMPLE
+        reader = ResponseCache(SqliteCache(path, readonly=True))
+        assert reader.fetch("url/api/1/menu", "/api/1/menu", params, loader) == MENU_EXAMPLE
+        assert len(calls) == 1
+        reader.fetch("url/api/1/orders", "/api/1/orders", params, loader)
+        assert len(calls) == 2
+    print("✓ Кэш ответов общий для читателей")
+    
+    import requests
+    import iiko_api_wrapper
+    from iiko_api_cache import MemoryCache
+    from iiko_api_wrapper import IikoContext, set_response_cache
+    
+    class TenantTransport:
+        """Транспорт, возвращающий организации владельца API ключа"""
+        
+        def request(self, method, url, headers=None, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            tenant = headers["Authorization"].split()[-1]
+            response._content = json.dumps({"organizations": [{"id": tenant}]}).encode()
+            return response
+    
+    set_response_cache(ResponseCache(MemoryCache()))
+    try:
+        tenants = [IikoContext(api_key=key, transport=TenantTransport())
+                   for key in ("TENANT_A", "TENANT_B")]
+        organizations = tenants[0].run(iiko_api_wrapper.get_organizations)
+        organizations[0]["id"] = "changed"
+        assert tenants[0].run(iiko_api_wrapper.get_organizations) == [{"id": "TENANT_A"}]
+        assert tenants[1].run(iiko_api_wrapper.get_organizations) == [{"id": "TENANT_B"}]
+    finally:
+        set_response_cache(None)
+    print("✓ Ответы разных API ключей не смешиваются, значения кэша не изменяются вызывающими")
+
+def test_order_validation():
+    """Тестирование локальной проверки заказов"""
+    print("\n=== Тестирование проверки заказов ===")
+    
+    import copy
+    from iiko_api_oop import IikoOrdersClient, OrderValidationError
+    from iiko_api_validation import CatalogIndex
+    from data_example import PRODUCTS_LIST_EXAMPLE, MENU_EXAMPLE, ORDER_CREATE_REQUEST_EXAMPLE
+    
+    catalog = CatalogIndex(PRODUCTS_LIST_EXAMPLE["products"], MENU_EXAMPLE["items"])
+    assert catalog.validate(ORDER_CREATE_REQUEST_EXAMPLE) == []
+    
+    order = copy.deepcopy(ORDER_CREATE_REQUEST_EXAMPLE)
+    order["items"][0]["price"] = 400.0
+    order["items"][0]["modifiers"].append({"id": "mod-999", "amount": 1})
+    order["items"].append({"productId": "unknown", "amount": 1})
+    codes = [error["code"] for error in catalog.validate(order)]
+    assert codes == ["price_mismatch", "unknown_modifier", "unknown_product"]
+    
+    client = IikoOrdersClient("https://api-ru.iiko.services", "test_key_123", "test_org_123",
+                              validator=catalog)
+    try:
+        client.create_order(order)
+        assert False, "Заказ должен быть отклонён"
+    except OrderValidationError as e:
+        assert len(e.errors) == 3
+    print("✓ Неверный заказ отклонён без запроса к API")
+
+def test_call_context():
+    """Тестирование контекстов вызовов в разных потоках"""
+    print("\n=== Тестирование контекстов вызовов ===")
+    
+    from concurrent.futures import ThreadPoolExecutor
+    import iiko_api_wrapper
+    from iiko_api_wrapper import IikoContext, use_context, _resolve_organization_id
+    
+    set_organization_id("test_org_123")
+    contexts = [IikoContext(api_key=f"key_{i}", organization_id=f"org_{i}") for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resolved = list(executor.map(lambda ctx: ctx.run(_resolve_organization_id), contexts * 4))
+    assert resolved == [f"org_{i}" for i in range(8)] * 4
+    
+    with use_context(IikoContext(organization_id="org_scoped")):
+        assert _resolve_organization_id() == "org_scoped"
+        assert _resolve_organization_id("org_explicit") == "org_explicit"
+    assert _resolve_organization_id() == iiko_api_wrapper.ORGANIZATION_ID
+    print("✓ Контексты вызовов изолированы")
+    
+    import requests
+    
+    class RecordingTransport:
+        """Транспорт, запоминающий организацию и ключ запросов"""
+        requests_seen = []
+        
+        def request(self, method, url, headers=None, params=None, **kwargs):
+            self.requests_seen.append((params["organizationId"], headers["Authorization"]))
+            response = requests.Response()
+            response.status_code = 200
+            response.raw = io.BytesIO(b'{"customers": [{"id": "customer-1"}]}')
+            return response
+    
+    set_api_key("GLOBAL_KEY")
+    context = IikoContext(api_key="CTX_KEY", organization_id="CTX_ORG",
+                          transport=RecordingTransport())
+    with use_context(context):
+        customers = iiko_api_wrapper.iter_customers()
+    assert [customer["id"] for customer in customers] == ["customer-1"]
+    assert list(context.run(iiko_api_wrapper.iter_customers)) == [{"id": "customer-1"}]
+    assert RecordingTransport.requests_seen == [("CTX_ORG", "Bearer CTX_KEY")] * 2
+    print("✓ Потоковые итераторы используют контекст, в котором созданы")
+
+def test_deadline():
+    """Тестирование сроков выполнения вызовов"""
+    print("\n=== Тестирование сроков выполнения ===")
+    
+    import time
+    import requests
+    from iiko_api_oop import IikoOrdersClient
+    from iiko_api_deadline import DeadlineExceeded, deadline
+    
+    class HangingTransport:
+        """Транспорт, ответ которого не приходит до истечения таймаута чтения"""
+        timeouts = []
+        
+        def request(self, method, url, timeout=None, **kwargs):
+            self.timeouts.append(timeout)
+            time.sleep(timeout[1])
+            raise requests.exceptions.ReadTimeout("read timed out")
+    
+    client = IikoOrdersClient("https://api-ru.iiko.services", "test_key_123", "test_org_123",
+                              transport=HangingTransport())
+    started = time.monotonic()
+    try:
+        client.get_order("order-001", timeout=0.05)
+        assert False, "Вызов должен быть прерван по сроку"
+    except DeadlineExceeded:
+        pass
+    assert time.monotonic() - started < 1.0
+    assert HangingTransport.timeouts[-1][1] <= 0.05
+    
+    with deadline(0.02):
+        try:
+            client.get_order("order-001", timeout=10)
+            assert False, "Внешний срок должен ограничивать вызов"
+        except DeadlineExceeded:
+            pass
+    assert HangingTransport.timeouts[-1][1] <= 0.02
+    print("✓ Вызовы прерываются по истечении срока")
+
+def test_stale_while_revalidate():
+    """Тестирование фонового обновления истёкших ответов"""
+    print("\n=== Тестирование stale-while-revalidate ===")
+    
+    import threading
+    import time
+    from iiko_api_cache import MemoryCache, ResponseCache
+    
+    backend = MemoryCache()
+    cache = ResponseCache(backend)
+    key = cache.key("url/api/1/menu", {"organizationId": "test_org_123"})
+    backend.set(key, {"version": 1}, ttl=-1)
+    loaded = threading.Event()
+    calls = []
+    
+    def loader():
+        calls.append(1)
+        loaded.wait(5)
+        return {"version": 2}
+    
+    params = {"organizationId": "test_org_123"}
+    assert cache.fetch("url/api/1/menu", "/api/1/menu", params, loader) == {"version": 1}
+    assert cache.fetch("url/api/1/menu", "/api/1/menu", params, loader) == {"version": 1}
+    loaded.set()
+    for _ in range(500):
+        if cache.stats()["refreshes"]:
+            break
+        time.sleep(0.01)
+    assert cache.fetch("url/api/1/menu", "/api/1/menu", params, loader) == {"version": 2}
+    assert len(calls) == 1
+    assert cache.stats()["staleHits"] == 2
+    print("✓ Истёкший ответ отдан сразу и обновлён одним фоновым запросом")
+
+def test_negative_cache():
+    """Тестирование кэша отсутствующих ID"""
+    print("\n=== Тестирование кэша отсутствующих ID ===")
+    
+    import requests
+    from iiko_api_cache import NegativeCache
+    from iiko_api_oop import IikoOrdersClient, NotFoundError
+    
+    class NotFoundTransport:
+        """Транспорт, отвечающий 404 на GET и создающий заказ на POST"""
+        calls = []
+        
+        def request(self, method, url, **kwargs):
+            self.calls.append(method)
+            response = requests.Response()
+            response.url = url
+            response.status_code = 404 if method == "GET" else 200
+            response._content = b"" if method == "GET" else b'{"id": "order-404"}'
+            return response
+    
+    negative_cache = NegativeCache(ttl=60, max_entries=2)
+    client = IikoOrdersClient("https://api-ru.iiko.services", "test_key_123", "test_org_123",
+                              transport=NotFoundTransport(), negative_cache=negative_cache)
+    for _ in range(3):
+        try:
+            client.get_order("order-404")
+            assert False, "Несуществующий заказ должен вызывать NotFoundError"
+        except NotFoundError:
+            pass
+    assert NotFoundTransport.calls == ["GET"]
+    assert negative_cache.stats()["hitsByResource"] == {"orders": 2}
+    
+    client.create_order({"id": "order-404"})
+    try:
+        client.get_order("order-404")
+    except NotFoundError:
+        pass
+    assert NotFoundTransport.calls == ["GET", "POST", "GET"]
+    
+    for order_id in ("order-1", "order-2"):
+        negative_cache.add("orders", "test_org_123", order_id)
+    assert negative_cache.stats()["entries"] == 2
+    assert not negative_cache.contains("orders", "test_org_123", "order-404")
+    print("✓ Повторные запросы отсутствующих ID не доходят до API")
+
+def test_reconciliation():
+    """Тестирование параллельной сверки платежей с заказами"""
+    print("\n=== Тестирование сверки платежей ===")
+    
+    import time
+    import requests
+    from iiko_api_reconciliation import Reconciler
+    from iiko_api_wrapper import IikoContext
+    
+    class SlowTransport:
+        """Транспорт с задержкой ответа, отдающий заказы и платежи организации"""
+        
+        def request(self, method, url, params=None, **kwargs):
+            time.sleep(0.2)
+            org_id = params["organizationId"]
+            if url.endswith("/orders"):
+                body = {"orders": [{"id": f"{org_id}-1", "sum": 100.0, "status": "Closed"},
+                                   {"id": f"{org_id}-2", "sum": 50.0, "status": "Closed"}]}
+            else:
+                body = {"payments": [{"id": f"{org_id}-p1", "orderId": f"{org_id}-1",
+                                      "amount": 100.0, "status": "Completed"}]}
+            response = requests.Response()
+            response.status_code = 200
+            response.raw = io.BytesIO(json.dumps(body).encode())
+            return response
+    
+    reconciler = Reconciler()
+    context = IikoContext(api_key="test_key_123", transport=SlowTransport())
+    started = time.monotonic()
+    counts = context.run(reconciler.sync, ["org_a", "org_b"], max_workers=4)
+    assert time.monotonic() - started < 0.6, "Загрузки организаций должны идти параллельно"
+    assert counts == {"org_a": {"orders": 2, "payments": 1}, "org_b": {"orders": 2, "payments": 1}}
+    report = reconciler.report()
+    assert len(report["matched"]) == 2
+    assert sorted(row["orderId"] for row in report["unpaid"]) == ["org_a-2", "org_b-2"]
+    print("✓ Сверка загружает организации параллельно в контексте вызывающего")
+
+def test_hedging():
+    """Тестирование дублирования медленных GET запросов"""
+    print("\n=== Тестирование дублирования запросов ===")
+    
+    import threading
+    import time
+    from iiko_api_hedging import HedgedTransport, LatencyTracker, endpoint_key
+    from iiko_api_scheduler import BACKGROUND, ScheduledTransport, request_priority
+    
+    class FakeResponse:
+        def __init__(self, name):
+            self.name = name
+            self.closed = threading.Event()
+        
+        def close(self):
+            self.closed.set()
+    
+    class SlowOnceTransport:
+        """Транспорт, отвечающий медленно на запрос после установки slow_next"""
+        
+        def __init__(self):
+            self.calls = []
+            self.responses = []
+            self.slow_next = False
+        
+        def request(self, method, url, stream=False, **kwargs):
+            self.calls.append((threading.current_thread(), stream))
+            response = FakeResponse(f"response-{len(self.calls)}")
+            self.responses.append(response)
+            if self.slow_next:
+                self.slow_next = False
+                time.sleep(0.3)
+            return response
+    
+    url = "https://api-ru.iiko.services/api/1/orders/order-1"
+    inner = SlowOnceTransport()
+    hedged = HedgedTransport(inner, tracker=LatencyTracker(min_samples=1), max_hedge_ratio=1.0)
+    assert hedged.request("GET", url).name == "response-1"
+    assert inner.calls[0] == (threading.current_thread(), True), "Без квантиля - в потоке вызывающего"
+    
+    inner.calls.clear()
+    inner.responses.clear()
+    inner.slow_next = True
+    winner = hedged.request("GET", url)
+    assert winner.name == "response-2"
+    assert inner.responses[0].closed.wait(2), "Ответ проигравшего запроса должен быть закрыт"
+    assert not winner.closed.is_set()
+    assert hedged.stats()["hedging"]["hedgeWins"] == 1
+    
+    class InstantTransport:
+        def request(self, method, url, **kwargs):
+            return FakeResponse("instant")
+    
+    tracker = LatencyTracker(min_samples=1)
+    tracker.record(endpoint_key(url), 1.0)
+    scheduled = ScheduledTransport(InstantTransport())
+    with request_priority(BACKGROUND):
+        HedgedTransport(scheduled, tracker=tracker).request("GET", url)
+    assert scheduled.stats()["classes"]["background"]["requests"] == 1
+    print("✓ Медленный запрос дублируется, приоритет вызывающего сохраняется")
+    
+    from iiko_api_hedging import connection_pool_size
+    from iiko_api_transport import RequestsTransport
+    
+    assert connection_pool_size(ScheduledTransport(RequestsTransport(pool_maxsize=3))) == 3
+    
+    class BlockingTransport:
+        def __init__(self):
+            self.release = threading.Event()
+            self.threads = []
+        
+        def request(self, method, url, **kwargs):
+            self.threads.append(threading.current_thread())
+            if len(self.threads) == 1:
+                self.release.wait(5)
+            return FakeResponse("blocking")
+    
+    blocking = BlockingTransport()
+    tracker = LatencyTracker(min_samples=1)
+    tracker.record(endpoint_key(url), 10.0)
+    busy = HedgedTransport(blocking, tracker=tracker, max_workers=1)
+    holder = threading.Thread(target=busy.request, args=("GET", url))
+    holder.start()
+    while not blocking.threads:
+        time.sleep(0.005)
+    started = time.monotonic()
+    busy.request("GET", url)
+    assert time.monotonic() - started < 1.0, "Запрос не должен ждать в очереди пула"
+    assert blocking.threads[1] is threading.current_thread(), "При занятом пуле - в потоке вызывающего"
+    assert busy.stats()["hedging"]["poolBusy"] == 1
+    blocking.release.set()
+    holder.join()
+    print("✓ Занятый пул не ограничивает параллельность запросов")
+
+def test_batch_loader():
+    """Тестирование пакетной загрузки по ID"""
+    print("\n=== Тестирование пакетной загрузки ===")
+    
+    import asyncio
+    import threading
+    import time
+    from iiko_api_batch import BatchLoader
+    
+    batches = []
+    
+    def batch_fn(keys):
+        batches.append((sorted(keys), threading.current_thread()))
+        return {key: {"id": key} for key in keys}
+    
+    async def load_all(loader, keys):
+        loop_thread = threading.current_thread()
+        values = await asyncio.gather(*(loader.load_async(key) for key in keys))
+        return values, loop_thread
+    
+    values, loop_thread = asyncio.run(load_all(BatchLoader(batch_fn), [1, 2, 2, 3]))
+    assert [value["id"] for value in values] == [1, 2, 2, 3]
+    assert [keys for keys, _ in batches] == [[1, 2, 3]]
+    
+    batches.clear()
+    _, loop_thread = asyncio.run(load_all(BatchLoader(batch_fn, max_batch_size=2), [1, 2, 3]))
+    assert sorted(keys for keys, _ in batches) == [[1, 2], [3]]
+    assert all(thread is not loop_thread for _, thread in batches), "Пакет не должен блокировать цикл"
+    
+    batches.clear()
+    loader = BatchLoader(batch_fn, cache=True, cache_ttl=0.05, max_cached=1)
+    loader.load_many([1])
+    loader.load_many([1])
+    assert len(batches) == 1
+    loader.load_many([2])
+    loader.load_many([1])
+    assert len(batches) == 3, "Вытесненный результат загружается заново"
+    time.sleep(0.06)
+    loader.load_many([1])
+    assert len(batches) == 4, "Истёкший результат загружается заново"
+    print("✓ Ключи корутин собираются в пакет и разрешаются вне цикла событий")
+    
+    from iiko_api_deadline import current_deadline, deadline
+    
+    seen_deadlines = []
+    
+    def deadline_batch_fn(keys):
+        seen_deadlines.append(current_deadline())
+        return {key: {"id": key, "tags": []} for key in keys}
+    
+    loader = BatchLoader(deadline_batch_fn, window=0.01)
+    with deadline(5.0) as budget:
+        first, second = loader.load(1), loader.load(1)
+        first, second = first.result(1), second.result(1)
+    assert seen_deadlines == [budget], "Пакет по таймеру окна выполняется в контексте вызывающего"
+    first["tags"].append("changed")
+    assert second == {"id": 1, "tags": []}, "Каждый вызывающий получает свою копию результата"
+    
+    async def load_with_deadline():
+        with deadline(5.0) as budget:
+            values = await asyncio.gather(loader.load_async(2), loader.load_async(2))
+        return budget, values
+    
+    budget, (first, second) = asyncio.run(load_with_deadline())
+    assert seen_deadlines[-1] is budget, "Пакет корутин выполняется в контексте вызывающего"
+    assert first is not second
+    print("✓ Пакет разрешается в контексте вызывающего, результаты копируются")
+
+def test_order_watcher():
+    """Тестирование наблюдателя за заказами"""
+    print("\n=== Тестирование наблюдателя за заказами ===")
+    
+    from iiko_api_oop import NotFoundError
+    from iiko_api_watch import OrderWatcher
+    
+    class FakeOrdersClient:
+        organization_id = "test_org_123"
+        
+        def __init__(self):
+            self.statuses = {"order-1": "New"}
+            self.get_order_calls = []
+        
+        def get_orders(self, date_from=None):
+            return [{"id": order_id, "status": status} for order_id, status in self.statuses.items()]
+        
+        def get_order(self, order_id):
+            self.get_order_calls.append(order_id)
+            if order_id == "order-old":
+                return {"id": order_id, "status": "New"}
+            raise NotFoundError(f"Заказ {order_id} не найден")
+    
+    client = FakeOrdersClient()
+    watcher = OrderWatcher([client], min_interval=60)
+    for order_id in ("order-1", "order-old", "order-missing"):
+        watcher.watch(order_id, status="New")
+    assert watcher.poll() == []
+    assert sorted(client.get_order_calls) == ["order-missing", "order-old"]
+    assert watcher.tracked == {"test_org_123": {"order-1", "order-old"}}
+    
+    assert watcher.poll() == []
+    assert len(client.get_order_calls) == 2, "get_order() для заказа вне периода - с интервалом"
+    
+    client.statuses["order-1"] = "Closed"
+    events = watcher.poll()
+    assert [(event["orderId"], event["status"]) for event in events] == [("order-1", "Closed")]
+    
+    class FailingOrdersClient(FakeOrdersClient):
+        organization_id = "test_org_failing"
+        
+        def get_orders(self, date_from=None):
+            raise ConnectionError("API недоступен")
+    
+    client = FakeOrdersClient()
+    watcher = OrderWatcher([client, FailingOrdersClient()], min_interval=60)
+    watcher.watch("order-1", status="New")
+    watcher.watch("order-2", organization_id="test_org_failing", status="New")
+    client.statuses["order-1"] = "Cooking"
+    events = watcher.tick()
+    assert [(event["orderId"], event["status"]) for event in events] == [("order-1", "Cooking")], \
+        "Ошибка одной организации не отменяет события остальных"
+    
+    import threading
+    assert list(watcher.events(timeout=0.05)) == []
+    assert not any(thread.name == "OrderWatcher" for thread in threading.enumerate()), \
+        "Опрос, запущенный events(), должен останавливаться"
+    print("✓ Отсутствующие заказы снимаются с отслеживания, остальные опрашиваются с интервалом")
+
+def test_delivery_point_index():
+    """Тестирование сеточного индекса точек доставки"""
+    print("\n=== Тестирование индекса точек доставки ===")
+    
+    import numpy as np
+    from iiko_api_geo import DeliveryPointIndex, haversine
+    
+    rng = np.random.default_rng(7)
+    points = ([(43.60 + dlat, 39.72 + dlon) for dlat, dlon in rng.uniform(-0.2, 0.2, (300, 2))]
+              + [(59.93 + dlat, 30.30 + dlon) for dlat, dlon in rng.uniform(-0.2, 0.2, (300, 2))]
+              + [(59.93, 30.4703)])
+    index = DeliveryPointIndex([{"deliveryPoint": {"latitude": lat, "longitude": lon}}
+                                for lat, lon in points], cell_km=1.0)
+    lat, lon = np.array(points).T
+    for query_lat, query_lon in ((59.93, 30.30), (43.60, 39.72)):
+        distances = haversine(query_lat, query_lon, lat, lon)
+        expected = sorted(np.flatnonzero(distances <= 10.0).tolist())
+        assert sorted(i for i, _ in index.within(query_lat, query_lon, 10.0)) == expected
+        nearest = [i for i, _ in index.nearest(query_lat, query_lon, k=5)]
+        assert nearest == np.argsort(distances, kind="stable")[:5].tolist()
+    assert len(points) - 1 in [i for i, _ in index.within(59.93, 30.30, 10.0)]
+    print("✓ Поиск в радиусе и ближайших точек совпадает с полным перебором на разных широтах")
+
+def test_adaptive_concurrency():
+    """Тестирование адаптивного лимита параллельности"""
+    print("\n=== Тестирование адаптивного лимита параллельности ===")
+    
+    import threading
+    import time
+    from contextvars import ContextVar
+    from iiko_api_concurrency import AdaptiveConcurrencyTransport, AimdLimiter, adaptive_map
+    from iiko_api_deadline import DeadlineExceeded, deadline
+    
+    marker: ContextVar[str] = ContextVar("marker", default="none")
+    lock = threading.Lock()
+    running = [0, 0]
+    
+    def work(item):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return marker.get()
+    
+    marker.set("caller")
+    results = adaptive_map(work, range(16), AimdLimiter(initial_limit=8, max_limit=16), max_workers=4)
+    assert results == ["caller"] * 16, "Вызовы должны выполняться в контексте вызывающего"
+    assert running[1] > 4, "Пул не должен ограничивать лимит значением max_workers"
+    
+    release = threading.Event()
+    
+    class BlockingTransport:
+        def request(self, method, url, **kwargs):
+            release.wait(5)
+            return None
+    
+    transport = AdaptiveConcurrencyTransport(BlockingTransport(), initial_limit=1, max_limit=1)
+    url = "https://api-ru.iiko.services/api/1/orders"
+    holder = threading.Thread(target=transport.request, args=("GET", url))
+    holder.start()
+    while transport.limiter("/api/1/orders").in_flight == 0:
+        time.sleep(0.005)
+    started = time.monotonic()
+    try:
+        with deadline(0.05):
+            transport.request("GET", url)
+        assert False, "Ожидание места в лимите должно прерываться по сроку"
+    except DeadlineExceeded:
+        pass
+    finally:
+        release.set()
+        holder.join()
+    assert time.monotonic() - started < 1.0
+    print("✓ Лимит растёт выше размера пула, ожидание места ограничено сроком вызова")
+    
+    import requests
+    from iiko_api_deadline import Deadline, request_timeout
+    
+    class TimeoutTransport:
+        def __init__(self, error):
+            self.error = error
+        
+        def request(self, method, url, **kwargs):
+            raise self.error
+    
+    def limit_after(timeout=None, error=None):
+        error = error or requests.exceptions.ReadTimeout("read timed out")
+        transport = AdaptiveConcurrencyTransport(TimeoutTransport(error), initial_limit=8)
+        try:
+            transport.request("GET", url, timeout=timeout)
+        except requests.exceptions.Timeout:
+            pass
+        return transport.limiter("/api/1/orders").limit
+    
+    assert limit_after(timeout=(5.0, 60.0)) < 8, "Таймаут медленного API должен снижать лимит"
+    capped = request_timeout(Deadline(0.01), (5.0, 60.0))
+    assert limit_after(timeout=capped) == 8, "Таймаут, сокращённый сроком, не снижает лимит"
+    assert limit_after(error=DeadlineExceeded("срок")) == 8, "DeadlineExceeded не снижает лимит"
+    limiter = AimdLimiter(initial_limit=8)
+    with deadline(0.02):
+        try:
+            with limiter.slot():
+                time.sleep(0.03)
+                raise requests.exceptions.ReadTimeout("read timed out")
+        except requests.exceptions.Timeout:
+            pass
+    assert limiter.limit == 8, "Таймаут после истечения срока вызова не снижает лимит"
+    print("✓ Таймауты по сроку вызывающего не снижают общий лимит")
+
+def test_scheduler():
+    """Тестирование планировщика запросов с классами приоритета"""
+    print("\n=== Тестирование планировщика запросов ===")
+    
+    import time
+    from iiko_api_deadline import DeadlineExceeded, deadline
+    from iiko_api_scheduler import RateLimiter, ScheduledTransport
+    
+    class InstantTransport:
+        def request(self, method, url, **kwargs):
+            return method
+    
+    try:
+        ScheduledTransport(InstantTransport(), concurrency={"bulk": 1})
+        assert False, "Класс без веса должен отклоняться"
+    except ValueError:
+        pass
+    
+    limiter = RateLimiter(rate=0.5, burst=1)
+    transport = ScheduledTransport(InstantTransport(), rate_limiter=limiter)
+    url = "https://api-ru.iiko.services/api/1/orders"
+    assert transport.request("POST", url) == "POST"
+    started = time.monotonic()
+    try:
+        with deadline(0.05):
+            transport.request("POST", url)
+        assert False, "Ожидание токена должно прерываться по сроку"
+    except DeadlineExceeded:
+        pass
+    assert time.monotonic() - started < 0.5
+    assert transport.stats()["classes"]["critical"]["queued"] == 0
+    print("✓ Ожидание в очереди ограничено сроком вызова, классы без веса отклоняются")
+
+def test_cached_reports():
+    """Тестирование хранилища отчётов за закрытые дни"""
+    print("\n=== Тестирование хранилища отчётов ===")
+    
+    import tempfile
+    import requests
+    from iiko_api_reports import IikoCachedReportsClient, ReportStore
+    
+    class ReportsTransport:
+        """Транспорт, отвечающий отчётом за запрошенный период"""
+        calls = []
+        
+        def request(self, method, url, params=None, **kwargs):
+            self.calls.append((url.rsplit("/", 1)[-1], params["dateFrom"], params["dateTo"]))
+            if url.endswith("/sales"):
+                body = {"summary": {"totalOrders": 2, "totalRevenue": 100.0, "totalCustomers": 1},
+                        "byCategory": [{"category": "Пицца", "orders": 2, "revenue": 100.0}]}
+            else:
+                body = {"topProducts": [{"productId": "prod-001", "orders": 5, "revenue": 500.0}]}
+            response = requests.Response()
+            response.status_code = 200
+            response._content = json.dumps(body).encode()
+            return response
+    
+    with tempfile.TemporaryDirectory() as directory:
+        client = IikoCachedReportsClient("https://api-ru.iiko.services", "test_key_123",
+                                         "test_org_123", ReportStore(directory),
+                                         transport=ReportsTransport())
+        for _ in range(2):
+            report = client.get_products_report("2024-01-01", "2024-01-31")
+        assert report["topProducts"][0]["orders"] == 5
+        assert ReportsTransport.calls == [("products", "2024-01-01", "2024-01-31")]
+        
+        for _ in range(2):
+            report = client.get_sales_report("2024-01-01", "2024-01-10")
+        assert report["summary"]["totalOrders"] == 20
+        assert report["byCategory"][0]["revenue"] == 1000.0
+        assert len(ReportsTransport.calls) == 11, "Закрытые дни загружаются из API один раз"
+    print("✓ Отчёт по товарам запрашивается за период целиком, закрытые дни не запрашиваются повторно")
+
+def test_pricing():
+    """Тестирование расчёта корзины по скидкам и акциям из примеров"""
+    print("\n=== Тестирование расчёта корзины ===")
+    
+    from datetime import datetime, timezone
+    from data_example import DISCOUNTS_LIST_EXAMPLE, PROMOTIONS_LIST_EXAMPLE
+    from iiko_api_pricing import PricingEngine
+    
+    discounts = DISCOUNTS_LIST_EXAMPLE["discounts"]
+    promotions = PROMOTIONS_LIST_EXAMPLE["promotions"]
+    at = datetime(2024, 1, 15, 12, tzinfo=timezone.utc)
+    
+    engine = PricingEngine(discounts, promotions)
+    assert [rule.id for rule in engine.active_rules(at)] == ["discount-001", "discount-002", "promo-002"]
+    print("✓ Акция 2 по цене 1 без товаров не компилируется")
+    
+    result = engine.price([{"productId": "dish-002", "amount": 2, "price": 380.0}], at=at,
+                          delivery_cost=200.0)
+    assert result["discount"] == 76.0 and result["deliveryCost"] == 200.0
+    assert result["applied"] == {"discount-001": 76.0}
+    
+    result = engine.price([{"productId": "dish-002", "amount": 4, "price": 400.0}], at=at,
+                          delivery_cost=200.0)
+    assert result["discount"] == 240.0 and result["deliveryCost"] == 0.0
+    assert result["applied"] == {"discount-002": 240.0, "promo-002": 200.0}
+    print("✓ Скидки на заказ и бесплатная доставка учитывают минимальную сумму")
+    
+    bogo = {**promotions[0], "productIds": ["dish-002"]}
+    engine = PricingEngine(discounts, [bogo])
+    result = engine.price([{"productId": "dish-002", "amount": 3, "price": 380.0},
+                           {"productId": "dish-001", "amount": 1, "price": 450.0}], at=at)
+    assert [item["discount"] for item in result["items"]] == [380.0, 67.5]
+    assert result["applied"] == {"promo-001": 380.0, "discount-002": 67.5}
+    print("✓ Акция 2 по цене 1 с товарами применяется только к своим строкам")
+
+def test_delivery_feed():
+    """Тестирование ленты изменений доставок"""
+    print("\n=== Тестирование ленты доставок ===")
+    
+    import threading
+    from iiko_api_watch import DeliveryFeed
+    
+    class FakeDeliveriesClient:
+        organization_id = "test_org_feed"
+        
+        def __init__(self):
+            self.statuses = {"delivery-1": "New", "delivery-2": "New"}
+        
+        def get_deliveries(self, date_from=None):
+            return [{"id": delivery_id, "status": status}
+                    for delivery_id, status in self.statuses.items()]
+    
+    client = FakeDeliveriesClient()
+    feed = DeliveryFeed([client], min_interval=60)
+    assert [event["change"] for event in feed.tick()] == ["added", "added"]
+    
+    # Опрос в другом потоке во время передачи состояния новому подписчику
+    received = []
+    pollers = []
+    
+    def on_event(event):
+        received.append((event["deliveryId"], event["change"], event["delivery"]["status"]))
+        if not pollers:
+            client.statuses["delivery-2"] = "OnWay"
+            pollers.append(threading.Thread(target=feed.tick))
+            pollers[0].start()
+            pollers[0].join(0.2)
+    
+    feed.subscribe(on_event)
+    pollers[0].join()
+    assert received == [("delivery-1", "snapshot", "New"), ("delivery-2", "snapshot", "New"),
+                        ("delivery-2", "updated", "OnWay")], received
+    
+    late = []
+    feed.subscribe(lambda event: late.append((event["deliveryId"], event["change"])))
+    feed.tick()
+    assert late == [("delivery-1", "snapshot"), ("delivery-2", "snapshot")]
+    print("✓ Новый подписчик получает текущее состояние до последующих изменений")
+    
+    shared = DeliveryFeed.shared([client], window_days=1)
+    assert DeliveryFeed.shared([client]) is shared
+    assert DeliveryFeed.shared([client], window_days=1) is shared
+    try:
+        DeliveryFeed.shared([client], window_days=2)
+        assert False, "Ожидался ValueError"
+    except ValueError:
+        pass
+    print("✓ Общая лента не принимает других параметров молча")
+    
+    import asyncio
+    from iiko_api_watch import AdaptivePoller
+    
+    class CountingPoller(AdaptivePoller):
+        """Каждый опрос возвращает событие со своим номером"""
+        def __init__(self):
+            super().__init__(min_interval=0.02, max_interval=0.02)
+            self.calls = 0
+        
+        def poll(self):
+            self.calls += 1
+            return [{"number": self.calls}]
+    
+    async def consume(poller, limit):
+        received = []
+        stream = poller.events_async(timeout=1.0)
+        try:
+            async for event in stream:
+                received.append(event["number"])
+                if len(received) == limit:
+                    break
+        finally:
+            await stream.aclose()
+        return received
+    
+    async def consume_both(poller):
+        return await asyncio.gather(consume(poller, 5), consume(poller, 5))
+    
+    poller = CountingPoller()
+    first, second = asyncio.run(consume_both(poller))
+    for received in (first, second):
+        assert received == list(range(received[0], received[0] + 5)), received
+    assert set(first) & set(second), "Асинхронные потребители получают события общего опроса"
+    assert not any(thread.name == "CountingPoller" for thread in threading.enumerate())
+    print("✓ Асинхронные потребители подписываются на общий опрос")
+
+def test_client_headers():
+    """Тестирование заголовков клиента и сессии транспорта"""
+    print("\n=== Тестирование заголовков клиента ===")
+    
+    import warnings
+    from iiko_api_oop import IikoMenuClient
+    from iiko_api_transport import RequestsTransport
+    
+    client = IikoMenuClient("https://api-ru.iiko.services", "test_key_123", "test_org_123")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        client.session.headers.update({"Authorization": "Bearer new_key"})
+    assert client.headers["Authorization"] == "Bearer new_key"
+    print("✓ Заголовки собственной сессии клиента применяются к запросам")
+    
+    client = IikoMenuClient("https://api-ru.iiko.services", "test_key_123", "test_org_123",
+                            transport=RequestsTransport())
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert client.session is client.transport.session
+    assert [warning.category for warning in caught] == [DeprecationWarning]
+    assert client.headers["Authorization"] == "Bearer test_key_123"
+    print("✓ Обращение к сессии общего транспорта предупреждает об устаревании")
+
+def test_update_tracker():
+    """Тестирование отправки обновлений только при изменении полей"""
+    print("\n=== Тестирование отслеживания обновлений ===")
+    
+    from data_example import ORDER_RESPONSE_EXAMPLE
+    from iiko_api_updates import UpdateTracker
+    
+    sent = []
+    update = lambda order_id, body: sent.append(body) or {}
+    fetch = lambda order_id: {**ORDER_RESPONSE_EXAMPLE, "id": order_id}
+    
+    orders = UpdateTracker(update, fetch)
+    order = orders.get("order-001")
+    assert orders.update("order-001", order) is None and sent == []
+    print("✓ Обновление без изменений не отправляется")
+    
+    order["comment"] = "Позвонить за 10 минут"
+    orders.update("order-001", {"comment": order["comment"]})
+    expected = {key: value for key, value in order.items()
+                if key not in ("id", "organizationId", "number", "createdDate")}
+    assert sent == [expected], "По умолчанию отправляется полное состояние"
+    assert orders.update("order-001", order) is None and len(sent) == 1
+    
+    partial = UpdateTracker(update, fetch, partial=True)
+    order = partial.get("order-001")
+    order["comment"] = "Без звонка"
+    partial.update("order-001", order)
+    assert sent[-1] == {"comment": "Без звонка"}
+    assert partial.stats()["fieldsSent"] == 1
+    print("✓ Отправляется полное состояние, при partial=True - только изменённые поля")
+
+def test_stock_snapshot():
+    """Тестирование снимков складских остатков"""
+    print("\n=== Тестирование снимков остатков ===")
+    
+    from data_example import STOCK_EXAMPLE
+    from iiko_api_stock import StockSnapshot
+    
+    rows = STOCK_EXAMPLE["stock"]
+    previous = StockSnapshot.from_rows(rows, "test_org_123")
+    current = StockSnapshot.from_rows(
+        [{**rows[0], "amount": 3}, {**rows[1], "warehouseId": "warehouse-002"}], "test_org_123")
+    
+    assert [row["productId"] for row in current.low_stock()] == ["prod-001"]
+    assert current.low_stock()[0]["reorderAmount"] == 97.0
+    assert current.warehouse_totals() == {("test_org_123", "warehouse-001"): 3.0,
+                                          ("test_org_123", "warehouse-002"): 40.0}
+    
+    changes = current.diff(previous)
+    assert [(row["productId"], row["previousAmount"], row["delta"])
+            for row in changes["changed"]] == [("prod-001", 25.0, -22.0)]
+    assert [(row["productId"], row["warehouseId"]) for row in changes["added"]] == \
+        [("prod-002", "warehouse-002")]
+    assert [(row["productId"], row["warehouseId"]) for row in changes["removed"]] == \
+        [("prod-002", "warehouse-001")]
+    assert current.diff(current) == {"added": [], "removed": [], "changed": []}
+    print("✓ Разница снимков: изменённые, новые и исчезнувшие строки")
+
+def test_orders_table():
+    """Тестирование столбцовой аналитики заказов"""
+    print("\n=== Тестирование аналитики заказов ===")
+    
+    from data_example import ORDER_RESPONSE_EXAMPLE, ORDERS_LIST_EXAMPLE
+    from iiko_api_analytics import OrdersTable
+    
+    orders = ORDERS_LIST_EXAMPLE["orders"] + [
+        {**ORDER_RESPONSE_EXAMPLE, "id": "order-12347", "createdDate": "2024-01-15T19:10:00.000Z",
+         "items": ORDER_RESPONSE_EXAMPLE["items"] + [
+             {"productId": "prod-002", "productName": "Хинкали", "amount": 5, "price": 10.0}]}]
+    categories = {"prod-001": "Выпечка", "prod-002": "Горячее"}
+    table = OrdersTable.from_orders(orders, "test_org_123", categories, batch_size=2)
+    
+    assert table.summary() == {"totalOrders": 3, "totalRevenue": 2550.0, "averageOrderValue": 850.0}
+    assert table.summary(statuses=["New"])["totalOrders"] == 2
+    assert [(row["hour"], row["orders"], row["revenue"]) for row in table.by_hour(utc_offset=3)] == \
+        [(21, 2, 1600.0), (22, 1, 950.0)]
+    assert table.by_organization() == [{"organizationId": "test_org_123", "orders": 3,
+                                        "revenue": 2550.0, "averageCheck": 850.0}]
+    assert [(row["productId"], row["amount"], row["revenue"]) for row in table.by_product()] == \
+        [("prod-001", 2.0, 900.0), ("prod-002", 5.0, 50.0)]
+    assert [(row["category"], row["percentage"]) for row in table.by_category()] == \
+        [("Выпечка", 94.7), ("Горячее", 5.3)]
+    
+    merged = OrdersTable.concat([OrdersTable.from_orders(orders[:2], "test_org_123").to_arrays(),
+                                 OrdersTable.from_orders(orders[2:], "test_org_123").to_arrays()])
+    assert merged.summary() == table.summary()
+    assert merged.by_product() == table.by_product()
+    print("✓ Итоги по часам, организациям, товарам и категориям; объединение частей")
+
+def test_parallel_orders_table():
+    """Тестирование разбора заказов в пуле процессов"""
+    print("\n=== Тестирование разбора заказов в пуле процессов ===")
+    
+    from data_example import ORDER_RESPONSE_EXAMPLE, ORDERS_LIST_EXAMPLE
+    from iiko_api_parallel import (orders_report_from_json, orders_report_from_json_serial,
+                                   orders_table_from_json, orders_table_from_json_serial)
+    
+    extra = {"id": "order-12348", "status": "Closed", "sum": 50.0,
+             "createdDate": "2024-01-15T20:05:00.000Z",
+             "items": [{"productId": "prod-002", "productName": "Хинкали", "amount": 5, "sum": 50.0}]}
+    payloads = {
+        "org-1": json.dumps(ORDERS_LIST_EXAMPLE).encode(),
+        "org-2": json.dumps({"orders": [ORDER_RESPONSE_EXAMPLE, extra]}).encode(),
+    }
+    categories = {"prod-001": "Выпечка"}
+    serial = orders_table_from_json_serial(payloads, categories)
+    pooled = orders_table_from_json(payloads, categories, max_workers=2)
+    
+    assert pooled.order_ids == serial.order_ids == ["order-12345", "order-12346", "order-12345",
+                                                    "order-12348"]
+    assert pooled.summary() == serial.summary()
+    assert pooled.by_organization() == serial.by_organization()
+    assert [row["revenue"] for row in serial.by_organization()] == [1600.0, 1000.0]
+    assert pooled.by_category() == serial.by_category()
+    assert pooled.by_hour(utc_offset=3, of_day=False) == serial.by_hour(utc_offset=3, of_day=False)
+    print("✓ Результаты пула процессов совпадают с последовательным разбором")
+    
+    report = orders_report_from_json(payloads, categories, utc_offset=3, max_workers=2)
+    assert report == orders_report_from_json_serial(payloads, categories, utc_offset=3)
+    assert report["summary"] == serial.summary()
+    assert report["byOrganization"] == serial.by_organization()
+    assert report["byProduct"] == serial.by_product()
+    assert report["byCategory"] == serial.by_category()
+    assert report["byHour"] == serial.by_hour(utc_offset=3)
+    closed = orders_report_from_json(payloads, categories, statuses=["Closed"], top=1,
+                                     max_workers=2)
+    assert [row["productId"] for row in closed["byProduct"]] == ["prod-002"]
+    assert closed["summary"]["totalOrders"] == 1
+    print("✓ Группировки в процессах пула совпадают с группировками общей таблицы")
+
+def test_connection_warmup():
+    """Тестирование кэша DNS и прогрева соединений"""
+    print("\n=== Тестирование кэша DNS и прогрева ===")
+    
+    import time
+    import iiko_api_wrapper
+    from iiko_api_transport import DnsCache
+    
+    cache = DnsCache(ttl=0.05)
+    address = cache.resolve("localhost", 80)
+    assert cache.resolve("localhost", 80) == address
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+    time.sleep(0.06)
+    cache.resolve("localhost", 80)
+    assert cache.stats()["misses"] == 2, "Запись с истёкшим временем жизни разрешается заново"
+    cache.invalidate("localhost")
+    assert cache.stats()["entries"] == 0
+    cache.resolve("localhost", 80)
+    assert cache.stats()["misses"] == 3
+    print("✓ Записи кэша DNS истекают по времени жизни и сбрасываются invalidate()")
+    
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from iiko_api_transport import RequestsTransport
+    
+    class OkHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+        
+        def log_message(self, *args):
+            pass
+    
+    class UnreachableFirstCache(DnsCache):
+        """Первый адрес хоста не принимает соединения"""
+        def resolve_all(self, host, port):
+            return ["127.0.0.2", "127.0.0.1"]
+    
+    assert RequestsTransport().dns_cache is None, "Кэш DNS подключается явно"
+    server = HTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        transport = RequestsTransport(dns_cache=UnreachableFirstCache())
+        transport.session.trust_env = False
+        response = transport.request("GET", f"http://iiko.test:{server.server_port}/", timeout=5)
+        assert response.status_code == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("✓ Соединение пробует следующий адрес хоста, если первый недоступен")
+    
+    iiko_api_wrapper.set_transport(None)
+    try:
+        iiko_api_wrapper.warmup()
+        assert False, "Ожидался ValueError"
+    except ValueError:
+        pass
+    assert iiko_api_wrapper.TRANSPORT is None
+    print("✓ warmup() без транспорта не устанавливает его неявно")
+
 def main():
     """Основная функция тестирования"""
     print("🚀 Запуск тестирования iiko API обёртки")
@@ -91,6 +1221,31 @@ def main():
     
     # Базовые тесты
     test_basic_functionality()
+    test_client_headers()
+    test_stream_parsing()
+    test_customer_directory()
+    test_reservation_index()
+    test_response_cache()
+    test_stale_while_revalidate()
+    test_negative_cache()
+    test_order_validation()
+    test_update_tracker()
+    test_call_context()
+    test_reconciliation()
+    test_hedging()
+    test_batch_loader()
+    test_order_watcher()
+    test_delivery_feed()
+    test_delivery_point_index()
+    test_adaptive_concurrency()
+    test_scheduler()
+    test_cached_reports()
+    test_stock_snapshot()
+    test_orders_table()
+    test_parallel_orders_table()
+    test_connection_warmup()
+    test_pricing()
+    test_deadline()
     
     # Тесты API (требуют валидный API ключ)
     print("\n⚠️  Для тестирования API функций требуется валидный API ключ")